@@ -0,0 +1,98 @@
+"""
+مقایسه‌ی دو نتیجه‌ی benchmarks.run (مثلاً قبل و بعد از یک commit)
+
+    python -m benchmarks.compare old.json new.json --threshold 10
+
+افت throughput یا رشد p95 بیشتر از threshold درصد regression حساب می‌شود و کد خروج 1 است.
+"""
+import argparse
+import json
+
+METRICS = (
+    # (نام، مسیر در نتیجه، بیشتر بهتر است)
+    ("rps", ("rps",), True),
+    ("p50", ("latency_ms", "p50"), False),
+    ("p95", ("latency_ms", "p95"), False),
+    ("p99", ("latency_ms", "p99"), False),
+)
+
+# فقط این‌ها برای regression بررسی می‌شوند؛ p50 و p99 فقط نمایش داده می‌شوند
+GATED = {"rps", "p95"}
+
+
+def _value(result, path):
+    for key in path:
+        if result is None:
+            return None
+        result = result.get(key)
+    return result
+
+
+def _change(old, new):
+    if not old or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(old, new, threshold) -> tuple[list, list]:
+    """
+    Returns:
+        tuple: (ردیف‌های جدول، لیست regressionها)
+    """
+    rows, regressions = [], []
+    for scenario in new["scenarios"]:
+        if scenario not in old["scenarios"]:
+            continue
+        before, after = old["scenarios"][scenario], new["scenarios"][scenario]
+        for name, path, higher_is_better in METRICS:
+            old_value, new_value = _value(before, path), _value(after, path)
+            change = _change(old_value, new_value)
+            worse = change is not None and (-change if higher_is_better else change) > threshold
+            rows.append((scenario, name, old_value, new_value, change, worse and name in GATED))
+            if worse and name in GATED:
+                regressions.append(f"{scenario} {name}: {old_value} -> {new_value} ({change:+.1f}%)")
+        if after.get("errors") and not before.get("errors"):
+            regressions.append(f"{scenario}: {after['errors']} errors")
+    return rows, regressions
+
+
+def _describe(report):
+    meta, config = report["meta"], report["config"]
+    commit = (meta.get("commit") or "nogit")[:8] + ("-dirty" if meta.get("dirty") else "")
+    return f"{commit} {config['mode']} c={config['concurrency']} {report['dataset']['params']}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args(argv)
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(f"old: {_describe(old)}")
+    print(f"new: {_describe(new)}")
+    if old["dataset"]["params"] != new["dataset"]["params"] or old["config"]["mode"] != new["config"]["mode"]:
+        print("warning: results were produced with different datasets or modes")
+
+    rows, regressions = compare(old, new, args.threshold)
+    print(f"\n{'scenario':<18} {'metric':<6} {'old':>12} {'new':>12} {'change':>9}")
+    for scenario, name, old_value, new_value, change, regressed in rows:
+        change_text = f"{change:+.1f}%" if change is not None else "-"
+        print(f"{scenario:<18} {name:<6} {str(old_value):>12} {str(new_value):>12} {change_text:>9}"
+              f"{'  REGRESSION' if regressed else ''}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold}%:")
+        for regression in regressions:
+            print(f"  {regression}")
+        raise SystemExit(1)
+    print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
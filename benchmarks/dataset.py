@@ -0,0 +1,262 @@
+"""
+ساخت دیتابیس SQLite مصنوعی برای benchmark با مقیاس قابل تنظیم
+
+داده با random.Random(seed) ساخته می‌شود، پس با پارامترهای یکسان همیشه همان داده ساخته می‌شود.
+فایل ساخته شده (و پارامترهایش در <file>.json) دوباره استفاده می‌شود تا اجراهای بعدی seed نکنند.
+ردیف‌ها با INSERT دسته‌ای (Core) نوشته می‌شوند و جداول مشتق شده (favorite_counters، stat_counters)
+در پایان با reconcile ساخته می‌شوند.
+"""
+import hashlib
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+BENCH_PASSWORD = "benchmark"
+BENCH_EMAIL = "bench-login@example.com"
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".data")
+
+INSERT_BATCH_SIZE = 5000
+
+# تعداد ردیف‌های هر جدول
+SCALES = {
+    "tiny": dict(exhibitions=5, companies=50, products=500, users=500, views=10_000, favorites=2_000),
+    "small": dict(exhibitions=20, companies=500, products=5_000, users=5_000, views=100_000, favorites=20_000),
+    "medium": dict(exhibitions=100, companies=5_000, products=50_000, users=50_000, views=1_000_000, favorites=200_000),
+    "large": dict(exhibitions=500, companies=20_000, products=200_000, users=200_000, views=10_000_000, favorites=1_000_000),
+}
+
+TAGS = ["industrial", "food", "medical", "textile", "software", "energy", "automotive", "packaging", "chemical", "agri"]
+CATEGORIES = ["tech", "health", "food", "industry", "energy", None]
+HALLS = ["A", "B", "C", "D", "E"]
+WORDS = (
+    "smart modular compact premium eco portable digital hybrid advanced organic wireless solar "
+    "pump valve sensor panel motor filter coating fabric drone module controller printer"
+).split()
+
+# بازه‌ی زمانی بازدیدها و علاقه‌مندی‌ها (روز قبل از زمان ساخت)
+HISTORY_DAYS = 90
+
+
+def dataset_params(scale="small", seed=42, **overrides) -> dict:
+    params = dict(SCALES[scale], seed=seed)
+    params.update({key: value for key, value in overrides.items() if value is not None})
+    return params
+
+
+def dataset_path(params) -> str:
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:10]
+    return os.path.join(DATA_DIR, f"bench-{digest}.sqlite3")
+
+
+def _batches(rows, size=INSERT_BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(connection, table, rows):
+    count = 0
+    for batch in _batches(rows):
+        connection.execute(insert(table), batch)
+        count += len(batch)
+    return count
+
+
+def _title(rng, words=3):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).title()
+
+
+def build(path, params, log=print):
+    """
+    ساخت دیتابیس در path (فایل قبلی حذف می‌شود)
+
+    Returns:
+        dict: تعداد ردیف‌های هر جدول و زمان ساخت
+    """
+    from src.database.database import Database
+    from src.database.managers import FavoriteManager, StatsManager, UserManager
+    from src.database.partitions import add_months, month_key, month_start
+    from src.database.models import (
+        User, CompanyProfile, Exhibition, ExpoCompany, Product, ProductTag,
+        product_tag_association, UserFavorite, RoleEnum, ExpoStatusEnum, FavoriteTypeEnum, ViewTargetEnum,
+    )
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for suffix in ("", "-wal", "-shm", ".json"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    started = time.perf_counter()
+    rng = random.Random(params["seed"])
+    now = datetime.utcnow().replace(microsecond=0)
+    history_start = now - timedelta(days=HISTORY_DAYS)
+
+    db = Database(f"sqlite:///{path}")
+    db.create_tables()
+    # یک hash برای همه‌ی کاربران؛ argon2 برای هر کاربر جدا ساخت داده را کند می‌کند
+    password_hash = UserManager(db).hash_password(BENCH_PASSWORD)
+
+    companies = params["companies"]
+    users = max(params["users"], companies + 1)
+    counts = {}
+
+    def timestamps():
+        created = history_start + timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+        return {"created_at": created, "updated_at": created}
+
+    with db.engine.begin() as connection:
+        # کاربر اول برای /auth/login، سپس صاحبان شرکت‌ها، بقیه بازدیدکننده
+        counts["users"] = _insert(connection, User.__table__, (
+            {
+                "username": f"user{index}",
+                "email": BENCH_EMAIL if index == 1 else f"user{index}@bench.local",
+                "password": password_hash,
+                "role": RoleEnum.exhibitor if 1 < index <= companies + 1 else RoleEnum.visitor,
+                "is_active": True,
+                **timestamps(),
+            }
+            for index in range(1, users + 1)
+        ))
+        counts["companies"] = _insert(connection, CompanyProfile.__table__, (
+            {
+                "user_id": index + 1,
+                "company_name": f"{_title(rng, 2)} Co {index}",
+                "industry_category": rng.choice(TAGS),
+                "description": " ".join(rng.choice(WORDS) for _ in range(30)),
+                **timestamps(),
+            }
+            for index in range(1, companies + 1)
+        ))
+
+        exhibition_rows = []
+        for index in range(1, params["exhibitions"] + 1):
+            start = now + timedelta(days=rng.randint(-60, 120))
+            exhibition_rows.append({
+                "name": f"{_title(rng, 2)} Expo {index}",
+                "description": " ".join(rng.choice(WORDS) for _ in range(40)),
+                "start_date": start,
+                "end_date": start + timedelta(days=rng.randint(2, 7)),
+                "year": start.year,
+                "category_level": rng.choice(CATEGORIES),
+                "status": rng.choice(list(ExpoStatusEnum)),
+                **timestamps(),
+            })
+        counts["exhibitions"] = _insert(connection, Exhibition.__table__, exhibition_rows)
+
+        # هر شرکت در ۱ تا ۳ نمایشگاه غرفه دارد
+        booths = []
+        for company_id in range(1, companies + 1):
+            for exhibition_id in rng.sample(range(1, params["exhibitions"] + 1), k=min(rng.randint(1, 3), params["exhibitions"])):
+                booths.append({
+                    "exhibition_id": exhibition_id,
+                    "company_id": company_id,
+                    "booth_number": str(rng.randint(1, 500)),
+                    "hall_name": rng.choice(HALLS),
+                    **timestamps(),
+                })
+        counts["expo_companies"] = _insert(connection, ExpoCompany.__table__, booths)
+
+        counts["products"] = _insert(connection, Product.__table__, (
+            {
+                "company_id": rng.randint(1, companies),
+                "title": _title(rng),
+                "summary": " ".join(rng.choice(WORDS) for _ in range(12)),
+                "long_description": " ".join(rng.choice(WORDS) for _ in range(80)),
+                "price_range": rng.choice(["$", "$$", "$$$"]),
+                **timestamps(),
+            }
+            for _ in range(params["products"])
+        ))
+        _insert(connection, ProductTag.__table__, ({"name": name, **timestamps()} for name in TAGS))
+        counts["product_tags"] = _insert(connection, product_tag_association, (
+            {"product_id": product_id, "tag_id": tag_id}
+            for product_id in range(1, params["products"] + 1)
+            for tag_id in rng.sample(range(1, len(TAGS) + 1), k=2)
+        ))
+
+        targets = {
+            FavoriteTypeEnum.product: params["products"],
+            FavoriteTypeEnum.company: companies,
+            FavoriteTypeEnum.exhibition: params["exhibitions"],
+        }
+        seen = set()
+        favorites = []
+        while len(favorites) < params["favorites"]:
+            favorite_type = rng.choice(list(targets))
+            key = (rng.randint(1, users), favorite_type, rng.randint(1, targets[favorite_type]))
+            if key in seen:
+                continue
+            seen.add(key)
+            favorites.append({"user_id": key[0], "favorite_type": key[1], "target_id": key[2], **timestamps()})
+        counts["favorites"] = _insert(connection, UserFavorite.__table__, favorites)
+
+    # بازدیدها به جدول ماه خودشان (با VIEW_PARTITIONING)؛ DDL پارتیشن قبل از transaction نوشتن
+    view_targets = {
+        ViewTargetEnum.product: params["products"],
+        ViewTargetEnum.company: companies,
+        ViewTargetEnum.exhibition: params["exhibitions"],
+    }
+    tables = {}
+    key = month_key(history_start)
+    while key <= month_key(now):
+        tables[key] = db.partitions.table_for("user_views", month_start(key))
+        key = add_months(key, 1)
+
+    def views():
+        for _ in range(params["views"]):
+            target_type = rng.choice(list(view_targets))
+            viewed_at = history_start + timedelta(microseconds=rng.randrange(HISTORY_DAYS * 86400 * 10 ** 6))
+            yield tables[month_key(viewed_at)], {
+                "user_id": rng.randint(1, users) if rng.random() < 0.7 else None,
+                "target_type": target_type,
+                "target_id": rng.randint(1, view_targets[target_type]),
+                "viewed_at": viewed_at,
+                "created_at": viewed_at,
+                "updated_at": viewed_at,
+            }
+
+    # هر INSERT_BATCH_SIZE بازدید جدا بر اساس جدول نوشته می‌شود؛ preset large (10M) در حافظه جمع نمی‌شود
+    counts["views"] = 0
+    with db.engine.begin() as connection:
+        for batch in _batches(views()):
+            by_table = {}
+            for table, row in batch:
+                by_table.setdefault(table, []).append(row)
+            for table, rows in by_table.items():
+                counts["views"] += _insert(connection, table, rows)
+
+    FavoriteManager(db).reconcile_counters()
+    StatsManager(db).reconcile()
+    db.engine.dispose()
+
+    counts["seconds"] = round(time.perf_counter() - started, 1)
+    with open(path + ".json", "w") as f:
+        json.dump({"params": params, "counts": counts}, f, indent=2)
+    log(f"Dataset built in {counts['seconds']}s: {path}")
+    return counts
+
+
+def ensure(params, fresh=False, log=print) -> str:
+    """
+    مسیر دیتابیس با همین پارامترها؛ اگر وجود ندارد (یا fresh) ساخته می‌شود
+    """
+    path = dataset_path(params)
+    if fresh or not os.path.exists(path + ".json"):
+        log(f"Building dataset {params} ...")
+        build(path, params, log=log)
+    return path
+
+
+def describe(path) -> dict:
+    with open(path + ".json") as f:
+        return json.load(f)
@@ -0,0 +1,287 @@
+"""
+microbenchmark متدهای Manager روی dataset مصنوعی (benchmarks.dataset)
+
+    python -m benchmarks.managers --scale small
+    python -m benchmarks.managers --cases CompanyManager.get_by_id,UserManager.login --iterations 50
+    python -m benchmarks.managers --update-budgets
+
+برای هر متد جدا اندازه گرفته می‌شود:
+- زمان: mean/p50/p95 هر فراخوانی بعد از warmup (cache کامپایل SQLAlchemy گرم شده)
+- تعداد statementهای SQL هر فراخوانی (بیشترین مقدار بین فراخوانی‌ها)
+- حافظه: اوج تخصیص هر فراخوانی با tracemalloc، در دور جداگانه تا روی زمان‌ها اثر نگذارد
+
+نتیجه با benchmarks/budgets.json مقایسه می‌شود و عبور از بودجه‌ی queries، p95_ms یا peak_kb
+کد خروج 1 می‌دهد. بودجه‌ی queries دقیق است (هر query اضافه یعنی N+1 جدید)؛
+بودجه‌های زمان و حافظه به سخت‌افزار وابسته‌اند و با --update-budgets سه برابر مقدار اندازه‌گیری شده نوشته می‌شوند.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import event
+
+from benchmarks import dataset
+from benchmarks.dataset import BENCH_EMAIL, BENCH_PASSWORD, TAGS, WORDS
+
+BUDGETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "budgets.json")
+
+# حاشیه‌ی بودجه‌ی زمان و حافظه نسبت به مقدار اندازه‌گیری شده در --update-budgets
+BUDGET_HEADROOM = 3
+
+
+# -------------------- cases --------------------
+# هر case با rng و پارامترهای dataset یک فراخوانی بدون آرگومان می‌سازد
+def company_get_by_id(db, rng, params):
+    company_id = rng.randint(1, params["companies"])
+    return lambda: db.company.get_by_id(company_id)
+
+
+def product_create(db, rng, params):
+    company_id = rng.randint(1, params["companies"])
+    data = {
+        "title": " ".join(rng.choice(WORDS) for _ in range(3)).title(),
+        "summary": " ".join(rng.choice(WORDS) for _ in range(12)),
+        "tags": rng.sample(TAGS, k=2),
+    }
+    return lambda: db.product.create(company_id, **data)
+
+
+def product_search(db, rng, params):
+    query = rng.choice(WORDS)
+    return lambda: db.product.search(query=query, limit=20)
+
+
+def exhibition_search(db, rng, params):
+    query = rng.choice(WORDS)
+    return lambda: db.exhibition.search(query=query)
+
+
+def exhibition_years(db, rng, params):
+    return db.exhibition.list_exhibition_years
+
+
+def view_popular_items(db, rng, params):
+    from src.database.models import ViewTargetEnum
+
+    target_type = rng.choice(list(ViewTargetEnum))
+    since = datetime.utcnow() - timedelta(days=30)
+    return lambda: db.view.get_popular_items(target_type, limit=10, since=since)
+
+
+def favorite_add(db, rng, params):
+    from src.database.models import FavoriteTypeEnum
+
+    user_id = rng.randint(1, params["users"])
+    product_id = rng.randint(1, params["products"])
+    return lambda: db.favorite.add_favorite(user_id, FavoriteTypeEnum.product, product_id)
+
+
+def user_login(db, rng, params):
+    return lambda: db.user.login(BENCH_EMAIL, BENCH_PASSWORD)
+
+
+# نام -> (سازنده، تعداد تکرار پیش‌فرض)؛ login عمداً با argon2 کند است
+CASES = {
+    "CompanyManager.get_by_id": (company_get_by_id, None),
+    "ProductManager.create": (product_create, None),
+    "ProductManager.search": (product_search, None),
+    "ExhibitionManager.search": (exhibition_search, None),
+    "ExhibitionManager.list_exhibition_years": (exhibition_years, None),
+    "ViewManager.get_popular_items": (view_popular_items, None),
+    "FavoriteManager.add_favorite": (favorite_add, None),
+    "UserManager.login": (user_login, 10),
+}
+
+
+# -------------------- measurement --------------------
+class StatementCounter:
+    """شمارش statementهای اجرا شده روی یک engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _after_cursor_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "after_cursor_execute", self._after_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "after_cursor_execute", self._after_cursor_execute)
+
+
+def measure(db, name, params, iterations, warmup, memory_iterations, seed) -> dict:
+    build, default_iterations = CASES[name]
+    iterations = min(iterations, default_iterations or iterations)
+    rng = random.Random(f"{seed}:{name}")
+    calls = [build(db, rng, params) for _ in range(warmup + iterations + memory_iterations)]
+
+    for call in calls[:warmup]:
+        call()
+
+    timings, statements = [], []
+    with StatementCounter(db.db.engine) as counter:
+        for call in calls[warmup:warmup + iterations]:
+            before = counter.count
+            start = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - start)
+            statements.append(counter.count - before)
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for call in calls[warmup + iterations:]:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            call()
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    timings = np.array(timings) * 1000
+    p50, p95 = np.percentile(timings, [50, 95])
+    return {
+        "iterations": iterations,
+        "mean_ms": round(float(timings.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "max_ms": round(float(timings.max()), 3),
+        "queries": max(statements),
+        "queries_min": min(statements),
+        "peak_kb": round(max(peaks) / 1024, 1) if peaks else None,
+    }
+
+
+# -------------------- budgets --------------------
+def check(results, budgets, skip_time=False) -> list:
+    """
+    Returns:
+        list[str]: عبورها از بودجه
+    """
+    failures = []
+    for name, result in results.items():
+        budget = budgets.get(name)
+        if budget is None:
+            failures.append(f"{name}: no budget (run with --update-budgets)")
+            continue
+        limits = [("queries", "queries")]
+        if not skip_time:
+            limits += [("p95_ms", "p95_ms"), ("peak_kb", "peak_kb")]
+        for key, measured in limits:
+            if key in budget and result[measured] is not None and result[measured] > budget[key]:
+                failures.append(f"{name}: {key} {result[measured]} > budget {budget[key]}")
+    return failures
+
+
+def updated_budgets(results, budgets) -> dict:
+    budgets = dict(budgets)
+    for name, result in results.items():
+        budgets[name] = {
+            "queries": result["queries"],
+            "p95_ms": _round_up(result["p95_ms"] * BUDGET_HEADROOM),
+            "peak_kb": _round_up(result["peak_kb"] * BUDGET_HEADROOM) if result["peak_kb"] is not None else None,
+        }
+    return dict(sorted(budgets.items()))
+
+
+def _round_up(value):
+    """بودجه‌ها با دو رقم معنادار گرد می‌شوند تا diff فایل با هر اجرا عوض نشود"""
+    if value <= 0:
+        return 0
+    step = 10 ** max(math.floor(math.log10(value)) - 1, 0)
+    return math.ceil(value / step) * step
+
+
+def load_budgets(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+# -------------------- CLI --------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmark manager methods against query, time and memory budgets")
+    parser.add_argument("--scale", choices=dataset.SCALES, default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fresh", action="store_true", help="rebuild the cached dataset")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"comma separated subset of: {', '.join(CASES)}")
+    parser.add_argument("--iterations", type=int, default=200, help="timed calls per method")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--memory-iterations", type=int, default=5, help="calls traced with tracemalloc")
+    parser.add_argument("--budgets", default=BUDGETS_FILE)
+    parser.add_argument("--skip-time", action="store_true", help="only enforce query budgets (e.g. on slow CI machines)")
+    parser.add_argument("--update-budgets", action="store_true", help="write measured values to the budget file")
+    parser.add_argument("--output", help="also write results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    log = lambda message: print(message, flush=True)
+
+    names = [name.strip() for name in args.cases.split(",") if name.strip()]
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        raise SystemExit(f"Unknown cases: {', '.join(unknown)}")
+
+    params = dataset.dataset_params(args.scale, args.seed)
+    source = dataset.ensure(params, fresh=args.fresh, log=log)
+
+    from src.database.db_manager import DBManager
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as workdir:
+        # متدهای نویسنده (create، add_favorite) نسخه‌ی cache شده را تغییر نمی‌دهند
+        database_path = os.path.join(workdir, "benchmark.sqlite3")
+        shutil.copyfile(source, database_path)
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            db = DBManager(f"sqlite:///{database_path}", create_tables=False)
+            log(f"{'method':<42} {'queries':>7} {'p50 ms':>9} {'p95 ms':>9} {'peak kB':>9}")
+            for name in names:
+                result = results[name] = measure(
+                    db, name, params, args.iterations, args.warmup, args.memory_iterations, args.seed)
+                queries = str(result["queries"]) if result["queries"] == result["queries_min"] \
+                    else f"{result['queries_min']}-{result['queries']}"
+                log(f"{name:<42} {queries:>7} {result['p50_ms']:>9} {result['p95_ms']:>9} {result['peak_kb']:>9}")
+            db.db.engine.dispose()
+        finally:
+            os.chdir(cwd)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"dataset": dataset.describe(source), "results": results}, f, indent=2)
+
+    if args.update_budgets:
+        budgets = updated_budgets(results, load_budgets(args.budgets))
+        with open(args.budgets, "w") as f:
+            json.dump(budgets, f, indent=2)
+            f.write("\n")
+        log(f"Budgets written to {args.budgets}")
+        return
+
+    failures = check(results, load_budgets(args.budgets), skip_time=args.skip_time)
+    if failures:
+        log(f"\n{len(failures)} budget violation(s):")
+        for failure in failures:
+            log(f"  {failure}")
+        sys.exit(1)
+    log("\nAll methods within budget.")
+
+
+if __name__ == "__main__":
+    main()
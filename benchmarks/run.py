@@ -0,0 +1,286 @@
+"""
+benchmark مسیرهای پرترافیک API روی dataset مصنوعی
+
+    python -m benchmarks.run --scale small --duration 10 --concurrency 16
+    python -m benchmarks.run --scale medium --http --workers 4
+    python -m benchmarks.run --url http://127.0.0.1:8000 --scenarios product_search,company_detail
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json
+
+- پیش‌فرض: app واقعی داخل همین process با httpx.ASGITransport (بدون شبکه؛ هزینه‌ی خود کد).
+- --http: uvicorn با --workers جدا بالا می‌آید و درخواست‌ها از روی TCP فرستاده می‌شوند.
+- --url: سرور موجود (dataset باید همانی باشد که سرور با آن بالا آمده).
+
+هر سناریو جدا اجرا می‌شود: concurrency کارگر هر کدام پشت سر هم درخواست می‌فرستند (closed loop)،
+نتایج warmup دور ریخته می‌شود و throughput و p50/p95/p99 در JSON (benchmarks/results) ذخیره می‌شود.
+هر اجرا روی کپی dataset کار می‌کند تا /track و /auth/login نسخه‌ی cache شده را تغییر ندهند.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+from benchmarks import dataset
+from benchmarks.scenarios import SCENARIOS
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "results")
+
+# taskهای دوره‌ای main.py در طول benchmark خاموش‌اند تا نتایج را به هم نریزند
+APP_ENV = {
+    "FAVORITE_RECONCILE_INTERVAL": "0",
+    "RECOMMENDATION_INTERVAL": "0",
+    "PARTITION_MAINTENANCE_INTERVAL": "0",
+    "ANALYTICS_EXPORT_INTERVAL": "0",
+    "ORGANIZER_STATS_INTERVAL": "0",
+    "STATS_RECONCILE_INTERVAL": "0",
+    "DEBUG_ENDPOINTS": "false",
+}
+
+SERVER_START_TIMEOUT = 60
+
+
+# -------------------- measurement --------------------
+async def _worker(client, scenario, params, rng, deadline, warmup_until, samples, statuses):
+    build, ok = SCENARIOS[scenario]
+    while True:
+        method, path, kwargs = build(rng, params)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        end = time.perf_counter()
+        if end >= deadline:
+            return
+        if start >= warmup_until:
+            samples.append((end - start, status in ok))
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+
+async def run_scenario(client, scenario, params, concurrency, duration, warmup, seed) -> dict:
+    samples, statuses = [], {}
+    started = time.perf_counter()
+    warmup_until = started + warmup
+    deadline = warmup_until + duration
+    await asyncio.gather(*(
+        _worker(client, scenario, params, random.Random(f"{seed}:{scenario}:{index}"),
+                deadline, warmup_until, samples, statuses)
+        for index in range(concurrency)
+    ))
+    return summarize(samples, statuses, duration)
+
+
+def summarize(samples, statuses, duration) -> dict:
+    latencies = np.array([elapsed for elapsed, _ok in samples]) * 1000
+    errors = sum(1 for _elapsed, ok in samples if not ok)
+    result = {
+        "requests": len(samples),
+        "errors": errors,
+        "statuses": statuses,
+        "rps": round(len(samples) / duration, 2),
+        "latency_ms": None,
+    }
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        result["latency_ms"] = {
+            "mean": round(float(latencies.mean()), 3),
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+            "max": round(float(latencies.max()), 3),
+        }
+    return result
+
+
+async def run_all(base_url, transport, scenarios, params, args, log) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=args.timeout) as client:
+        for scenario in scenarios:
+            log(f"  {scenario} ...")
+            result = await run_scenario(client, scenario, params, args.concurrency, args.duration, args.warmup, args.seed)
+            results[scenario] = result
+            latency = result["latency_ms"] or {}
+            log(f"    {result['rps']} req/s  p50={latency.get('p50')}ms  p95={latency.get('p95')}ms  "
+                f"p99={latency.get('p99')}ms  errors={result['errors']}")
+    return results
+
+
+# -------------------- targets --------------------
+def _in_process(database_path, scenarios, params, args, log):
+    os.environ.update(APP_ENV, DATABASE_URL=f"sqlite:///{database_path}")
+    from interface.api.main import app
+    from src.database.db_manager import get_db_manager
+
+    get_db_manager()
+    try:
+        # خطای app مثل سرور واقعی پاسخ 500 می‌شود نه exception در client
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        return asyncio.run(run_all("http://benchmark", transport, scenarios, params, args, log))
+    finally:
+        get_db_manager().tracking.shutdown()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url, process):
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"uvicorn did not start within {SERVER_START_TIMEOUT}s")
+
+
+def _over_http(database_path, workdir, scenarios, params, args, log):
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, **APP_ENV, DATABASE_URL=f"sqlite:///{database_path}",
+               PYTHONPATH=os.pathsep.join(filter(None, [PROJECT_ROOT, os.getenv("PYTHONPATH")])))
+    command = [sys.executable, "-m", "uvicorn", "interface.api.main:app", "--host", "127.0.0.1",
+               "--port", str(port), "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"]
+    log(f"Starting uvicorn with {args.workers} worker(s) on {url}")
+    process = subprocess.Popen(command, cwd=workdir, env=env)
+    try:
+        _wait_ready(url, process)
+        return asyncio.run(run_all(url, None, scenarios, params, args, log))
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# -------------------- metadata --------------------
+def _git(*command):
+    try:
+        return subprocess.run(["git", *command], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata() -> dict:
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def _output_path(meta):
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    commit = (meta["commit"] or "nogit")[:8] + ("-dirty" if meta["dirty"] else "")
+    return os.path.join(RESULTS_DIR, f"{stamp}-{commit}.json")
+
+
+# -------------------- CLI --------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark API hot paths against a synthetic dataset")
+    parser.add_argument("--scale", choices=dataset.SCALES, default="small")
+    for name in ("exhibitions", "companies", "products", "users", "views", "favorites"):
+        parser.add_argument(f"--{name}", type=int, help=f"override the number of {name} of --scale")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fresh", action="store_true", help="rebuild the cached dataset")
+    parser.add_argument("--build-only", action="store_true", help="only build the dataset")
+
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--http", action="store_true", help="run uvicorn and benchmark over TCP")
+    target.add_argument("--url", help="benchmark an already running server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --http")
+
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="discarded seconds per scenario")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per request timeout (seconds)")
+    parser.add_argument("--output", help="result file (default benchmarks/results/<time>-<commit>.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    log = lambda message: print(message, flush=True)
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}")
+
+    params = dataset.dataset_params(
+        args.scale, args.seed,
+        **{name: getattr(args, name) for name in ("exhibitions", "companies", "products", "users", "views", "favorites")},
+    )
+    source = dataset.ensure(params, fresh=args.fresh, log=log)
+    if args.build_only:
+        return
+
+    mode = "url" if args.url else "http" if args.http else "in-process"
+    log(f"Benchmarking {mode} with concurrency {args.concurrency}, {args.duration}s per scenario")
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as workdir:
+        os.makedirs(os.path.join(workdir, "uploads"))
+        database_path = os.path.join(workdir, "benchmark.sqlite3")
+        shutil.copyfile(source, database_path)
+
+        if args.url:
+            results = asyncio.run(run_all(args.url.rstrip("/"), None, scenarios, params, args, log))
+        elif args.http:
+            results = _over_http(database_path, workdir, scenarios, params, args, log)
+        else:
+            # مسیرهای نسبی app (uploads) داخل پوشه‌ی موقت
+            cwd = os.getcwd()
+            os.chdir(workdir)
+            try:
+                results = _in_process(database_path, scenarios, params, args, log)
+            finally:
+                os.chdir(cwd)
+
+    meta = metadata()
+    report = {
+        "meta": meta,
+        "dataset": dataset.describe(source),
+        "config": {
+            "mode": mode,
+            "workers": args.workers if args.http else None,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+    output = args.output or _output_path(meta)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    log(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+سناریوهای benchmark: مسیرهای پرترافیک API
+
+هر سناریو تابعی است که با rng و پارامترهای dataset یک درخواست (method، path، kwargs برای httpx) می‌سازد.
+هدف‌ها (شرکت، محصول، نمایشگاه) تصادفی ولی قابل تکرار از بازه‌ی idهای dataset انتخاب می‌شوند.
+"""
+import uuid
+
+from benchmarks.dataset import BENCH_EMAIL, BENCH_PASSWORD, WORDS
+
+FAVORITE_TYPES = {"product": "products", "company": "companies", "exhibition": "exhibitions"}
+
+
+def exhibition_list(rng, params):
+    query = rng.choice([{}, {"status": "live"}, {"query": rng.choice(WORDS)}])
+    return "GET", "/exhibition/", {"params": query}
+
+
+def product_search(rng, params):
+    query = {"query": rng.choice(WORDS), "limit": 20}
+    if rng.random() < 0.3:
+        query["with_favorites"] = "true"
+    return "GET", "/products/", {"params": query}
+
+
+def company_detail(rng, params):
+    return "GET", f"/company/{rng.randint(1, params['companies'])}", {}
+
+
+def favorite_count(rng, params):
+    favorite_type = rng.choice(list(FAVORITE_TYPES))
+    target_id = rng.randint(1, params[FAVORITE_TYPES[favorite_type]])
+    return "GET", "/favorites/count", {"params": {"favorite_type": favorite_type, "target_id": target_id}}
+
+
+def login(rng, params):
+    return "POST", "/auth/login", {"json": {"username_or_email": BENCH_EMAIL, "password": BENCH_PASSWORD}}
+
+
+def track(rng, params):
+    product_id = rng.randint(1, params["products"])
+    return "POST", "/track", {"json": {
+        "session_id": uuid.UUID(int=rng.getrandbits(128)).hex,
+        "user_id": rng.randint(1, params["users"]) if rng.random() < 0.7 else None,
+        "page_views": [{"page_url": f"/products/{product_id}"}],
+    }}
+
+
+# نام -> (سازنده‌ی درخواست، وضعیت‌های موفق)
+SCENARIOS = {
+    "exhibition_list": (exhibition_list, {200}),
+    "product_search": (product_search, {200}),
+    "company_detail": (company_detail, {200}),
+    "favorite_count": (favorite_count, {200}),
+    "login": (login, {200}),
+    "track": (track, {204}),
+}
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+from interface.api.users import auth
+
+# گزارش ترافیک و بازدیدکنندگان غرفه‌ها فقط برای ادمین
+router = APIRouter(prefix="/analytics", tags=["Analytics"], dependencies=[Depends(auth.get_admin_user)])
+
+# -------------------- Schemas --------------------
+class DailyTraffic(BaseModel):
+    date: str
+    views: int
+    unique_visitors: int
+
+class BoothTraffic(BaseModel):
+    company_id: int
+    booth_number: Optional[str] = None
+    hall_name: Optional[str] = None
+    views: int
+    company_page_views: int
+    product_views: int
+    unique_visitors: int
+    favorites: int
+
+class ExhibitionTrafficSummary(BaseModel):
+    exhibition_page_views: int
+    booth_views: int
+    unique_visitors: int
+    exhibition_favorites: int
+    booth_favorites: int
+    booths: int
+
+class ExhibitionReportResponse(BaseModel):
+    exhibition_id: int
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    summary: ExhibitionTrafficSummary
+    daily: List[DailyTraffic]
+    booths: List[BoothTraffic]
+
+# -------------------- API Endpoints --------------------
+@router.get("/exhibitions/{exhibition_id}", response_model=ExhibitionReportResponse)
+def exhibition_traffic(exhibition_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """
+    ترافیک غرفه‌های نمایشگاه از روی خروجی Parquet (python -m src.analytics.job).
+    داده‌ها تا آخرین اجرای export به‌روز هستند و به دیتابیس اصلی query زده نمی‌شود.
+    """
+    from src.analytics.report import exhibition_report
+
+    if start and end and start >= end:
+        raise HTTPException(400, "start must be before end")
+    return exhibition_report(exhibition_id, start=start, end=end)
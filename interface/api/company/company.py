@@ -2,18 +2,19 @@ from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel
 from src.database.db_manager import db_manager
-from src.database.models import ApprovalStatusEnum
+from fastapi.responses import ORJSONResponse
+from src.database.models import (
+    ApprovalStatusEnum, CompanyProfile, CompanyWebsite, CompanyAddress,
+    CompanyPhone, CompanyTag, CompanyVideo, CompanyBrochure,
+    CompanyKnowledgeFile, CompanyDocument
+)
+from src.database.serializers import RowSerializer
+from src.storage import derivatives
 import os
 import uuid
 router = APIRouter(prefix="/company", tags=["Company"])
 
 upload_dir_logo = "./uploads/logos"
-upload_dir_brochure = "uploads/brochure"
-upload_dir_video = "uploads/video"
-
-os.makedirs(upload_dir_logo, exist_ok=True) 
-os.makedirs(upload_dir_brochure, exist_ok=True) 
-os.makedirs(upload_dir_video, exist_ok=True)
 
 # -------------------- Schemas --------------------
 class CompanyCreateSchema(BaseModel):
@@ -76,52 +77,40 @@ class CompanyLogoSchema(BaseModel):
 # -------------------------
 # Helpers
 # -------------------------
-def _safe_val(obj, attr, default=None):
-    return getattr(obj, attr) if hasattr(obj, attr) else default
+def _child_serializer(model, *fields):
+    # id همیشه آخر هر آیتم می‌آید
+    return RowSerializer(model, fields=[*fields, "id"])
+
+
+_company_serializer = RowSerializer(
+    CompanyProfile,
+    fields=[
+        "id", "user_id", "company_name",
+        "logo", "logo_thumbnail", "logo_medium", "logo_webp",
+        "industry_category", "description", "approval_status",
+        "created_at", "updated_at",
+    ],
+    children={
+        "websites": ("websites", _child_serializer(CompanyWebsite, "name", "url")),
+        "addresses": ("addresses", _child_serializer(CompanyAddress, "name", "address")),
+        "phones": ("phones", _child_serializer(CompanyPhone, "name", "phone_number")),
+        "tags": ("tags", _child_serializer(CompanyTag, "tag")),
+        "videos": ("videos", _child_serializer(CompanyVideo, "name", "video_url")),
+        "brochures": ("brochures", _child_serializer(CompanyBrochure, "title", "file_url")),
+        "knowledge_files": ("knowledge_files", _child_serializer(CompanyKnowledgeFile, "title", "file_url")),
+        "documents": ("documents", _child_serializer(CompanyDocument, "name", "url")),
+    }
+)
 
 
 def serialize_company(company) -> Dict[str, Any]:
     """
     Build a JSON-serializable dict for a company instance.
-    Assumes relationship attributes:
-      - websites, addresses, phones, tags, videos, brochures, knowledge_files, documents
+    Uses a serializer compiled from the CompanyProfile mapper.
     """
     if company is None:
         return {}
-
-    def _serialize_list(rows, fields):
-        out = []
-        for r in rows or []:
-            item = {}
-            for f in fields:
-                item[f] = _safe_val(r, f)
-            # always include id if present
-            if hasattr(r, "id"):
-                item["id"] = r.id
-            out.append(item)
-        return out
-
-    data = {
-        "id": company.id if hasattr(company, "id") else None,
-        "user_id": company.user_id if hasattr(company, "user_id") else None,
-        "company_name": company.company_name if hasattr(company, "company_name") else None,
-        "logo": company.logo if hasattr(company, "logo") else None,
-        "industry_category": company.industry_category if hasattr(company, "industry_category") else None,
-        "description": company.description if hasattr(company, "description") else None,
-        "approval_status": getattr(company.approval_status, "value", company.approval_status) if hasattr(company, "approval_status") else None,
-        "created_at": getattr(company, "created_at", None),
-        "updated_at": getattr(company, "updated_at", None),
-        # children
-        "websites": _serialize_list(getattr(company, "websites", []), ["name", "url"]),
-        "addresses": _serialize_list(getattr(company, "addresses", []), ["name", "address"]),
-        "phones": _serialize_list(getattr(company, "phones", []), ["name", "phone_number"]),
-        "tags": _serialize_list(getattr(company, "tags", []), ["tag"]),
-        "videos": _serialize_list(getattr(company, "videos", []), ["name", "video_url"]),
-        "brochures": _serialize_list(getattr(company, "brochures", []), ["title", "file_url"]),
-        "knowledge_files": _serialize_list(getattr(company, "knowledge_files", []), ["title", "file_url"]),
-        "documents": _serialize_list(getattr(company, "documents", []), ["name", "url"]),
-    }
-    return data
+    return _company_serializer(company)
 
 
 # -------------------- API Endpoints --------------------
@@ -140,7 +129,8 @@ def get_company(company_id: int):
     company = db_manager.company.get_by_id(company_id)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
-    return serialize_company(company)
+    # داده‌ی داخلی است؛ اعتبارسنجی دوباره‌ی response_model لازم نیست
+    return ORJSONResponse(serialize_company(company))
 
 
 @router.get("/user/{user_id}", response_model=dict)
@@ -148,7 +138,8 @@ def get_company_by_user(user_id: int):
     company = db_manager.company.get_by_user_id(user_id)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
-    return serialize_company(company)
+    # داده‌ی داخلی است؛ اعتبارسنجی دوباره‌ی response_model لازم نیست
+    return ORJSONResponse(serialize_company(company))
 
 
 @router.put("/{company_id}", response_model=dict)
@@ -288,11 +279,30 @@ async def update_logo(company_id: int, file: UploadFile = File(...)):
         unique_filename = f"{uuid.uuid4().hex}{ext}"
 
         file_location = os.path.join(upload_dir_logo, unique_filename)
+        os.makedirs(upload_dir_logo, exist_ok=True)
         with open(file_location, "wb") as f:
             f.write(await file.read())
 
         relative_url = f"/uploads/logos/{unique_filename}"
-        company = db_manager.company.update(company_id, logo=relative_url)
+        company = db_manager.company.update(
+            company_id,
+            logo=relative_url,
+            logo_thumbnail=None,
+            logo_medium=None,
+            logo_webp=None
+        )
+
+        # ساخت نسخه‌های کوچک لوگو در پس‌زمینه
+        derivatives.submit(
+            file_location,
+            lambda paths: db_manager.company.set_logo_derivatives(
+                company_id,
+                relative_url,
+                thumbnail=f"/{paths['thumbnail']}",
+                medium=f"/{paths['medium']}",
+                webp=f"/{paths['webp']}"
+            )
+        )
 
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -307,7 +317,13 @@ def delete_logo(company_id: int):
     حذف لوگوی شرکت (فیلد logo را null می‌کند)
     """
     try:
-        company = db_manager.company.update(company_id, logo=None)
+        company = db_manager.company.update(
+            company_id,
+            logo=None,
+            logo_thumbnail=None,
+            logo_medium=None,
+            logo_webp=None
+        )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -339,13 +355,8 @@ def delete_phone(phone_id: int):
 @router.post("/{company_id}/video", response_model=dict)
 async def add_video(company_id: int, file: UploadFile = File(...)):
     try:
-        ext = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4().hex}{ext}"
-        file_location = os.path.join(upload_dir_video, unique_filename)
-
-        content = await file.read()
-        with open(file_location, "wb") as f:
-            f.write(content)
+        # ویدیوهای تکراری فقط یک بار روی دیسک ذخیره می‌شوند
+        file_location = db_manager.blob.store(await file.read(), file.filename)
 
         b = db_manager.company.add_video(
             company_id,
@@ -378,13 +389,7 @@ async def add_brochure(
         file: UploadFile = File(...)
     ):
     try:
-        ext = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4().hex}{ext}"
-        file_location = os.path.join(upload_dir_brochure, unique_filename)
-
-        with open(file_location, "wb") as f:
-            f.write(await file.read())
-
+        file_location = db_manager.blob.store(await file.read(), file.filename)
 
         b = db_manager.company.add_brochure(
             company_id=company_id,
@@ -0,0 +1,63 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import PlainTextResponse
+from typing import Literal
+
+from interface.api.users import auth
+from src.monitoring import memory
+from src.monitoring.profiler import SamplingProfiler, ProfilerBusy
+
+# فقط با DEBUG_ENDPOINTS=true در main.py اضافه می‌شود؛ همه‌ی مسیرها نیاز به کاربر admin دارند
+router = APIRouter(prefix="/debug", tags=["Debug"], dependencies=[Depends(auth.get_admin_user)])
+
+# -------------------- API Endpoints --------------------
+@router.get("/profile")
+async def profile(
+        seconds: float = Query(10, gt=0, le=120),
+        hz: int = Query(100, ge=1, le=1000),
+        mode: Literal["cpu", "wall"] = "cpu",
+        format: Literal["collapsed", "json"] = "collapsed",
+        include_idle: bool = False,
+        limit: int = Query(50, ge=1, le=1000),
+):
+    """
+    profile نمونه‌برداری همین worker به مدت seconds ثانیه.
+    format=collapsed خروجی flamegraph.pl / speedscope است؛ json خلاصه‌ی پرتکرارترین stackها و توابع.
+    async است تا در thread اصلی اجرا شود (نصب signal handler) و در صف threadpool نماند.
+    """
+    profiler = SamplingProfiler(interval=1.0 / hz, mode=mode, include_idle=include_idle)
+    try:
+        profiler.start()
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+
+    if format == "json":
+        return profiler.summary(limit)
+    return PlainTextResponse(profiler.collapsed(), headers={
+        "X-Profile-Pid": str(profiler.summary(0)["pid"]),
+        "X-Profile-Samples": str(profiler.samples),
+    })
+
+
+@router.get("/memory")
+def memory_snapshot(
+        limit: int = Query(25, ge=1, le=500),
+        group_by: Literal["lineno", "filename", "traceback"] = "lineno",
+):
+    """
+    پرمصرف‌ترین محل‌های تخصیص حافظه (tracemalloc) و رشد نسبت به snapshot قبلی.
+    اولین فراخوانی فقط tracemalloc را روشن می‌کند.
+    """
+    return memory.snapshot(limit, group_by)
+
+
+@router.delete("/memory")
+def memory_stop():
+    """خاموش کردن tracemalloc (هزینه‌ی آن روی هر تخصیص حافظه حذف می‌شود)"""
+    memory.stop()
+    return {"tracing": False}
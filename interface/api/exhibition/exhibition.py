@@ -4,7 +4,11 @@ from typing import Optional, List
 from datetime import datetime
 from sqlalchemy.orm import joinedload
 from src.database.db_manager import db_manager
-from src.database.models import ExhibitionTag, ExhibitionMedia, VipLevelEnum, ExpoStatusEnum
+from fastapi.responses import ORJSONResponse
+from interface.api.streaming import stream_rows
+from interface.api.favorite.favorite import attach_favorites
+from src.database.models import Exhibition, ExhibitionTag, ExhibitionMedia, VipLevelEnum, ExpoStatusEnum, FavoriteTypeEnum
+from src.database.serializers import RowSerializer
 router = APIRouter(prefix="/exhibition", tags=["exhibition"])
 
 # -------------------- Schemas --------------------
@@ -38,6 +42,36 @@ class CompanyRegisterSchema(BaseModel):
     vip_level: Optional[VipLevelEnum] = VipLevelEnum.normal
 
 
+# -------------------- Serializers --------------------
+_exhibition_serializer = RowSerializer(
+    Exhibition,
+    fields=["id", "name", "description", "start_date", "end_date", "year", "category_level", "status"]
+)
+
+_exhibition_list_serializer = RowSerializer(
+    Exhibition,
+    fields=[
+        "id",
+        ("title", "name"),
+        "description",
+        "status",
+        ("category", "category_level"),
+        "year",
+        ("startDate", "start_date"),
+        ("endDate", "end_date"),
+        ("imageUrl", "banner_image"),
+        "attendees",
+        "exhibitors",
+        "location",
+    ],
+    defaults={
+        "category": "Uncategorized",
+        "imageUrl": "/static/default-banner-exhibition.jpg",
+        "location": "Unknown",
+    }
+)
+
+
 # -------------------- API Endpoints --------------------
 @router.post("/", response_model=dict)
 def create_exhibition(organizer_id: int, req: ExhibitionCreateSchema):
@@ -59,21 +93,31 @@ def get_exhibition_categories():
     categories = db_manager.exhibition.list_categories()
     return list(categories)
 
+@router.get("/export/stream")
+def export_exhibitions(
+    query: Optional[str] = None,
+    category: Optional[str] = None,
+    year: Optional[int] = None,
+    status: Optional[ExpoStatusEnum] = Query(None),
+    format: str = Query("ndjson", pattern="^(ndjson|json)$")
+):
+    """
+    خروجی نمایشگاه‌ها به صورت stream (NDJSON یا آرایه‌ی JSON) با همان فیلترهای list_exhibitions
+    """
+    exhibitions = db_manager.exhibition.iter_search(
+        query=query,
+        category=category,
+        year=year,
+        status=status.value if status else None
+    )
+    return stream_rows(exhibitions, _exhibition_list_serializer.compiled, format=format, filename="exhibitions")
+
 @router.get("/{exhibition_id}", response_model=dict)
 def get_exhibition(exhibition_id: int):
     exhibition = db_manager.exhibition.get_by_id(exhibition_id)
     if not exhibition:
         raise HTTPException(status_code=404, detail="Exhibition not found")
-    return {
-        "id": exhibition.id,
-        "name": exhibition.name,
-        "description": exhibition.description,
-        "start_date": exhibition.start_date,
-        "end_date": exhibition.end_date,
-        "year": exhibition.year,
-        "category_level": exhibition.category_level,
-        "status": exhibition.status
-    }
+    return ORJSONResponse(_exhibition_serializer(exhibition))
 
 
 @router.get("/", response_model=List[dict])
@@ -81,7 +125,9 @@ def list_exhibitions(
     query: Optional[str] = None,
     category: Optional[str] = None,
     year: Optional[int] = None,
-    status: Optional[ExpoStatusEnum] = Query(None)
+    status: Optional[ExpoStatusEnum] = Query(None),
+    with_favorites: bool = False,
+    user_id: Optional[int] = None
 ):
     exhibitions = db_manager.exhibition.search(
         query=query,
@@ -90,22 +136,12 @@ def list_exhibitions(
         status=status.value if status else None
     )
 
-    return [
-        {
-            "id": e.id,
-            "title": e.name,
-            "description": e.description,
-            "status": e.status.value,
-            "category": e.category_level or "Uncategorized",
-            "year": e.year,
-            "startDate": e.start_date.isoformat(),
-            "endDate": e.end_date.isoformat(),
-            "imageUrl": e.banner_image or "/static/default-banner-exhibition.jpg",
-            "attendees": getattr(e, "attendees", None),
-            "exhibitors": getattr(e, "exhibitors", None),
-            "location": getattr(e, "location", "Unknown")
-        } for e in exhibitions
-    ]
+    data = _exhibition_list_serializer.many(exhibitions)
+    if with_favorites:
+        attach_favorites(data, FavoriteTypeEnum.exhibition, user_id=user_id)
+
+    # داده‌ی داخلی است؛ اعتبارسنجی دوباره‌ی response_model لازم نیست
+    return ORJSONResponse(data)
 
 @router.put("/{exhibition_id}", response_model=dict)
 def update_exhibition(exhibition_id: int, req: ExhibitionUpdateSchema):
@@ -180,7 +216,18 @@ def list_companies(exhibition_id: int):
     companies = db_manager.expo_company.list_companies_with_details(exhibition_id)
     if not companies:
         raise HTTPException(status_code=404, detail="No companies found")
-    return companies
+    return ORJSONResponse(companies)
+
+@router.get("/{exhibition_id}/companies/stream")
+def export_companies(
+    exhibition_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|json)$")
+):
+    """
+    کاتالوگ کامل شرکت‌های یک نمایشگاه به صورت stream، برای یکپارچه‌سازی با سامانه‌های دیگر
+    """
+    companies = db_manager.expo_company.iter_companies_with_details(exhibition_id)
+    return stream_rows(companies, format=format, filename=f"exhibition-{exhibition_id}-companies")
 
 
 @router.put("/companies/{expo_company_id}")
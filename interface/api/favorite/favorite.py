@@ -22,6 +22,40 @@ class FavoriteCountResponse(BaseModel):
     target_id: int
     count: int
 
+class FavoriteSyncSchema(BaseModel):
+    add: List[FavoriteCreateSchema] = []
+    remove: List[FavoriteCreateSchema] = []
+
+class FavoriteSyncResponse(BaseModel):
+    added: List[FavoriteCreateSchema]
+    removed: List[FavoriteCreateSchema]
+
+class FavoriteBatchItem(BaseModel):
+    target_id: int
+    count: int
+    is_favorited: Optional[bool] = None
+
+# حداکثر تعداد id در یک درخواست batch
+MAX_BATCH_IDS = 500
+# حداکثر تعداد تغییرات در یک درخواست sync
+MAX_SYNC_ITEMS = 1000
+
+# -------------------- Helpers --------------------
+def attach_favorites(items: List[dict], favorite_type: FavoriteTypeEnum, user_id: Optional[int] = None, id_key: str = "id"):
+    """
+    افزودن favorite_count (و در صورت وجود user_id، is_favorited) به آیتم‌های یک لیست.
+    برای کل لیست حداکثر دو کوئری اجرا می‌شود.
+    """
+    ids = [item[id_key] for item in items]
+    counts = db_manager.favorite.count_favorites_many(favorite_type, ids)
+    favorited = db_manager.favorite.favorited_by(user_id, favorite_type, ids) if user_id is not None else None
+
+    for item in items:
+        item["favorite_count"] = counts.get(item[id_key], 0)
+        if favorited is not None:
+            item["is_favorited"] = item[id_key] in favorited
+    return items
+
 # -------------------- API Endpoints --------------------
 @router.post("/", response_model=FavoriteResponse)
 def add_favorite(user_id: int, req: FavoriteCreateSchema):
@@ -37,6 +71,26 @@ def add_favorite(user_id: int, req: FavoriteCreateSchema):
         target_id=favorite.target_id
     )
 
+@router.post("/sync", response_model=FavoriteSyncResponse)
+def sync_favorites(user_id: int, req: FavoriteSyncSchema):
+    """
+    اعمال یکجای تغییرات علاقه‌مندی (افزودن/حذف) در یک درخواست و یک transaction.
+    فقط تغییراتی که واقعاً اعمال شدند برگردانده می‌شوند؛ ارسال دوباره‌ی همان درخواست بی‌اثر است.
+    """
+    add = [(item.favorite_type, item.target_id) for item in req.add]
+    remove = [(item.favorite_type, item.target_id) for item in req.remove]
+
+    if len(add) + len(remove) > MAX_SYNC_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SYNC_ITEMS} changes are allowed")
+    if set(add) & set(remove):
+        raise HTTPException(status_code=400, detail="An item can not be both added and removed")
+
+    result = db_manager.favorite.sync_favorites(user_id, add=add, remove=remove)
+    return FavoriteSyncResponse(
+        added=[FavoriteCreateSchema(favorite_type=t, target_id=i) for t, i in result["added"]],
+        removed=[FavoriteCreateSchema(favorite_type=t, target_id=i) for t, i in result["removed"]]
+    )
+
 @router.delete("/", response_model=dict)
 def remove_favorite(user_id: int, favorite_type: FavoriteTypeEnum = Query(...), target_id: int = Query(...)):
     removed = db_manager.favorite.remove_favorite(
@@ -58,6 +112,30 @@ def get_user_favorites(user_id: int, favorite_type: Optional[FavoriteTypeEnum] =
         ) for f in favorites
     ]
 
+@router.get("/count/batch", response_model=List[FavoriteBatchItem])
+def count_favorites_batch(
+    favorite_type: FavoriteTypeEnum = Query(...),
+    target_ids: List[int] = Query(...),
+    user_id: Optional[int] = None
+):
+    """
+    تعداد علاقه‌مندی‌ها برای چند target؛ با user_id وضعیت علاقه‌مندی همان کاربر هم برگردانده می‌شود.
+    """
+    if len(target_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} target_ids are allowed")
+
+    target_ids = list(dict.fromkeys(target_ids))
+    counts = db_manager.favorite.count_favorites_many(favorite_type, target_ids)
+    favorited = db_manager.favorite.favorited_by(user_id, favorite_type, target_ids) if user_id is not None else None
+
+    return [
+        FavoriteBatchItem(
+            target_id=target_id,
+            count=counts[target_id],
+            is_favorited=target_id in favorited if favorited is not None else None
+        ) for target_id in target_ids
+    ]
+
 @router.get("/count", response_model=FavoriteCountResponse)
 def count_favorites(favorite_type: FavoriteTypeEnum = Query(...), target_id: int = Query(...)):
     count = db_manager.favorite.count_favorites(favorite_type=favorite_type, target_id=target_id)
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Query
+from typing import Literal, Optional
+
+from interface.api.users import auth
+from src.database.db_manager import db_manager
+from src.importer.readers import detect_format, read_rows
+
+# import دسته‌ای برای onboarding نمایشگاه؛ فقط کاربر admin
+router = APIRouter(prefix="/import", tags=["Import"], dependencies=[Depends(auth.get_admin_user)])
+
+MAX_BATCH_SIZE = 10000
+
+
+# -------------------- Helpers --------------------
+def _rows(file: UploadFile, format: Optional[str]):
+    try:
+        return read_rows(file.file, format or detect_format(file.filename, file.content_type))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# -------------------- API Endpoints --------------------
+# endpointها sync هستند تا خواندن فایل و نوشتن دیتابیس در threadpool اجرا شود
+@router.post("/companies")
+def import_companies(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "jsonl"]] = None,
+    batch_size: Optional[int] = Query(None, ge=1, le=MAX_BATCH_SIZE),
+):
+    """
+    شرکت‌ها به همراه کاربر صاحب هر شرکت (ستون‌های company_name، email یا user_id، ...).
+    گزارش شامل تعداد ردیف‌های وارد شده، skip شده (شرکت از قبل وجود داشت) و خطای هر ردیف است.
+    """
+    return db_manager.importer.import_companies(_rows(file, format), batch_size)
+
+
+@router.post("/exhibition/{exhibition_id}/booths")
+def import_booths(
+    exhibition_id: int,
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "jsonl"]] = None,
+    batch_size: Optional[int] = Query(None, ge=1, le=MAX_BATCH_SIZE),
+):
+    """
+    غرفه‌های نمایشگاه (company_id / company_email / company_name، booth_number، hall_name، vip_level)
+    """
+    rows = _rows(file, format)
+    try:
+        return db_manager.importer.import_booths(exhibition_id, rows, batch_size)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/products")
+def import_products(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "jsonl"]] = None,
+    batch_size: Optional[int] = Query(None, ge=1, le=MAX_BATCH_SIZE),
+):
+    """
+    محصولات با تگ‌ها (در CSV با | جدا شده)؛ شرکت هر محصول مثل import غرفه‌ها مشخص می‌شود.
+    """
+    return db_manager.importer.import_products(_rows(file, format), batch_size)
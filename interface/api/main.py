@@ -1,18 +1,39 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import asyncio
+import logging
 import os
 from dotenv import load_dotenv
 load_dotenv()
+from src.timing import phase, report
 # ----------------- Import Your Routers -----------------
-from interface.api.users.users import router as auth_router
-from interface.api.exhibition.exhibition import router as exhibition_router
-from interface.api.company.company import router as company_router
-from interface.api.organizer.organizer import router as organizer_router
-from interface.api.favorite.favorite import router as favorite_router
-from interface.api.product.product import router as product_router
+with phase("import:routers"):
+    from interface.api.users.users import router as auth_router
+    from interface.api.exhibition.exhibition import router as exhibition_router
+    from interface.api.company.company import router as company_router
+    from interface.api.organizer.organizer import router as organizer_router
+    from interface.api.favorite.favorite import router as favorite_router
+    from interface.api.product.product import router as product_router
+    from interface.api.recommendation.recommendation import router as recommendation_router
+    from interface.api.tracking.tracking import router as tracking_router
+    from interface.api.analytics.analytics import router as analytics_router
+    from interface.api.stats.stats import router as stats_router
+    from interface.api.monitoring.monitoring import router as monitoring_router
+    from interface.api.importer.importer import router as importer_router
+    from src.monitoring import instrumentation
+    # endpointهای /debug (profile و حافظه) فقط با DEBUG_ENDPOINTS=true
+    DEBUG_ENDPOINTS = os.getenv("DEBUG_ENDPOINTS", "false").lower() == "true"
+    if DEBUG_ENDPOINTS:
+        from interface.api.debug.debug import router as debug_router
+    from interface.api.media.media import MediaFiles
+    from src.storage import derivatives
+    from src.storage.blob_store import UPLOAD_ROOT
+from src.database.db_manager import get_db_manager
+from interface.api.users import auth
+
+logger = logging.getLogger("startup")
 
 # ----------------- FastAPI App -----------------
 app = FastAPI(
@@ -20,7 +41,8 @@ app = FastAPI(
     version="0.5.0",
     description="Exchange API with WebSocket, EventBus, server status, and full docs",
     docs_url="/docs",
-    redoc_url=None
+    redoc_url=None,
+    default_response_class=ORJSONResponse
 )
 
 # ----------------- Middleware -----------------
@@ -34,6 +56,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"]
 )
+# زمان درخواست‌ها و queryها برای /metrics
+instrumentation.install(app)
 
 
 # ----------------- Mock Background Task -----------------
@@ -50,10 +74,157 @@ async def generate_price_updates():
         # print("Generating mock price data...")
 
 
+# فاصله‌ی تطبیق favorite_counters با user_favorites (ثانیه، 0 = غیرفعال)
+FAVORITE_RECONCILE_INTERVAL = float(os.getenv("FAVORITE_RECONCILE_INTERVAL", 3600))
+
+
+async def reconcile_favorite_counters():
+    """
+    اصلاح دوره‌ای اختلاف شمارنده‌های علاقه‌مندی با جدول اصلی؛ فقط یک worker در هر لحظه (file lock)
+    """
+    while True:
+        await asyncio.sleep(FAVORITE_RECONCILE_INTERVAL)
+        try:
+            fixed = await asyncio.to_thread(get_db_manager().favorite.reconcile_counters)
+            if fixed:
+                print(f"Reconciled {fixed} favorite counter(s)")
+        except Exception as e:
+            print("Error reconciling favorite counters:", e)
+
+
+# فاصله‌ی به‌روزرسانی پیشنهادها (ثانیه، 0 = غیرفعال)؛ هر چند اجرا یک بار ساخت کامل
+RECOMMENDATION_INTERVAL = float(os.getenv("RECOMMENDATION_INTERVAL", 3600))
+RECOMMENDATION_FULL_EVERY = int(os.getenv("RECOMMENDATION_FULL_EVERY", 24))
+
+
+async def rebuild_recommendations():
+    """
+    به‌روزرسانی دوره‌ای پیشنهادها؛ فقط یک worker در هر لحظه اجرا می‌کند (file lock)
+    """
+    runs = 0
+    while True:
+        await asyncio.sleep(RECOMMENDATION_INTERVAL)
+        full = runs % max(RECOMMENDATION_FULL_EVERY, 1) == 0
+        try:
+            result = await asyncio.to_thread(get_db_manager().recommendation.rebuild, full)
+            if result is not None:
+                runs += 1
+                print(f"Recommendations rebuilt ({'full' if full else 'incremental'}): {result}")
+        except Exception as e:
+            print("Error rebuilding recommendations:", e)
+
+
+# فاصله‌ی نگهداری پارتیشن‌های ماهانه‌ی بازدیدها (ثانیه)؛ فقط با VIEW_PARTITIONING=true
+PARTITION_MAINTENANCE_INTERVAL = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", 86400))
+
+
+async def maintain_view_partitions():
+    """
+    ساخت پارتیشن ماه بعد و DROP پارتیشن‌های خارج از retention؛ فقط یک worker در هر لحظه (file lock)
+    """
+    while True:
+        try:
+            result = await asyncio.to_thread(get_db_manager().db.partitions.maintain)
+            dropped = [name for names in (result or {}).values() for name in names]
+            if dropped:
+                print(f"Dropped expired partitions: {', '.join(dropped)}")
+        except Exception as e:
+            print("Error maintaining view partitions:", e)
+        await asyncio.sleep(PARTITION_MAINTENANCE_INTERVAL)
+
+
+# فاصله‌ی خروجی افزایشی رویدادها به Parquet (ثانیه، 0 = غیرفعال)
+ANALYTICS_EXPORT_INTERVAL = float(os.getenv("ANALYTICS_EXPORT_INTERVAL", 900))
+
+
+async def export_analytics():
+    """
+    خروجی دوره‌ای برای گزارش‌های تحلیلی؛ فقط یک worker در هر لحظه اجرا می‌کند (file lock)
+    """
+    while True:
+        await asyncio.sleep(ANALYTICS_EXPORT_INTERVAL)
+        try:
+            result = await asyncio.to_thread(get_db_manager().analytics.export)
+            if result and any(result.values()):
+                print(f"Analytics export: {result}")
+        except Exception as e:
+            print("Error exporting analytics:", e)
+
+
+# فاصله‌ی به‌روزرسانی آمار تجمیعی داشبورد برگزارکننده (ثانیه، 0 = غیرفعال)
+ORGANIZER_STATS_INTERVAL = float(os.getenv("ORGANIZER_STATS_INTERVAL", 60))
+
+
+async def refresh_organizer_stats():
+    """
+    به‌روزرسانی افزایشی exhibition_daily_stats و expo_company_stats (file lock)
+    """
+    while True:
+        await asyncio.sleep(ORGANIZER_STATS_INTERVAL)
+        try:
+            await asyncio.to_thread(get_db_manager().analytics.refresh_aggregates)
+        except Exception as e:
+            print("Error refreshing organizer stats:", e)
+
+
+# فاصله‌ی تطبیق stat_counters با جداول اصلی (ثانیه، 0 = غیرفعال)
+STATS_RECONCILE_INTERVAL = float(os.getenv("STATS_RECONCILE_INTERVAL", 3600))
+
+
+async def reconcile_stat_counters():
+    """
+    اصلاح دوره‌ای شمارنده‌های آمار کلی (تنها جایی که جداول اصلی شمرده می‌شوند)؛ فقط یک worker
+    در هر لحظه (file lock). اگر شمارنده‌ها هنوز ساخته نشده‌اند (بدون init_db) اولین اجرا بلافاصله است.
+    """
+    try:
+        pending = await asyncio.to_thread(get_db_manager().stats.needs_reconcile)
+    except Exception as e:
+        print("Error reading stat counters:", e)
+        pending = False
+    while True:
+        if not pending:
+            await asyncio.sleep(STATS_RECONCILE_INTERVAL)
+        pending = False
+        try:
+            drift = await asyncio.to_thread(get_db_manager().stats.reconcile)
+            fixed = {name: value for name, value in (drift or {}).items() if value}
+            if fixed:
+                print(f"Reconciled stat counters: {fixed}")
+        except Exception as e:
+            print("Error reconciling stat counters:", e)
+
+
 # ----------------- Startup Tasks -----------------
 @app.on_event("startup")
 async def startup_event():
+    # engine قبل از اولین درخواست ساخته می‌شود؛ Managerها در اولین استفاده
+    with phase("startup:db_manager"):
+        get_db_manager()
+    instrumentation.watch_engine(get_db_manager().db.engine)
     asyncio.create_task(generate_price_updates())
+    if FAVORITE_RECONCILE_INTERVAL > 0:
+        asyncio.create_task(reconcile_favorite_counters())
+    if RECOMMENDATION_INTERVAL > 0:
+        asyncio.create_task(rebuild_recommendations())
+    if ANALYTICS_EXPORT_INTERVAL > 0:
+        asyncio.create_task(export_analytics())
+    if ORGANIZER_STATS_INTERVAL > 0:
+        asyncio.create_task(refresh_organizer_stats())
+    if STATS_RECONCILE_INTERVAL > 0:
+        asyncio.create_task(reconcile_stat_counters())
+    if get_db_manager().db.partitions.enabled and PARTITION_MAINTENANCE_INTERVAL > 0:
+        asyncio.create_task(maintain_view_partitions())
+
+    timing = report()
+    breakdown = ", ".join(f"{item['name']}={item['ms']}ms" for item in timing["phases"])
+    logger.info(f"Startup in {timing['since_process_start_ms']}ms ({breakdown})")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    derivatives.shutdown()
+    # page viewهای بافر شده قبل از خروج نوشته می‌شوند
+    await asyncio.to_thread(get_db_manager().tracking.shutdown)
 
 
 # ----------------- Pydantic Models -----------------
@@ -77,13 +248,22 @@ class EchoResponse(BaseModel):
 
 
 # ----------------- Include Routers -----------------
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+os.makedirs(UPLOAD_ROOT, exist_ok=True)
+app.mount("/uploads", MediaFiles(directory=UPLOAD_ROOT), name="uploads")
 app.include_router(auth_router)
 app.include_router(exhibition_router)
 app.include_router(company_router)
 app.include_router(organizer_router)
 app.include_router(favorite_router)
 app.include_router(product_router)
+app.include_router(recommendation_router)
+app.include_router(tracking_router)
+app.include_router(analytics_router)
+app.include_router(stats_router)
+app.include_router(monitoring_router)
+app.include_router(importer_router)
+if DEBUG_ENDPOINTS:
+    app.include_router(debug_router)
 
 # ----------------- Endpoints -----------------
 @app.get("/", summary="صفحه اصلی")
@@ -113,6 +293,14 @@ def health_check():
     return {"status": "healthy", "message": "Server is running"}
 
 
+@app.get("/startup", summary="زمان‌بندی مراحل بالا آمدن worker", dependencies=[Depends(auth.get_admin_user)])
+def startup_timing():
+    """
+    زمان هر مرحله‌ی import و startup به میلی‌ثانیه (فقط ادمین)
+    """
+    return report()
+
+
 @app.get("/routes", response_model=list[RouteInfo], summary="لیست مسیرهای REST و WebSocket")
 def list_routes():
     """
@@ -0,0 +1,265 @@
+import os
+import re
+import hashlib
+from functools import lru_cache
+from mimetypes import guess_type
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response, FileResponse
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+
+from src.storage.blob_store import PRECOMPRESS_EXTENSIONS
+
+# مسیرهایی که نام فایل از روی محتوا ساخته شده و هرگز تغییر نمی‌کنند
+IMMUTABLE_PREFIXES = ("blobs/", "derivatives/")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=3600"
+
+# ترتیب ترجیح نسخه‌های فشرده‌ی از پیش ساخته شده
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# نام فایل‌های blob store: <sha256><ext> و نسخه‌های تصویر: <sha256>_<variant><ext>
+BLOB_NAME_RE = re.compile(r"^(?P<digest>[0-9a-f]{64})(?:_(?P<variant>[a-z0-9]+))?(?:\.(?P<ext>[a-z0-9]+))?$")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@lru_cache(maxsize=4096)
+def _file_digest(path: str, size: int, mtime_ns: int) -> str:
+    # size و mtime جزو کلید cache هستند تا تغییر فایل باعث محاسبه‌ی مجدد شود
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_etag(path: str, stat_result: os.stat_result) -> str:
+    """
+    ETag قوی بر اساس هش محتوا.
+    برای فایل‌های blob store هش در نام فایل هست و نیازی به خواندن فایل نیست؛
+    نسخه‌های تصویر (thumbnail، webp و ...) بایت‌های متفاوتی دارند و نام نسخه و فرمت
+    به ETag اضافه می‌شود.
+    """
+    match = BLOB_NAME_RE.match(os.path.basename(path))
+    if not match:
+        return f'"{_file_digest(path, stat_result.st_size, stat_result.st_mtime_ns)}"'
+    if match.group("variant"):
+        return f'"{match.group("digest")}-{match.group("variant")}-{match.group("ext") or ""}"'
+    return f'"{match.group("digest")}"'
+
+
+def accepted_encodings(header: str) -> dict:
+    """
+    پارس Accept-Encoding به encoding -> q؛ encodingی با q=0 صراحتاً رد شده است.
+    """
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def cache_control_for(relative_path: str) -> str:
+    if relative_path.replace(os.sep, "/").startswith(IMMUTABLE_PREFIXES):
+        return IMMUTABLE_CACHE_CONTROL
+    return DEFAULT_CACHE_CONTROL
+
+
+def parse_range(range_header: str, size: int):
+    """
+    پارس هدر Range. فقط یک بازه پشتیبانی می‌شود؛
+    برای چند بازه None برمی‌گردد و کل فایل ارسال می‌شود.
+
+    Returns:
+        (start, end) | None | False  (False یعنی بازه‌ی نامعتبر -> 416)
+    """
+    match = RANGE_RE.match(range_header.strip())
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if start == "" and end == "":
+        return None
+
+    if start == "":
+        # bytes=-500 یعنی ۵۰۰ بایت آخر
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, min(end, size - 1)
+
+
+class RangeFileResponse(Response):
+    chunk_size = 256 * 1024
+
+    def __init__(self, path, start: int, end: int, size: int, headers: dict, media_type: str):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.status_code = 206
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+        self.headers["content-length"] = str(end - start + 1)
+
+    async def __call__(self, scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        count = self.end - self.start + 1
+        extensions = scope.get("extensions") or {}
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            if "http.response.zerocopysend" in extensions:
+                # sendfile توسط سرور (بدون کپی داده در Python)
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.wrapped.fileno(),
+                    "offset": self.start,
+                    "count": count,
+                })
+                return
+
+            await file.seek(self.start)
+            remaining = count
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class MediaFileResponse(Response):
+    """
+    پاسخ فایل با پشتیبانی از Range، ETag بر اساس هش محتوا،
+    کش طولانی برای مسیرهای content-addressed و نسخه‌های فشرده‌ی از پیش ساخته شده.
+    تصمیم‌گیری داخل __call__ انجام می‌شود تا هش فایل در thread محاسبه شود
+    و event loop مسدود نشود.
+    """
+
+    def __init__(self, path, stat_result, relative_path: str):
+        self.path = str(path)
+        self.stat_result = stat_result
+        self.relative_path = relative_path
+        self.background = None
+
+    def _precompressed(self, request_headers: Headers):
+        if os.path.splitext(self.path)[1].lower() not in PRECOMPRESS_EXTENSIONS:
+            return None
+
+        accept = accepted_encodings(request_headers.get("accept-encoding", ""))
+        candidates = []
+        for preference, (encoding, suffix) in enumerate(PRECOMPRESSED_ENCODINGS):
+            q = accept.get(encoding, accept.get("*", 0.0))
+            if q > 0:
+                candidates.append((-q, preference, encoding, suffix))
+
+        # بیشترین q و در صورت برابری ترتیب PRECOMPRESSED_ENCODINGS
+        for _q, _preference, encoding, suffix in sorted(candidates):
+            if os.path.isfile(self.path + suffix):
+                return encoding, self.path + suffix
+        return None
+
+    async def _resolve(self, request_headers: Headers):
+        etag = await anyio.to_thread.run_sync(content_etag, self.path, self.stat_result)
+        precompressed = await anyio.to_thread.run_sync(self._precompressed, request_headers)
+        return etag, precompressed
+
+    async def __call__(self, scope, receive, send):
+        request_headers = Headers(scope=scope)
+        etag, precompressed = await self._resolve(request_headers)
+
+        media_type = guess_type(self.path)[0] or "application/octet-stream"
+        headers = {
+            "cache-control": cache_control_for(self.relative_path),
+            "accept-ranges": "bytes",
+        }
+        if os.path.splitext(self.path)[1].lower() in PRECOMPRESS_EXTENSIONS:
+            headers["vary"] = "Accept-Encoding"
+
+        if precompressed:
+            encoding, compressed_path = precompressed
+            headers["etag"] = f'{etag[:-1]}-{encoding}"'
+            headers["content-encoding"] = encoding
+        else:
+            headers["etag"] = etag
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and headers["etag"] in [tag.strip() for tag in if_none_match.split(",")]:
+            response = NotModifiedResponse(Headers(headers=headers))
+            return await response(scope, receive, send)
+
+        if precompressed:
+            # Range روی نسخه‌ی فشرده اعمال نمی‌شود
+            headers.pop("accept-ranges")
+            response = FileResponse(compressed_path, headers=headers, media_type=media_type)
+            return await response(scope, receive, send)
+
+        size = self.stat_result.st_size
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (not if_range or if_range == etag):
+            byte_range = parse_range(range_header, size)
+            if byte_range is False:
+                response = Response(
+                    status_code=416,
+                    headers={"content-range": f"bytes */{size}", **headers}
+                )
+                return await response(scope, receive, send)
+            if byte_range is not None:
+                start, end = byte_range
+                response = RangeFileResponse(self.path, start, end, size, headers, media_type)
+                return await response(scope, receive, send)
+
+        # پاسخ کامل؛ در صورت پشتیبانی سرور با pathsend (zero-copy) ارسال می‌شود
+        response = FileResponse(
+            self.path,
+            headers=headers,
+            media_type=media_type,
+            stat_result=self.stat_result
+        )
+        await response(scope, receive, send)
+
+
+class MediaFiles(StaticFiles):
+    """جایگزین StaticFiles برای سرو فایل‌های /uploads"""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        relative_path = os.path.relpath(str(full_path), str(self.directory))
+        return MediaFileResponse(full_path, stat_result, relative_path)
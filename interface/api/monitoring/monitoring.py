@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.monitoring.metrics import REGISTRY
+
+router = APIRouter(tags=["Monitoring"])
+
+# نوع محتوای text exposition format پرومتئوس
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# -------------------- API Endpoints --------------------
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    متریک‌های همین worker در قالب Prometheus: زمان درخواست‌ها بر اساس route، زمان و تعداد queryها،
+    وضعیت connection pool، حجم آپلودها و صف threadpool.
+    async است تا در event loop اجرا شود (خواندن وضعیت threadpool) و خودش در صف threadpool نماند.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
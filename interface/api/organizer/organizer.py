@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional
+from datetime import date, datetime
 from pydantic import BaseModel
 from src.database.db_manager import db_manager
 from src.database.models import ExpoStatusEnum, VipLevelEnum
@@ -41,6 +43,50 @@ class ExpoCompanyActionSchema(BaseModel):
     vip_level: Optional[VipLevelEnum] = VipLevelEnum.normal
     approve: Optional[bool] = None  # برای تایید/رد
 
+class DashboardTotals(BaseModel):
+    exhibitions: int
+    booths: int
+    exhibition_views: int
+    booth_views: int
+    exhibition_favorites: int
+
+class DashboardExhibition(BaseModel):
+    id: int
+    name: str
+    status: Optional[str]
+    start_date: datetime
+    end_date: datetime
+    views: int
+    favorites: int
+    booths: int
+    booth_views: int
+
+class DashboardBooth(BaseModel):
+    exhibition_id: int
+    company_id: int
+    company_name: str
+    booth_number: Optional[str]
+    hall_name: Optional[str]
+    views: int
+    company_views: int
+    product_views: int
+    favorites: int
+
+class DashboardDay(BaseModel):
+    date: date
+    exhibition_views: int
+    booth_views: int
+    new_favorites: int  # favoriteهای اضافه شده در آن روز (حذف‌ها کم نمی‌شوند)
+
+class OrganizerDashboardResponse(BaseModel):
+    organizer_id: int
+    days: int
+    refreshed_at: Optional[datetime]
+    totals: DashboardTotals
+    exhibitions: List[DashboardExhibition]
+    booths: List[DashboardBooth]
+    daily: List[DashboardDay]
+
 # -------------------- API Endpoints --------------------
 @router.post("/", response_model=OrganizerResponse)
 def create_organizer(user_id: int, req: OrganizerCreateSchema):
@@ -108,4 +154,18 @@ def list_exhibitions(organizer_id: int):
             status=e.status.value,
             year=e.year
         ) for e in exhibitions
-    ]
\ No newline at end of file
+    ]
+
+@router.get("/{organizer_id}/analytics", response_model=OrganizerDashboardResponse)
+def organizer_analytics(organizer_id: int, days: int = Query(30, ge=1, le=365)):
+    """
+    داشبورد برگزارکننده: بازدید هر نمایشگاه، بازدید و علاقه‌مندی هر غرفه و روند روزانه.
+    از آمار تجمیعی خوانده می‌شود که هر ORGANIZER_STATS_INTERVAL ثانیه به‌روز می‌شود (refreshed_at).
+    """
+    if not db_manager.organizer.get_by_id(organizer_id):
+        raise HTTPException(status_code=404, detail="Organizer not found")
+
+    data = db_manager.organizer.dashboard(organizer_id, days=days)
+    data["refreshed_at"] = db_manager.analytics.aggregates_refreshed_at()
+    # داده‌ی داخلی است؛ اعتبارسنجی دوباره‌ی response_model لازم نیست
+    return ORJSONResponse(data)
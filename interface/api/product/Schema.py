@@ -5,6 +5,9 @@ class ProductImageSchema(BaseModel):
     url: str
     orginal_name: str
     id: int = 0
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
+    webp_url: Optional[str] = None
 
 class ProductBrochureSchema(BaseModel):
     url: str
@@ -40,6 +43,14 @@ class ProductResponse(BaseModel):
     images: List[ProductImageSchema] = []
     brochures: List[ProductBrochureSchema] = []
 
+    favorite_count: Optional[int] = None
+    is_favorited: Optional[bool] = None
+
+class SimilarProductSchema(BaseModel):
+    id: int
+    title: str
+    score: float
+
 class ProductImage:
     url: str
     orginal_name: str
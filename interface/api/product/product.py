@@ -1,17 +1,44 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
 
 from typing import List, Optional
 from src.database.db_manager import db_manager
 from interface.api.product import Schema as Schema_product
-import uuid, os
+from src.storage import derivatives
+from src.database.models import Product, ProductImage, ProductBrochure
+from src.database.serializers import RowSerializer
+from fastapi.responses import ORJSONResponse
+from interface.api.streaming import stream_rows
+from interface.api.favorite.favorite import attach_favorites
+from src.database.models import FavoriteTypeEnum
 from sqlalchemy.orm import joinedload
 router = APIRouter(prefix="/products", tags=["Products"])
 
-upload_dir_product_images = "uploads/products/image"
-upload_dir_product_brochure = "uploads/products/brochure"
-
-os.makedirs(upload_dir_product_images, exist_ok=True) 
-os.makedirs(upload_dir_product_brochure, exist_ok=True) 
+# -------------------- Serializers --------------------
+PRODUCT_FIELDS = ["id", "company_id", "title", "summary", "long_description", "video_pitch_url", "price_range"]
+IMAGE_FIELDS = ["url", "orginal_name", "id", "thumbnail_url", "medium_url", "webp_url"]
+BROCHURE_FIELDS = ["url", "orginal_name", "title"]
+
+_image_serializer = RowSerializer(ProductImage, fields=IMAGE_FIELDS)
+_brochure_serializer = RowSerializer(ProductBrochure, fields=BROCHURE_FIELDS)
+_product_serializer = RowSerializer(Product, fields=PRODUCT_FIELDS)
+
+# در لیست، اگر thumbnail هنوز ساخته نشده، تصویر اصلی برگردانده می‌شود
+_product_list_serializer = RowSerializer(
+    Product,
+    fields=PRODUCT_FIELDS,
+    children={
+        "tags": ("tags", "name"),
+        "images": ("images", RowSerializer(
+            ProductImage,
+            fields=[
+                "url", "orginal_name", "id",
+                ("thumbnail_url", ("thumbnail_url", "url")),
+                "medium_url", "webp_url"
+            ]
+        )),
+        "brochures": ("brochures", _brochure_serializer),
+    }
+)
 
 @router.post("/", response_model=Schema_product.ProductResponse)
 def create_product(company_id: int, req: Schema_product.ProductCreateSchema):
@@ -54,37 +81,39 @@ def get_products_by_company(company_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/export/stream")
+def export_products(
+    query: Optional[str] = None,
+    company_id: Optional[int] = None,
+    format: str = Query("ndjson", pattern="^(ndjson|json)$")
+):
+    """
+    خروجی کامل محصولات به صورت stream (NDJSON یا آرایه‌ی JSON)؛
+    رکوردها دسته‌ای از دیتابیس خوانده و بلافاصله ارسال می‌شوند.
+    """
+    products = db_manager.product.iter_search(query=query, company_id=company_id)
+    return stream_rows(products, _product_list_serializer.compiled, format=format, filename="products")
+
 @router.get("/{product_id}", response_model=Schema_product.ProductResponse)
 def get_product(product_id: int):
     product = db_manager.product.get_by_id(product_id)
 
     if not product:
         raise HTTPException(404, "Product not found")
-    tags = [
-        tag['name'] 
-        for tag in db_manager.product.get_tags_for_product(product.id)]
-
-    images = [
-        Schema_product.ProductImageSchema(url=image.url, orginal_name=image.orginal_name, id=image.id)
-        for image in db_manager.product.list_image(product.id)]
-
-    brochures = [
-        Schema_product.ProductBrochureSchema(url=brochure.url, orginal_name=brochure.orginal_name, title=brochure.title)
-        for brochure in db_manager.product.list_brochure(product.id)]
-    
-    
-    return Schema_product.ProductResponse(
-        id=product.id,
-        company_id=product.company_id,
-        title=product.title,
-        summary=product.summary,
-        long_description=product.long_description,
-        video_pitch_url=product.video_pitch_url,
-        price_range=product.price_range,
-        tags = tags,
-        images=images, 
-        brochures=brochures
-    )
+    data = _product_serializer(product)
+    data["tags"] = [tag['name'] for tag in db_manager.product.get_tags_for_product(product.id)]
+    data["images"] = _image_serializer.many(db_manager.product.list_image(product.id))
+    data["brochures"] = _brochure_serializer.many(db_manager.product.list_brochure(product.id))
+
+    # داده‌ی داخلی است؛ اعتبارسنجی دوباره‌ی response_model لازم نیست
+    return ORJSONResponse(data)
+
+@router.get("/{product_id}/similar", response_model=List[Schema_product.SimilarProductSchema])
+def similar_products(product_id: int, limit: int = Query(10, ge=1, le=50)):
+    items = db_manager.product.similar(product_id, limit=limit)
+    if items is None:
+        raise HTTPException(404, "Product not found")
+    return ORJSONResponse(items)
 
 @router.put("/{product_id}", response_model=Schema_product.ProductResponse)
 def update_product(product_id: int, req: Schema_product.ProductUpdateSchema):
@@ -115,12 +144,8 @@ async def add_product_image(product_id: int, file: UploadFile = File(...), is_pr
     بعد از آپلود، مسیر فایل در دیتابیس ذخیره می‌شود.
     """
     try:
-        ext = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4().hex}{ext}"
-
-        file_location = os.path.join(upload_dir_product_images, unique_filename)
-        with open(file_location, "wb") as f:
-            f.write(await file.read())
+        # ذخیره بر اساس هش محتوا؛ تصویر تکراری دوباره نوشته نمی‌شود
+        file_location = db_manager.blob.store(await file.read(), file.filename)
 
         image = db_manager.product.add_image(
             product_id,
@@ -129,6 +154,18 @@ async def add_product_image(product_id: int, file: UploadFile = File(...), is_pr
             is_primary=is_primary
         )
 
+        # thumbnail / medium / webp در process pool ساخته می‌شوند
+        image_id = image.id
+        derivatives.submit(
+            file_location,
+            lambda paths: db_manager.product.set_image_derivatives(
+                image_id,
+                thumbnail_url=paths["thumbnail"],
+                medium_url=paths["medium"],
+                webp_url=paths["webp"]
+            )
+        )
+
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -156,12 +193,7 @@ async def add_brochure(
             raise HTTPException(status_code=400, detail="Empty file received")
 
         print("test")
-        ext = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4().hex}{ext}"
-
-        file_location = os.path.join(upload_dir_product_brochure, unique_filename)
-        with open(file_location, "wb") as f:
-            f.write(await file.read())
+        file_location = db_manager.blob.store(await file.read(), file.filename)
 
         brochure = db_manager.product.add_brochure(
             product_id,
@@ -194,30 +226,18 @@ def search_products(
     query: Optional[str] = None,
     company_id: Optional[int] = None,
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    with_favorites: bool = False,
+    user_id: Optional[int] = None
 ):
+    """
+    با with_favorites، favorite_count و در صورت وجود user_id، is_favorited به هر محصول اضافه می‌شود
+    (دو کوئری برای کل صفحه).
+    """
     products = db_manager.product.search(query=query, company_id=company_id, limit=limit, offset=offset)
+    data = _product_list_serializer.many(products)
 
-    return [
-        Schema_product.ProductResponse(
-            id=p.id,
-            company_id=p.company_id,
-            title=p.title,
-            summary=p.summary,
-            long_description=p.long_description,
-            video_pitch_url=p.video_pitch_url,
-            price_range=p.price_range,
-            tags=[t.name for t in p.tags],
-            images=[Schema_product.ProductImageSchema(
-                url=img.url,
-                orginal_name=img.orginal_name,
-                id=img.id
-            ) for img in p.images],
-            brochures=[Schema_product.ProductBrochureSchema(
-                title=b.title,
-                orginal_name=b.orginal_name,
-                url=b.url
-            ) for b in p.brochures]
-        )
-        for p in products
-    ]
+    if with_favorites:
+        attach_favorites(data, FavoriteTypeEnum.product, user_id=user_id)
+
+    return ORJSONResponse(data)
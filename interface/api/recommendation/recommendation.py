@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Query
+from typing import List, Optional, Dict
+from pydantic import BaseModel
+from src.database.db_manager import db_manager
+from src.database.models import ViewTargetEnum
+
+router = APIRouter(prefix="/recommendations", tags=["Recommendations"])
+
+# -------------------- Schemas --------------------
+class RecommendationItem(BaseModel):
+    target_id: int
+    score: float
+
+class RecommendationGroup(BaseModel):
+    personalized: bool
+    items: List[RecommendationItem]
+
+class RecommendationResponse(BaseModel):
+    user_id: int
+    recommendations: Dict[str, RecommendationGroup]
+
+# -------------------- API Endpoints --------------------
+@router.get("/{user_id}", response_model=RecommendationResponse)
+def get_recommendations(
+    user_id: int,
+    target_type: Optional[ViewTargetEnum] = None,
+    limit: int = Query(20, ge=1, le=200)
+):
+    """
+    پیشنهادهای از پیش محاسبه شده برای کاربر (نمایشگاه، شرکت، محصول).
+    اگر برای کاربر پیشنهاد شخصی وجود نداشته باشد، محبوب‌ترین‌ها برگردانده می‌شوند (personalized=false).
+    """
+    groups = db_manager.recommendation.get(
+        user_id,
+        target_type=target_type.value if target_type else None,
+        limit=limit
+    )
+    return {
+        "user_id": user_id,
+        "recommendations": {
+            name: {
+                "personalized": group["personalized"],
+                "items": [{"target_id": target_id, "score": round(score, 4)} for target_id, score in group["items"]],
+            }
+            for name, group in groups.items()
+        }
+    }
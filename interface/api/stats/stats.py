@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, Query
+from typing import Dict, List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+from interface.api.users import auth
+from src.database.db_manager import db_manager
+
+# آمار داشبورد مدیریت؛ فقط کاربر admin
+router = APIRouter(prefix="/stats", tags=["Stats"], dependencies=[Depends(auth.get_admin_user)])
+
+# -------------------- Schemas --------------------
+class StatsTotals(BaseModel):
+    users: int
+    companies: int
+    exhibitions: int
+    products: int
+    views: int
+    reconciled_at: Optional[datetime] = None
+
+class DailyGrowth(BaseModel):
+    date: str
+    added: int
+    removed: int
+    total: int
+
+# -------------------- API Endpoints --------------------
+@router.get("", response_model=StatsTotals)
+def stats_totals():
+    """
+    تعداد کل کاربران، شرکت‌ها، نمایشگاه‌ها، محصولات و بازدیدها از شمارنده‌های stat_counters.
+    جداول اصلی شمرده نمی‌شوند؛ reconciled_at زمان آخرین تطبیق با جداول اصلی است
+    (None تا وقتی init_db یا تطبیق دوره‌ای شمارنده‌ها را نساخته‌اند).
+    """
+    return db_manager.stats.totals()
+
+
+@router.get("/daily", response_model=Dict[str, List[DailyGrowth]])
+def stats_daily(days: int = Query(30, ge=1, le=365)):
+    """
+    رشد روزانه‌ی هر شمارنده در days روز اخیر (UTC)
+    """
+    return db_manager.stats.series(days)
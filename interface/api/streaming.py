@@ -0,0 +1,65 @@
+import orjson
+from fastapi.responses import StreamingResponse
+
+# همان optionهای ORJSONResponse
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# خطوط کوچک جمع می‌شوند تا برای هر رکورد یک send جدا انجام نشود
+CHUNK_SIZE = 64 * 1024
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _chunked(parts):
+    buffer = []
+    size = 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _ndjson_lines(rows, serialize):
+    for row in rows:
+        yield orjson.dumps(serialize(row), option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+
+
+def _json_array(rows, serialize):
+    yield b"["
+    separator = b""
+    for row in rows:
+        yield separator + orjson.dumps(serialize(row), option=ORJSON_OPTIONS)
+        separator = b","
+    yield b"]"
+
+
+def stream_rows(rows, serialize=None, format: str = "ndjson", filename: str = None):
+    """
+    ارسال رکوردها به محض خوانده شدن از دیتابیس، بدون ساختن کل پاسخ در حافظه.
+
+    Args:
+        rows: iterable (معمولاً generator با yield_per از Manager)
+        serialize: تبدیل هر رکورد به dict؛ اگر None باشد خود رکورد encode می‌شود
+        format: "ndjson" (هر رکورد یک خط) یا "json" (آرایه‌ی JSON به صورت chunked)
+        filename: در صورت وجود، هدر Content-Disposition برای دانلود اضافه می‌شود
+    """
+    serialize = serialize or (lambda row: row)
+
+    if format == "json":
+        body = _json_array(rows, serialize)
+        media_type = "application/json"
+    else:
+        body = _ndjson_lines(rows, serialize)
+        media_type = NDJSON_MEDIA_TYPE
+
+    headers = {}
+    if filename:
+        extension = "json" if format == "json" else "ndjson"
+        headers["content-disposition"] = f'attachment; filename="{filename}.{extension}"'
+
+    return StreamingResponse(_chunked(body), media_type=media_type, headers=headers)
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from pydantic import BaseModel, Field, ValidationError
+from src.database.db_manager import db_manager
+
+router = APIRouter(prefix="/track", tags=["Tracking"])
+
+# حداکثر تعداد page view در یک beacon
+MAX_BEACON_EVENTS = 100
+# زمان قدیمی‌تر از این (ساعت کلاینت یا beacon معطل مانده) به این حد محدود می‌شود؛
+# وگرنه هر زمان دلخواه یک پارتیشن ماهانه‌ی جدید می‌سازد
+MAX_EVENT_AGE = timedelta(hours=6)
+
+# -------------------- Schemas --------------------
+class PageViewEvent(BaseModel):
+    page_url: str = Field(..., max_length=2048)
+    viewed_at: Optional[datetime] = None
+
+class TrackBatchSchema(BaseModel):
+    session_id: str = Field(..., min_length=1, max_length=128)
+    user_id: Optional[int] = Field(None, ge=1, le=2**31 - 1)
+    device_type: Optional[str] = Field(None, max_length=64)
+    browser: Optional[str] = Field(None, max_length=64)
+    os: Optional[str] = Field(None, max_length=64)
+    country: Optional[str] = Field(None, max_length=64)
+    city: Optional[str] = Field(None, max_length=64)
+    page_views: List[PageViewEvent] = Field(..., min_length=1, max_length=MAX_BEACON_EVENTS)
+
+class TrackingStatsResponse(BaseModel):
+    pending: int
+    dropped: int
+    cached_sessions: int
+
+# -------------------- Helpers --------------------
+def _event_time(value: Optional[datetime], now: datetime) -> datetime:
+    # زمان کلاینت به UTC بدون timezone تبدیل می‌شود و در بازه‌ی [now - MAX_EVENT_AGE, now] می‌ماند
+    if value is None:
+        return now
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return max(min(value, now), now - MAX_EVENT_AGE)
+
+# -------------------- API Endpoints --------------------
+@router.post("", status_code=204)
+async def track(request: Request):
+    """
+    beacon ثبت page viewها (navigator.sendBeacon یا fetch با keepalive).
+    بدنه JSON است ولی Content-Type بررسی نمی‌شود چون sendBeacon معمولاً text/plain می‌فرستد.
+    رویدادها فقط به بافر حافظه اضافه می‌شوند و در پس‌زمینه دسته‌ای نوشته می‌شوند.
+    """
+    try:
+        batch = TrackBatchSchema.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise HTTPException(422, e.errors(include_url=False, include_context=False, include_input=False))
+
+    now = datetime.utcnow()
+    accepted = db_manager.tracking.record(
+        batch.session_id,
+        [(event.page_url, _event_time(event.viewed_at, now)) for event in batch.page_views],
+        user_id=batch.user_id,
+        meta={
+            "device_type": batch.device_type,
+            "browser": batch.browser,
+            "os": batch.os,
+            "country": batch.country,
+            "city": batch.city,
+            "ip_address": request.client.host if request.client else None,
+        },
+    )
+    if not accepted:
+        raise HTTPException(503, "Tracking buffer is full", headers={"Retry-After": "5"})
+    return Response(status_code=204)
+
+@router.get("/stats", response_model=TrackingStatsResponse)
+def tracking_stats():
+    return db_manager.tracking.stats()
@@ -5,6 +5,7 @@ from fastapi.security import OAuth2PasswordBearer
 import jwt
 
 from src.database.db_manager import db_manager
+from src.database.models import RoleEnum
 
 # ============================================
 # Config
@@ -134,3 +135,13 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         raise HTTPException(status_code=404, detail="User not found")
 
     return user
+
+
+# ============================================
+# FastAPI Dependency: Admin User
+# ============================================
+def get_admin_user(current_user = Depends(get_current_user)):
+    if getattr(current_user, "role", None) != RoleEnum.admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return current_user
@@ -1,5 +1,7 @@
 import os
 import sys
+import json
+import socket
 import subprocess
 import signal
 import psutil
@@ -21,11 +23,42 @@ if not logger.handlers:
 logger.setLevel(logging.INFO)
 
 # ----------------- Config -----------------
+API_HOST = os.getenv("apiHost", "0.0.0.0")
 API_PORT = int(os.getenv("apiPort", 8000))
 FASTAPI_APP = os.getenv("FASTAPI_APP", "interface.api.main:app")
 USE_RELOAD = os.getenv("USE_RELOAD", "false").lower() == "true"
 
-process = None
+# تعداد workerها (پیش‌فرض: تعداد هسته‌های CPU)
+API_WORKERS = int(os.getenv("API_WORKERS") or os.cpu_count() or 1)
+
+# backoff برای راه‌اندازی مجدد workerهایی که crash می‌کنند
+RESTART_BACKOFF_BASE = float(os.getenv("RESTART_BACKOFF_BASE", 0.5))
+RESTART_BACKOFF_MAX = float(os.getenv("RESTART_BACKOFF_MAX", 30))
+# workerی که بیشتر از این مدت زنده بماند سالم حساب می‌شود و backoff صفر می‌شود
+WORKER_HEALTHY_AFTER = float(os.getenv("WORKER_HEALTHY_AFTER", 10))
+# زمان انتظار برای بالا آمدن worker جدید در rolling restart
+WORKER_BOOT_SECONDS = float(os.getenv("WORKER_BOOT_SECONDS", 3))
+# زمان انتظار برای خاموش شدن graceful یک worker
+WORKER_GRACEFUL_TIMEOUT = float(os.getenv("WORKER_GRACEFUL_TIMEOUT", 30))
+
+STATS_INTERVAL = float(os.getenv("WORKER_STATS_INTERVAL", 60))
+STATS_FILE = os.getenv("WORKER_STATS_FILE", ".run/workers.json")
+
+PID_FILE = os.getenv("PID_FILE", ".run/api.pid")
+# مهلت کلی برای خاموش شدن processهای قبلی روی پورت
+FREE_PORT_TIMEOUT = float(os.getenv("FREE_PORT_TIMEOUT", 5))
+
+# systemd socket activation: اولین fd ارسالی همیشه 3 است
+SD_LISTEN_FDS_START = 3
+
+# اشتراک socket بین workerها با pass_fds فقط روی POSIX ممکن است
+SUPPORTS_SHARED_SOCKET = platform.system() != "Windows"
+
+listen_socket = None
+workers = []
+shutting_down = False
+reload_requested = False
+stats_requested = False
 
 
 # ----------------- Find uvicorn path cross-platform -----------------
@@ -55,64 +88,364 @@ UVICORN_PATH = os.getenv("UVICORN_PATH") or find_uvicorn()
 
 
 # ----------------- Free Port -----------------
-def free_port(port: int):
+def listening_pids(port: int):
+    """
+    PIDهایی که روی پورت LISTEN کرده‌اند، با یک بار خواندن جدول اتصال‌ها.
+    روی سیستم‌هایی که بدون دسترسی root اجازه نمی‌دهند (مثل macOS) خالی برمی‌گرداند.
+    """
+    try:
+        connections = psutil.net_connections(kind="inet")
+    except psutil.AccessDenied:
+        logger.warning("net_connections needs more privileges, relying on PID file only")
+        return set()
+
+    return {
+        conn.pid for conn in connections
+        if conn.pid and conn.laddr and conn.laddr.port == port
+        and conn.status == psutil.CONN_LISTEN
+    }
+
+
+def read_pid_file():
+    try:
+        with open(PID_FILE) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def is_supervisor(pid: int) -> bool:
+    """PID file ممکن است کهنه باشد و PID به process دیگری رسیده باشد"""
+    try:
+        cmdline = psutil.Process(pid).cmdline()
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return False
+    script = os.path.basename(__file__)
+    return any(os.path.basename(arg) == script for arg in cmdline)
+
+
+def write_pid_file():
+    os.makedirs(os.path.dirname(PID_FILE) or ".", exist_ok=True)
+    with open(PID_FILE, "w") as f:
+        f.write(str(os.getpid()))
+
+
+def remove_pid_file():
+    if read_pid_file() == os.getpid():
+        try:
+            os.remove(PID_FILE)
+        except OSError:
+            pass
+
+
+def free_port(port: int, timeout: float = None):
+    """
+    آزاد کردن پورت: supervisor قبلی (از PID file) و processهای LISTEN روی پورت
+    همه با هم SIGTERM می‌گیرند، تا timeout فرصت drain دارند و بعد kill می‌شوند.
+    """
+    timeout = FREE_PORT_TIMEOUT if timeout is None else timeout
     logger.info(f"Cleaning port {port}...")
 
-    for proc in psutil.process_iter(["pid", "name"]):
+    pids = listening_pids(port)
+    previous = read_pid_file()
+    if previous and is_supervisor(previous):
+        pids.add(previous)
+    pids.discard(os.getpid())
+
+    procs = []
+    for pid in pids:
         try:
-            for conn in proc.connections(kind="inet"):
-                if conn.laddr and conn.laddr.port == port:
-                    proc.terminate()
-                    time.sleep(0.3)
-                    if proc.is_running():
-                        proc.kill()
-                    break
+            proc = psutil.Process(pid)
+            proc.terminate()
+            procs.append(proc)
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
             continue
 
+    if not procs:
+        return
+
+    _gone, alive = psutil.wait_procs(procs, timeout=timeout)
+    for proc in alive:
+        logger.warning(f"PID {proc.pid} did not exit in {timeout}s, killing")
+        try:
+            proc.kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    psutil.wait_procs(alive, timeout=1)
+
+
+# ----------------- Shared Socket -----------------
+def activated_socket():
+    """
+    socket آماده از systemd (LISTEN_FDS). در این حالت پورت در دست systemd است
+    و نیازی به پاکسازی پورت و bind مجدد نیست.
+    """
+    if os.getenv("LISTEN_PID") != str(os.getpid()) or int(os.getenv("LISTEN_FDS", 0)) < 1:
+        return None
+
+    sock = socket.socket(fileno=SD_LISTEN_FDS_START)
+    sock.set_inheritable(True)
+    return sock
+
+
+def bind_socket():
+    """
+    socket در process اصلی bind می‌شود و بین workerها به اشتراک گذاشته می‌شود.
+    چون socket در دست supervisor می‌ماند، restart یک worker اتصال جدیدی را رد نمی‌کند.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((API_HOST, API_PORT))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+# ----------------- Workers -----------------
+class Worker:
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.process = None
+        self.ps = None
+        self.started_at = 0.0
+        self.failures = 0
+        self.restart_at = None
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process else None
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+
+def worker_command():
+    cmd = [UVICORN_PATH, FASTAPI_APP]
+
+    if listen_socket is not None:
+        cmd += ["--fd", str(listen_socket.fileno())]
+    else:
+        cmd += ["--host", API_HOST, "--port", str(API_PORT)]
+
+    if USE_RELOAD:
+        cmd.append("--reload")
+
+    return cmd
+
+
+def init_database():
+    """
+    ساخت جداول یک بار در process جداگانه، قبل از بالا آمدن workerها.
+    workerها با DB_AUTO_CREATE=false اجرا می‌شوند.
+    """
+    result = subprocess.run([sys.executable, "-m", "src.database.init_db"])
+    if result.returncode != 0:
+        logger.error("Database initialization failed")
+        sys.exit(1)
+
+    os.environ["DB_AUTO_CREATE"] = "false"
+
+
+def spawn(worker: Worker) -> bool:
+    """
+    Returns:
+        bool: False اگر process ساخته نشد (مثلاً EMFILE یا ENOMEM)؛ worker.process تغییر نمی‌کند
+    """
+    kwargs = {}
+    if listen_socket is not None:
+        kwargs["pass_fds"] = (listen_socket.fileno(),)
+
+    try:
+        process = subprocess.Popen(worker_command(), **kwargs)
+    except Exception as e:
+        # خطای موقتی نباید supervisor را بدون cleanup ببندد و workerهای زنده را یتیم کند
+        logger.error(f"Failed to start worker {worker.slot}: {e}")
+        return False
+
+    worker.process = process
+
+    worker.started_at = time.monotonic()
+    worker.restart_at = None
+    worker.ps = psutil.Process(worker.process.pid)
+    # مقداردهی اولیه برای اندازه‌گیری CPU در بازه‌ی بعدی
+    worker.ps.cpu_percent(None)
+    logger.info(f"Worker {worker.slot} started (PID: {worker.pid})")
+    return True
+
+
+def stop_process(process, timeout=WORKER_GRACEFUL_TIMEOUT):
+    """خاموش کردن graceful (SIGTERM) و در صورت نیاز kill"""
+    if process is None or process.poll() is not None:
+        return
+
+    process.terminate()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        logger.warning(f"PID {process.pid} did not stop in {timeout}s, killing")
+        process.kill()
+        process.wait()
+
+
+def schedule_restart(worker: Worker, spawn_failed=False):
+    uptime = time.monotonic() - worker.started_at
+    if uptime >= WORKER_HEALTHY_AFTER and not spawn_failed:
+        worker.failures = 0
+
+    delay = min(RESTART_BACKOFF_BASE * (2 ** worker.failures), RESTART_BACKOFF_MAX)
+    worker.failures += 1
+    worker.restart_at = time.monotonic() + delay
+
+    if spawn_failed:
+        logger.warning(f"Worker {worker.slot} could not be started, retrying in {delay:.1f}s")
+    else:
+        logger.warning(
+            f"Worker {worker.slot} (PID: {worker.pid}) exited with code "
+            f"{worker.process.returncode}, restarting in {delay:.1f}s"
+        )
+
+
+def check_workers():
+    now = time.monotonic()
+    for worker in workers:
+        if worker.alive():
+            continue
+        if worker.restart_at is None:
+            schedule_restart(worker)
+        elif now >= worker.restart_at and not spawn(worker):
+            schedule_restart(worker, spawn_failed=True)
+
+
+def rolling_restart():
+    """
+    restart یکی‌یکی workerها (SIGHUP).
+    worker جدید اول بالا می‌آید و بعد worker قدیمی graceful خاموش می‌شود؛
+    socket مشترک باز می‌ماند و اتصالی از دست نمی‌رود.
+    """
+    logger.info("🔄 Rolling restart...")
+
+    for worker in workers:
+        if shutting_down:
+            return
+
+        old_process = worker.process
+        if not spawn(worker):
+            logger.error(f"Worker {worker.slot} could not be started during rolling restart, keeping old worker")
+            continue
+
+        deadline = time.monotonic() + WORKER_BOOT_SECONDS
+        while time.monotonic() < deadline and worker.alive():
+            time.sleep(0.1)
+
+        if not worker.alive():
+            logger.error(f"Worker {worker.slot} failed during rolling restart, keeping old worker")
+            worker.process = old_process
+            worker.ps = psutil.Process(old_process.pid) if old_process.poll() is None else None
+            continue
+
+        stop_process(old_process)
+
+    logger.info("Rolling restart finished")
+
+
+# ----------------- Worker Stats -----------------
+def collect_stats():
+    stats = []
+    for worker in workers:
+        item = {"slot": worker.slot, "pid": worker.pid, "alive": worker.alive()}
+        if worker.alive() and worker.ps is not None:
+            try:
+                with worker.ps.oneshot():
+                    item["rss_mb"] = round(worker.ps.memory_info().rss / 1024 / 1024, 1)
+                    item["cpu_percent"] = worker.ps.cpu_percent(None)
+                    item["uptime_s"] = round(time.monotonic() - worker.started_at)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        item["failures"] = worker.failures
+        stats.append(item)
+    return stats
+
+
+def report_stats():
+    stats = collect_stats()
+    for item in stats:
+        logger.info(
+            f"Worker {item['slot']} PID={item['pid']} "
+            f"RSS={item.get('rss_mb', '-')}MB CPU={item.get('cpu_percent', '-')}%"
+        )
+
+    if STATS_FILE:
+        try:
+            os.makedirs(os.path.dirname(STATS_FILE) or ".", exist_ok=True)
+            with open(STATS_FILE, "w") as f:
+                json.dump({"time": time.time(), "workers": stats}, f, indent=2)
+        except OSError as e:
+            logger.error(f"Failed to write worker stats: {e}")
+
 
 # ----------------- Start FastAPI -----------------
 def start_fastapi():
-    global process
+    global listen_socket, workers
 
-    free_port(API_PORT)
+    if SUPPORTS_SHARED_SOCKET and not USE_RELOAD:
+        listen_socket = activated_socket()
 
-    cmd = [
-        UVICORN_PATH,
-        FASTAPI_APP,
-        "--host", "0.0.0.0",
-        "--port", str(API_PORT)
-    ]
+    if listen_socket is None:
+        free_port(API_PORT)
+    else:
+        logger.info("Using socket passed by the service manager")
+    write_pid_file()
+    init_database()
 
+    worker_count = API_WORKERS
     if USE_RELOAD:
-        logger.info("🔄 Auto reload mode ENABLED")
-        cmd.append("--reload")
+        logger.info("🔄 Auto reload mode ENABLED (single worker)")
+        worker_count = 1
     else:
         logger.info("🚀 Auto reload mode DISABLED (production mode)")
+        if listen_socket is None and SUPPORTS_SHARED_SOCKET:
+            listen_socket = bind_socket()
+        elif listen_socket is None and worker_count > 1:
+            logger.warning("Shared socket is not supported on this platform, using a single worker")
+            worker_count = 1
 
-    logger.info(f"Starting FastAPI using: {UVICORN_PATH}")
+    logger.info(f"Starting {worker_count} FastAPI worker(s) using: {UVICORN_PATH}")
 
-    try:
-        process = subprocess.Popen(cmd)
-        logger.info(f"FastAPI started (PID: {process.pid})")
-    except Exception as e:
-        logger.error(f"Failed to start FastAPI: {e}")
-        sys.exit(1)
+    workers = [Worker(slot) for slot in range(worker_count)]
+    for worker in workers:
+        if not spawn(worker):
+            schedule_restart(worker, spawn_failed=True)
 
 
 # ----------------- Cleanup -----------------
 def cleanup(*_):
-    global process
+    global shutting_down
 
-    try:
-        free_port(API_PORT)
+    shutting_down = True
 
-        if process and process.poll() is None:
-            logger.info(f"Terminating PID {process.pid}")
-            process.terminate()
-            time.sleep(0.5)
-            if process.poll() is None:
-                process.kill()
+    try:
+        for worker in workers:
+            if worker.alive():
+                logger.info(f"Terminating PID {worker.pid}")
+                worker.process.terminate()
+
+        procs = []
+        for worker in workers:
+            try:
+                procs.append(psutil.Process(worker.pid))
+            except (psutil.NoSuchProcess, TypeError):
+                continue
+
+        # drain همزمان همه‌ی workerها با یک مهلت کلی
+        _gone, alive = psutil.wait_procs(procs, timeout=WORKER_GRACEFUL_TIMEOUT)
+        for proc in alive:
+            logger.warning(f"PID {proc.pid} did not stop in {WORKER_GRACEFUL_TIMEOUT}s, killing")
+            proc.kill()
+
+        remove_pid_file()
+
+        if listen_socket is not None:
+            listen_socket.close()
     except Exception as e:
         logger.error(f"Cleanup error: {e}")
 
@@ -120,19 +453,47 @@ def cleanup(*_):
     sys.exit(0)
 
 
+def request_reload(*_):
+    global reload_requested
+    reload_requested = True
+
+
+def request_stats(*_):
+    global stats_requested
+    stats_requested = True
+
+
 # ----------------- Main -----------------
 def main():
+    global reload_requested, stats_requested
+
     signal.signal(signal.SIGINT, cleanup)
     signal.signal(signal.SIGTERM, cleanup)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, request_reload)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, request_stats)
 
     start_fastapi()
 
     logger.info(f"Server running at http://localhost:{API_PORT}")
-    logger.info("Press CTRL+C to stop.")
+    logger.info("Press CTRL+C to stop. SIGHUP: rolling restart, SIGUSR1: worker stats.")
 
+    next_stats = time.monotonic() + STATS_INTERVAL
     while True:
         time.sleep(1)
 
+        if reload_requested:
+            reload_requested = False
+            rolling_restart()
+
+        check_workers()
+
+        if stats_requested or time.monotonic() >= next_stats:
+            stats_requested = False
+            next_stats = time.monotonic() + STATS_INTERVAL
+            report_stats()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,35 @@
+"""
+خروجی افزایشی رویدادها به فایل‌های Parquet برای گزارش‌های تحلیلی
+
+اجرا:
+    python -m src.analytics.job
+    python -m src.analytics.job --aggregates          # آمار تجمیعی داشبورد برگزارکننده
+    python -m src.analytics.job --aggregates --full   # ساخت دوباره‌ی آمار از ابتدا
+"""
+import sys
+import json
+import time
+
+from src.database.db_manager import get_db_manager
+
+
+def main():
+    args = sys.argv[1:]
+    analytics = get_db_manager().analytics
+
+    start = time.perf_counter()
+    if "--aggregates" in args:
+        name = "aggregated"
+        result = analytics.refresh_aggregates(full="--full" in args)
+    else:
+        name = "exported"
+        result = analytics.export()
+    if result is None:
+        print("Another analytics job is running")
+        sys.exit(1)
+
+    print(json.dumps({name: result, "seconds": round(time.perf_counter() - start, 2)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
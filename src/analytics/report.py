@@ -0,0 +1,134 @@
+"""
+گزارش‌های تحلیلی روی فایل‌های Parquet (بدون دسترسی به دیتابیس اصلی)
+"""
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from src.analytics import store
+
+
+def _ids(table, column):
+    return table.column(column).to_numpy(zero_copy_only=False)
+
+
+def _unique_users(user_ids):
+    # بازدید مهمان (user_id خالی) در شمارش افراد یکتا حساب نمی‌شود
+    return int(len(np.unique(user_ids[~np.isnan(user_ids)]))) if len(user_ids) else 0
+
+
+def _user_ids(table):
+    return table.column("user_id").to_numpy(zero_copy_only=False).astype(np.float64)
+
+
+def _count_by(keys, values):
+    """تعداد تکرار هر value از بین keys (آرایه‌ی هم‌طول با keys)"""
+    if not len(values):
+        return np.zeros(len(keys), dtype=np.int64)
+    unique, counts = np.unique(values, return_counts=True)
+    positions = np.searchsorted(unique, keys)
+    positions = np.clip(positions, 0, len(unique) - 1)
+    return np.where(unique[positions] == keys, counts[positions], 0)
+
+
+def exhibition_report(exhibition_id: int, start: datetime = None, end: datetime = None, root=None) -> dict:
+    """
+    ترافیک غرفه‌های یک نمایشگاه در بازه‌ی [start, end).
+
+    ترافیک هر غرفه = بازدید صفحه‌ی شرکت + بازدید محصولات آن شرکت.
+
+    Returns:
+        dict: خلاصه‌ی نمایشگاه، سری روزانه و آمار هر غرفه (به ترتیب بازدید نزولی)
+    """
+    booths = store.read_dimension("expo_companies", root=root).filter(
+        pc.equal(pc.field("exhibition_id"), exhibition_id)
+    )
+    company_ids = np.asarray(_ids(booths, "company_id"), dtype=np.int64)
+
+    products = store.read_dimension("products", root=root)
+    products = products.filter(pc.is_in(products.column("company_id"), value_set=pa.array(company_ids, type=pa.int64())))
+    product_ids = np.asarray(_ids(products, "id"), dtype=np.int64)
+    product_company = np.asarray(_ids(products, "company_id"), dtype=np.int64)
+
+    view_columns = ["user_id", "target_type", "target_id", "viewed_at"]
+    expo_views = store.read("views", start, end, columns=view_columns, root=root, filter=(
+        (ds.field("target_type") == "exhibition") & (ds.field("target_id") == exhibition_id)
+    ))
+    company_views = store.read("views", start, end, columns=view_columns, root=root, filter=(
+        (ds.field("target_type") == "company") & store.is_in("target_id", company_ids)
+    ))
+    product_views = store.read("views", start, end, columns=view_columns, root=root, filter=(
+        (ds.field("target_type") == "product") & store.is_in("target_id", product_ids)
+    ))
+    favorites = store.read("favorites", start, end, columns=["favorite_type", "target_id"], root=root, filter=(
+        (ds.field("favorite_type") == "company") & store.is_in("target_id", company_ids)
+    ))
+    expo_favorites = store.read("favorites", start, end, columns=["target_id"], root=root, filter=(
+        (ds.field("favorite_type") == "exhibition") & (ds.field("target_id") == exhibition_id)
+    ))
+
+    # محصول -> شرکت صاحب غرفه
+    order = np.argsort(product_ids)
+    viewed_products = np.asarray(_ids(product_views, "target_id"), dtype=np.int64)
+    product_owner = product_company[order][np.searchsorted(product_ids[order], viewed_products)] if len(viewed_products) else viewed_products
+
+    company_targets = np.asarray(_ids(company_views, "target_id"), dtype=np.int64)
+    page_counts = _count_by(company_ids, company_targets)
+    product_counts = _count_by(company_ids, product_owner)
+    favorite_counts = _count_by(company_ids, np.asarray(_ids(favorites, "target_id"), dtype=np.int64))
+
+    # بازدیدکننده‌ی یکتای هر غرفه (صفحه‌ی شرکت یا محصولاتش)
+    booth_of_view = np.concatenate([company_targets, product_owner])
+    booth_users = np.concatenate([_user_ids(company_views), _user_ids(product_views)])
+    known = ~np.isnan(booth_users)
+    pairs = np.unique(np.stack([booth_of_view[known], booth_users[known].astype(np.int64)]), axis=1) \
+        if known.any() else np.zeros((2, 0), dtype=np.int64)
+    visitor_counts = _count_by(company_ids, pairs[0])
+
+    booth_rows = []
+    for index, booth in enumerate(booths.to_pylist()):
+        booth_rows.append({
+            "company_id": booth["company_id"],
+            "booth_number": booth["booth_number"],
+            "hall_name": booth["hall_name"],
+            "views": int(page_counts[index] + product_counts[index]),
+            "company_page_views": int(page_counts[index]),
+            "product_views": int(product_counts[index]),
+            "unique_visitors": int(visitor_counts[index]),
+            "favorites": int(favorite_counts[index]),
+        })
+    booth_rows.sort(key=lambda row: row["views"], reverse=True)
+
+    # سری روزانه‌ی کل ترافیک (صفحه‌ی نمایشگاه + غرفه‌ها)
+    all_views = pa.concat_tables([expo_views, company_views, product_views])
+    days = pc.strftime(all_views.column("viewed_at"), format="%Y-%m-%d").to_numpy(zero_copy_only=False)
+    all_users = _user_ids(all_views)
+    daily = []
+    if len(days):
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        for index, day in enumerate(unique_days):
+            mask = inverse == index
+            daily.append({
+                "date": str(day),
+                "views": int(mask.sum()),
+                "unique_visitors": _unique_users(all_users[mask]),
+            })
+
+    return {
+        "exhibition_id": exhibition_id,
+        "start": start,
+        "end": end,
+        "summary": {
+            "exhibition_page_views": expo_views.num_rows,
+            "booth_views": int(page_counts.sum() + product_counts.sum()),
+            "unique_visitors": _unique_users(all_users),
+            "exhibition_favorites": expo_favorites.num_rows,
+            "booth_favorites": int(favorite_counts.sum()),
+            "booths": booths.num_rows,
+        },
+        "daily": daily,
+        "booths": booth_rows,
+    }
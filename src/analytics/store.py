@@ -0,0 +1,160 @@
+"""
+ذخیره‌سازی ستونی داده‌های تحلیلی (Parquet) جدا از دیتابیس اصلی
+
+ساختار پوشه:
+    ANALYTICS_DIR/<dataset>/date=YYYY-MM-DD/part-<source>-<first_id>.parquet
+    ANALYTICS_DIR/dimensions/<name>.parquet
+
+فایل‌های رویداد فقط اضافه می‌شوند (append-only)؛ جداول dimension در هر اجرا کامل جایگزین می‌شوند.
+"""
+import os
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+ANALYTICS_DIR = os.getenv("ANALYTICS_DIR", "analytics")
+
+DIMENSIONS_DIR = "dimensions"
+
+# نام dataset -> schema ستون‌ها؛ time_column ستونی است که پارتیشن روزانه بر اساس آن ساخته می‌شود
+DATASETS = {
+    "views": {
+        "time_column": "viewed_at",
+        "schema": pa.schema([
+            ("id", pa.int64()),
+            ("user_id", pa.int64()),
+            ("target_type", pa.dictionary(pa.int8(), pa.string())),
+            ("target_id", pa.int64()),
+            ("viewed_at", pa.timestamp("us")),
+        ]),
+    },
+    "favorites": {
+        "time_column": "created_at",
+        "schema": pa.schema([
+            ("id", pa.int64()),
+            ("user_id", pa.int64()),
+            ("favorite_type", pa.dictionary(pa.int8(), pa.string())),
+            ("target_id", pa.int64()),
+            ("created_at", pa.timestamp("us")),
+        ]),
+    },
+    "page_views": {
+        "time_column": "viewed_at",
+        "schema": pa.schema([
+            ("id", pa.int64()),
+            ("session_id", pa.int64()),
+            ("page_url", pa.string()),
+            ("viewed_at", pa.timestamp("us")),
+        ]),
+    },
+}
+
+DIMENSIONS = {
+    "expo_companies": pa.schema([
+        ("exhibition_id", pa.int64()),
+        ("company_id", pa.int64()),
+        ("booth_number", pa.string()),
+        ("hall_name", pa.string()),
+    ]),
+    "products": pa.schema([
+        ("id", pa.int64()),
+        ("company_id", pa.int64()),
+    ]),
+}
+
+_DATE_PARTITIONING = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+
+
+def _dataset_dir(dataset, root=None):
+    return os.path.join(root or ANALYTICS_DIR, dataset)
+
+
+def _write_atomic(table, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # پیشوند نقطه: pyarrow.dataset فایل نیمه‌کاره را نمی‌خواند
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def write_batch(dataset, source, rows, root=None):
+    """
+    نوشتن یک دسته رکورد (به ترتیب id) به صورت یک فایل برای هر روز.
+    نام فایل از اولین id همان روز ساخته می‌شود، پس تکرار یک دسته بعد از crash
+    (قبل از ثبت watermark) همان فایل را بازنویسی می‌کند و رکورد تکراری نمی‌سازد.
+
+    Args:
+        source: نام جدول فیزیکی منبع (با پارتیشن‌بندی ماهانه، idها فقط داخل هر جدول یکتا هستند)
+        rows: لیست dict با ستون‌های schema
+
+    Returns:
+        int: تعداد رکوردهای نوشته شده
+    """
+    spec = DATASETS[dataset]
+    time_column = spec["time_column"]
+
+    by_day = {}
+    for row in rows:
+        by_day.setdefault(row[time_column].date().isoformat(), []).append(row)
+
+    for day, day_rows in by_day.items():
+        table = pa.Table.from_pylist(day_rows, schema=spec["schema"])
+        path = os.path.join(_dataset_dir(dataset, root), f"date={day}", f"part-{source}-{day_rows[0]['id']:012d}.parquet")
+        _write_atomic(table, path)
+    return len(rows)
+
+
+def write_dimension(name, rows, root=None):
+    table = pa.Table.from_pylist(rows, schema=DIMENSIONS[name])
+    _write_atomic(table, os.path.join(root or ANALYTICS_DIR, DIMENSIONS_DIR, f"{name}.parquet"))
+
+
+def read_dimension(name, root=None) -> pa.Table:
+    path = os.path.join(root or ANALYTICS_DIR, DIMENSIONS_DIR, f"{name}.parquet")
+    if not os.path.exists(path):
+        return DIMENSIONS[name].empty_table()
+    return pq.read_table(path)
+
+
+def read(dataset, start: datetime = None, end: datetime = None, columns=None, filter=None, root=None) -> pa.Table:
+    """
+    خواندن رکوردهای بازه‌ی [start, end)؛ فقط پوشه‌ی روزهای داخل بازه باز می‌شود.
+
+    Args:
+        filter: عبارت اضافه‌ی pyarrow.dataset (مثلاً ds.field("target_type") == "company")
+    """
+    spec = DATASETS[dataset]
+    path = _dataset_dir(dataset, root)
+    columns = columns or spec["schema"].names
+    if not os.path.isdir(path):
+        return spec["schema"].empty_table().select(columns)
+
+    time_field = ds.field(spec["time_column"])
+    expression = None
+    conditions = []
+    if start is not None:
+        conditions.append(ds.field("date") >= start.date().isoformat())
+        conditions.append(time_field >= pa.scalar(start, pa.timestamp("us")))
+    if end is not None:
+        conditions.append(ds.field("date") <= (end - timedelta(microseconds=1)).date().isoformat())
+        conditions.append(time_field < pa.scalar(end, pa.timestamp("us")))
+    if filter is not None:
+        conditions.append(filter)
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    files = ds.dataset(
+        path,
+        schema=spec["schema"].append(pa.field("date", pa.string())),
+        format="parquet",
+        partitioning=_DATE_PARTITIONING,
+        exclude_invalid_files=False,
+    )
+    return files.to_table(columns=columns, filter=expression)
+
+
+def is_in(column, values):
+    """فیلتر عضویت برای read(filter=...)"""
+    return ds.field(column).isin(pa.array(list(values), type=pa.int64()))
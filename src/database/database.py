@@ -1,5 +1,7 @@
 import os
+from contextlib import contextmanager
 from datetime import datetime
+from functools import cached_property
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, Column, Integer, DateTime
 from sqlalchemy.orm import sessionmaker, declarative_base
@@ -8,6 +10,40 @@ load_dotenv()
 
 Base = declarative_base()
 
+# چند worker همزمان نباید create_all را اجرا کنند
+SCHEMA_LOCK_FILE = os.getenv("SCHEMA_LOCK_FILE", ".run/schema.lock")
+
+
+@contextmanager
+def file_lock(path: str, blocking: bool = True):
+    """
+    قفل بین processها با flock روی یک فایل.
+    با blocking=False اگر قفل دست process دیگری باشد False برمی‌گرداند.
+    روی Windows قفلی گرفته نمی‌شود.
+    """
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        yield True
+        return
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as lock_file:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(lock_file, flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def schema_lock():
+    return file_lock(SCHEMA_LOCK_FILE)
+
 class BaseModel(Base):
     __abstract__ = True
     id = Column(Integer, primary_key=True, index=True)
@@ -33,13 +69,24 @@ class Database:
             autoflush=False
         )
 
+        # شمارنده‌های stat_counters همراه نوشتن‌های ORM به‌روز می‌شوند
+        from src.database.stats import register_events
+        register_events()
+
     def create_tables(self):
         """
         تمام مدل‌ها را import می‌کنیم تا SQLAlchemy آنها را register کند
         """
         import src.database.models
 
-        Base.metadata.create_all(bind=self.engine)
+        with schema_lock():
+            Base.metadata.create_all(bind=self.engine)
         
+    @cached_property
+    def partitions(self):
+        """مسیریابی جداول پارتیشن شده‌ی ماهانه (user_views، tracking_page_views)"""
+        from src.database.partitions import Partitioner
+        return Partitioner(self.engine)
+
     def get_session(self):
         return self.SessionLocal()
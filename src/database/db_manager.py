@@ -1,3 +1,7 @@
+import os
+import threading
+from functools import cached_property
+
 from src.database.database import Database
 from src.database.managers.user_manager import UserManager, UserProfileManager
 from src.database.managers.view_manager import ViewManager
@@ -6,34 +10,140 @@ from src.database.managers.company_manager import CompanyManager
 from src.database.managers.product_manager import ProductManager
 from src.database.managers.organizer_manager import OrganizerManager
 from src.database.managers.favorite_manager import FavoriteManager
+from src.database.managers.blob_manager import BlobManager
+from src.database.managers.recommendation_manager import RecommendationManager
+from src.database.managers.tracking_manager import TrackingManager
+from src.database.managers.analytics_manager import AnalyticsManager
+from src.database.managers.stats_manager import StatsManager
+from src.database.managers.import_manager import ImportManager
+from src.timing import phase
+
+# در حالت چند worker، جداول یک بار توسط run.py (یا python -m src.database.init_db) ساخته می‌شوند
+DB_AUTO_CREATE = os.getenv("DB_AUTO_CREATE", "true").lower() == "true"
+
+_MISSING = object()
+
+
+class locked_cached_property(cached_property):
+    """
+    cached_property که ساخت مقدار را با قفل instance انجام می‌دهد (double-checked)؛
+    اولین استفاده‌ی همزمان از چند thread فقط یک Manager می‌سازد.
+    بعد از ساخت، مقدار در __dict__ است و قفل دیگر گرفته نمی‌شود.
+    """
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        cache = instance.__dict__
+        value = cache.get(self.attrname, _MISSING)
+        if value is _MISSING:
+            with instance._managers_lock:
+                value = cache.get(self.attrname, _MISSING)
+                if value is _MISSING:
+                    value = self.func(instance)
+                    cache[self.attrname] = value
+        return value
+
 
 class DBManager:
-    def __init__(self, db_url=None):
+    def __init__(self, db_url=None, create_tables=None):
         """
-        مدیریت اصلی دیتابیس که تمام Managerها را یکجا فراهم می‌کند
+        مدیریت اصلی دیتابیس که تمام Managerها را یکجا فراهم می‌کند.
+        Managerها در اولین استفاده ساخته می‌شوند.
         
         Args:
             db_url (str): آدرس دیتابیس (اختیاری)
+            create_tables (bool): ساخت جداول؛ پیش‌فرض از DB_AUTO_CREATE
         """
-        self.db = Database(db_url)
-        self.db.create_tables()
+        self._managers_lock = threading.RLock()
+        with phase("db:engine"):
+            self.db = Database(db_url)
+
+        if DB_AUTO_CREATE if create_tables is None else create_tables:
+            with phase("db:create_tables"):
+                self.db.create_tables()
+
+    # مقداردهی Managerها (lazy)
+    @locked_cached_property
+    def user(self):
+        return UserManager(self.db)
+
+    @locked_cached_property
+    def user_profile(self):
+        return UserProfileManager(self.db)
+
+    @locked_cached_property
+    def view(self):
+        return ViewManager(self.db)
+
+    @locked_cached_property
+    def exhibition(self):
+        return ExhibitionManager(self.db)
+
+    @locked_cached_property
+    def expo_company(self):
+        return ExpoCompanyManager(self.db)
+
+    @locked_cached_property
+    def company(self):
+        return CompanyManager(self.db)
+
+    @locked_cached_property
+    def product(self):
+        return ProductManager(self.db)
+
+    @locked_cached_property
+    def organizer(self):
+        return OrganizerManager(self.db)
+
+    @locked_cached_property
+    def favorite(self):
+        return FavoriteManager(self.db)
+
+    @locked_cached_property
+    def verification(self):
+        return VerificationManager(self.db)
+
+    @locked_cached_property
+    def blob(self):
+        return BlobManager(self.db)
+
+    @locked_cached_property
+    def recommendation(self):
+        return RecommendationManager(self.db)
 
-        # مقداردهی تمام Managerها
-        self.user = UserManager(self.db)
-        self.user_profile = UserProfileManager(self.db)
-        self.view = ViewManager(self.db)
-        self.exhibition = ExhibitionManager(self.db)
-        self.expo_company = ExpoCompanyManager(self.db)
-        self.company = CompanyManager(self.db)
-        self.product = ProductManager(self.db)
-        self.organizer = OrganizerManager(self.db)
-        self.favorite = FavoriteManager(self.db)
-        self.verification = VerificationManager(self.db)
-        # برای backward compatibility
-        self.company_manager = self.company
-        self.product_manager = self.product
-        self.exhibition_manager = self.exhibition
-        self.favorite_manager = self.favorite
+    @locked_cached_property
+    def tracking(self):
+        return TrackingManager(self.db)
+
+    @locked_cached_property
+    def analytics(self):
+        return AnalyticsManager(self.db)
+
+    @locked_cached_property
+    def stats(self):
+        return StatsManager(self.db)
+
+    @locked_cached_property
+    def importer(self):
+        return ImportManager(self.db)
+
+    # برای backward compatibility
+    @property
+    def company_manager(self):
+        return self.company
+
+    @property
+    def product_manager(self):
+        return self.product
+
+    @property
+    def exhibition_manager(self):
+        return self.exhibition
+
+    @property
+    def favorite_manager(self):
+        return self.favorite
 
     def get_session(self):
         """دریافت یک session از دیتابیس"""
@@ -65,39 +175,16 @@ class DBManager:
             return False
 
     def get_stats(self):
-        """دریافت آمار کلی دیتابیس"""
-        stats = {}
-        session = self.get_session()
-        
-        try:
-            # تعداد کاربران
-            from src.database.models import User
-            stats['total_users'] = session.query(User).count()
-            
-            # تعداد شرکت‌ها
-            from src.database.models import CompanyProfile
-            stats['total_companies'] = session.query(CompanyProfile).count()
-            
-            # تعداد نمایشگاه‌ها
-            from src.database.models import Exhibition
-            stats['total_exhibitions'] = session.query(Exhibition).count()
-            
-            # تعداد محصولات
-            from src.database.models import Product
-            stats['total_products'] = session.query(Product).count()
-            
-            # تعداد بازدیدها
-            from src.database.models import UserView
-            stats['total_views'] = session.query(UserView).count()
-            
-        finally:
-            session.close()
-        
-        return stats
+        """
+        دریافت آمار کلی دیتابیس از شمارنده‌های stat_counters (بدون COUNT روی جداول اصلی)
+        """
+        totals = self.stats.totals()
+        return {f"total_{name}": totals[name] for name in ("users", "companies", "exhibitions", "products", "views")}
 
 
 # Singleton instance برای استفاده آسان در سراسر برنامه
 _db_manager_instance = None
+_db_manager_lock = threading.Lock()
 
 def get_db_manager(db_url=None):
     """
@@ -112,7 +199,9 @@ def get_db_manager(db_url=None):
     global _db_manager_instance
     
     if _db_manager_instance is None:
-        _db_manager_instance = DBManager(db_url)
+        with _db_manager_lock:
+            if _db_manager_instance is None:
+                _db_manager_instance = DBManager(db_url)
     
     return _db_manager_instance
 
@@ -129,10 +218,21 @@ def reset_db_manager(db_url=None):
     """
     global _db_manager_instance
     
-    if _db_manager_instance:
-        _db_manager_instance.close_all_sessions()
-    
-    _db_manager_instance = DBManager(db_url)
+    with _db_manager_lock:
+        if _db_manager_instance:
+            _db_manager_instance.close_all_sessions()
+        _db_manager_instance = DBManager(db_url)
     return _db_manager_instance
 
-db_manager = get_db_manager()
\ No newline at end of file
+
+class _LazyDBManager:
+    """
+    DBManager در زمان import ساخته نمی‌شود؛
+    اولین دسترسی به db_manager.<attr> آن را می‌سازد.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_db_manager(), name)
+
+
+db_manager = _LazyDBManager()
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+دستورهای وابسته به نوع دیتابیس (ON CONFLICT و ...)
+"""
+from datetime import datetime
+
+from sqlalchemy import insert as generic_insert, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def supports_on_conflict(session) -> bool:
+    return session.get_bind().dialect.name in _INSERTS
+
+
+def supports_returning(session) -> bool:
+    """INSERT/DELETE ... RETURNING (sqlite >= 3.35، postgresql)"""
+    current = session.get_bind().dialect
+    return bool(current.insert_returning and current.delete_returning)
+
+
+def insert(session, model):
+    """
+    insert مخصوص dialect فعلی؛ برای sqlite و postgresql متدهای
+    on_conflict_do_nothing / on_conflict_do_update را دارد.
+    """
+    return _INSERTS.get(session.get_bind().dialect.name, generic_insert)(model)
+
+
+def increment(session, model, keys, rows):
+    """
+    افزودن ستون‌های شمارنده‌ی rows به ردیف‌های موجود، یا ساخت ردیف اگر وجود ندارد
+    (upsert با x = x + excluded.x). هر row فقط ستون‌های keys و شمارنده‌ها را دارد.
+    فقط از Core و connection جاری استفاده می‌کند، پس داخل eventهای flush هم قابل اجراست.
+    """
+    if not rows:
+        return
+
+    now = datetime.utcnow()
+    counters = [name for name in rows[0] if name not in keys]
+    rows = [{**row, "created_at": now, "updated_at": now} for row in rows]
+    table = model.__table__
+    connection = session.connection()
+
+    if supports_on_conflict(session):
+        stmt = insert(session, model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={
+                **{name: table.c[name] + stmt.excluded[name] for name in counters},
+                "updated_at": now,
+            }
+        )
+        connection.execute(stmt, rows)
+        return
+
+    for row in rows:
+        updated = connection.execute(
+            table.update()
+            .where(*[table.c[key] == row[key] for key in keys])
+            .values({name: table.c[name] + row[name] for name in counters}, updated_at=now)
+        ).rowcount
+        if not updated:
+            connection.execute(table.insert().values(**row))
+
+
+def seed_ids(connection, table, last_id) -> bool:
+    """
+    شروع id ردیف‌های بعدی جدول (تازه ساخته شده) بعد از last_id.
+    در sqlite فقط برای جدول AUTOINCREMENT (sqlite_autoincrement=True) کار می‌کند.
+
+    Returns:
+        bool: False اگر dialect پشتیبانی نشود
+    """
+    name = connection.dialect.name
+    if name == "sqlite":
+        connection.execute(
+            text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+            {"name": table.name, "seq": last_id}
+        )
+    elif name == "postgresql":
+        connection.execute(
+            text("SELECT setval(pg_get_serial_sequence(:name, 'id'), :seq)"),
+            {"name": table.name, "seq": last_id}
+        )
+    elif name in ("mysql", "mariadb"):
+        connection.execute(text(f"ALTER TABLE {table.name} AUTO_INCREMENT = {int(last_id) + 1}"))
+    else:
+        return False
+    return True
@@ -0,0 +1,31 @@
+"""
+ساخت جداول دیتابیس و پر کردن جداول مشتق شده (یک بار، قبل از بالا آمدن workerها)
+
+اجرا:
+    python -m src.database.init_db
+"""
+from src.database.database import Database
+from src.database.managers import FavoriteManager, StatsManager
+from src.timing import phase, report
+
+
+def main():
+    db = Database()
+    with phase("db:create_tables"):
+        db.create_tables()
+
+    with phase("db:favorite_counters"):
+        FavoriteManager(db).reconcile_counters()
+
+    with phase("db:partitions"):
+        db.partitions.maintain()
+
+    with phase("db:stat_counters"):
+        StatsManager(db).reconcile()
+
+    for item in report()["phases"]:
+        print(f"{item['name']}: {item['ms']}ms")
+
+
+if __name__ == "__main__":
+    main()
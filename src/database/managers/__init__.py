@@ -6,6 +6,12 @@ from .organizer_manager import OrganizerManager
 from .favorite_manager import FavoriteManager
 from .view_manager import ViewManager
 from .product_manager import ProductManager
+from .blob_manager import BlobManager
+from .recommendation_manager import RecommendationManager
+from .tracking_manager import TrackingManager
+from .analytics_manager import AnalyticsManager
+from .stats_manager import StatsManager
+from .import_manager import ImportManager
 __all__ = [
     'ManagerBase',
     'UserManager',
@@ -17,4 +23,10 @@ __all__ = [
     'OrganizerManager',
     'FavoriteManager',
     'ViewManager',
+    'BlobManager',
+    'RecommendationManager',
+    'TrackingManager',
+    'AnalyticsManager',
+    'StatsManager',
+    'ImportManager',
 ]
\ No newline at end of file
@@ -0,0 +1,388 @@
+from .base import ManagerBase
+import os
+from datetime import datetime, timedelta
+from collections import Counter
+from sqlalchemy import select, delete, func
+
+from src.database import dialect
+from src.database.database import Base, file_lock
+from src.database.partitions import PARTITIONED_TABLES, retry_dropped, seed_job
+from src.database.models import (
+    JobWatermark, UserFavorite, ExpoCompany, Product,
+    ExhibitionDailyStat, ExpoCompanyStat,
+    ViewTargetEnum, FavoriteTypeEnum,
+)
+
+ANALYTICS_LOCK_FILE = os.getenv("ANALYTICS_LOCK_FILE", ".run/analytics_export.lock")
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", 50000))
+AGGREGATES_LOCK_FILE = os.getenv("AGGREGATES_LOCK_FILE", ".run/analytics_aggregates.lock")
+
+LOOKUP_BATCH_SIZE = 500
+
+# ستون‌های خوانده شده برای آمار تجمیعی
+VIEW_COLUMNS = ("id", "target_type", "target_id", "viewed_at")
+FAVORITE_COLUMNS = ("id", "favorite_type", "target_id", "created_at")
+
+# رکوردهای جوان‌تر از این فاصله در اجرای بعدی خوانده می‌شوند؛ id تراکنشی که هنوز
+# commit نشده ممکن است از id رکوردهای commit شده کوچک‌تر باشد (postgresql)
+EXPORT_LAG = timedelta(seconds=int(os.getenv("ANALYTICS_EXPORT_LAG", 60)))
+
+# dataset -> (جدول منطقی، ستون‌ها)
+EXPORT_SOURCES = {
+    "views": ("user_views", ("id", "user_id", "target_type", "target_id", "viewed_at")),
+    "favorites": (UserFavorite.__tablename__, ("id", "user_id", "favorite_type", "target_id", "created_at")),
+    "page_views": ("tracking_page_views", ("id", "session_id", "page_url", "viewed_at")),
+}
+
+
+class _DefaultDict(dict):
+    """مثل defaultdict ولی factory کلید را می‌گیرد"""
+
+    def __init__(self, factory):
+        super().__init__()
+        self._factory = factory
+
+    def __missing__(self, key):
+        value = self[key] = self._factory(key)
+        return value
+
+
+class AnalyticsManager(ManagerBase):
+    """
+    پردازش افزایشی جداول رویداد با watermark:
+    - خروجی Parquet (src.analytics.store) برای گزارش‌هایی که به دیتابیس اصلی query نمی‌زنند
+    - آمار روزانه‌ی تجمیعی نمایشگاه‌ها و غرفه‌ها برای داشبورد برگزارکننده
+    """
+
+    def get_watermark(self, job):
+        session = self.get_session()
+        position = session.query(JobWatermark.position).filter(JobWatermark.job == job).scalar()
+        session.close()
+        return position or 0
+
+    def set_watermark(self, session, job, position):
+        """commit بر عهده‌ی فراخواننده است"""
+        now = datetime.utcnow()
+
+        if dialect.supports_on_conflict(session):
+            session.execute(dialect.insert(session, JobWatermark).values(
+                job=job, position=position, created_at=now, updated_at=now
+            ).on_conflict_do_update(
+                index_elements=["job"],
+                set_={"position": position, "updated_at": now}
+            ))
+            return
+
+        updated = session.query(JobWatermark).filter(JobWatermark.job == job).update(
+            {JobWatermark.position: position, JobWatermark.updated_at: now},
+            synchronize_session=False
+        )
+        if not updated:
+            session.add(JobWatermark(job=job, position=position))
+
+    def watermarks(self):
+        session = self.get_session()
+        rows = session.query(JobWatermark.job, JobWatermark.position, JobWatermark.updated_at).filter(
+            JobWatermark.job.like("analytics:%")
+        ).all()
+        session.close()
+        return {job: {"position": position, "updated_at": updated_at} for job, position, updated_at in rows}
+
+    @retry_dropped
+    def export(self, batch_size=ANALYTICS_BATCH_SIZE):
+        """
+        خروجی رکوردهای جدید همه‌ی datasetها از آخرین watermark.
+        در هر لحظه فقط یک process اجرا می‌کند.
+
+        Returns:
+            dict | None: dataset -> تعداد رکورد، یا None اگر اجرای دیگری در جریان باشد
+        """
+        with file_lock(ANALYTICS_LOCK_FILE, blocking=False) as acquired:
+            if not acquired:
+                return None
+
+            result = {}
+            for dataset, (base, columns) in EXPORT_SOURCES.items():
+                result[dataset] = sum(
+                    self._export_table(dataset, table, columns, batch_size)
+                    for table in self._source_tables(base)
+                )
+
+            self._export_dimensions()
+            return result
+
+    def _source_tables(self, base):
+        """
+        جداول فیزیکی یک جدول منطقی؛ با پارتیشن‌بندی ماهانه هر پارتیشن watermark جدا دارد
+        و جدول اصلی (ردیف‌های هنوز migrate نشده) با همان watermark قبلی ادامه پیدا می‌کند.
+        """
+        partitions = self.db.partitions
+        if base not in PARTITIONED_TABLES or not partitions.enabled:
+            return [Base.metadata.tables[base]]
+        return partitions.tables(base)
+
+    def _start_position(self, job, table):
+        """
+        watermark جدول؛ در پارتیشن، idهای تا seed ردیف‌هایی هستند که migrate از جدول اصلی
+        (بعد از پردازش شدن همان‌جا) منتقل کرده و دوباره خوانده نمی‌شوند.
+        """
+        return max(self.get_watermark(job), self.get_watermark(seed_job(table.name)))
+
+    def legacy_processed_upto(self, base):
+        """
+        بزرگ‌ترین id جدول اصلی که همه‌ی کارهای افزایشیِ اجرا شده پردازش کرده‌اند
+        (سقف migrate_legacy)؛ None اگر هیچ کاری روی این جدول اجرا نشده باشد.
+        """
+        jobs = [f"{prefix}:{base}" for prefix in ("analytics", "aggregates")]
+        session = self.get_session()
+        positions = session.query(JobWatermark.position).filter(JobWatermark.job.in_(jobs)).all()
+        session.close()
+        return min(position for (position,) in positions) if positions else None
+
+    def _read_batch(self, session, table, columns, position, batch_size, cutoff):
+        """
+        رکوردهای بعد از watermark به ترتیب id؛ روی اولین رکورد جوان‌تر از cutoff
+        متوقف می‌شود تا watermark از روی آن عبور نکند.
+        """
+        rows = session.execute(
+            select(*columns, table.c.created_at)
+            .where(table.c.id > position)
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+
+        batch = []
+        for row in rows:
+            if row.created_at >= cutoff:
+                break
+            batch.append(row)
+        return batch
+
+    def _export_table(self, dataset, table, columns, batch_size):
+        from src.analytics import store
+
+        job = f"analytics:{table.name}"
+        position = self._start_position(job, table)
+        cutoff = datetime.utcnow() - EXPORT_LAG
+        selected = [table.c[name] for name in columns]
+        exported = 0
+
+        while True:
+            session = self.get_session()
+            try:
+                batch = []
+                for row in self._read_batch(session, table, selected, position, batch_size, cutoff):
+                    values = dict(zip(columns, row))
+                    for name, value in values.items():
+                        if hasattr(value, "value"):
+                            values[name] = value.value
+                    batch.append(values)
+
+                if not batch:
+                    return exported
+
+                store.write_batch(dataset, table.name, batch)
+                position = batch[-1]["id"]
+                self.set_watermark(session, job, position)
+                session.commit()
+                exported += len(batch)
+            finally:
+                session.close()
+
+            if len(batch) < batch_size:
+                return exported
+
+    def _export_dimensions(self):
+        """جداول کوچک مورد نیاز گزارش‌ها (غرفه‌ها، محصول -> شرکت) به صورت snapshot کامل"""
+        from src.analytics import store
+
+        session = self.get_session()
+        try:
+            expo_companies = [
+                dict(row._mapping) for row in session.execute(select(
+                    ExpoCompany.exhibition_id, ExpoCompany.company_id,
+                    ExpoCompany.booth_number, ExpoCompany.hall_name
+                ))
+            ]
+            products = [dict(row._mapping) for row in session.execute(select(Product.id, Product.company_id))]
+        finally:
+            session.close()
+
+        store.write_dimension("expo_companies", expo_companies)
+        store.write_dimension("products", products)
+
+    # -------------------- aggregates --------------------
+    @retry_dropped
+    def refresh_aggregates(self, full=False, batch_size=ANALYTICS_BATCH_SIZE):
+        """
+        به‌روزرسانی افزایشی exhibition_daily_stats و expo_company_stats از
+        رکوردهای جدید user_views و user_favorites. هر دسته (افزایش شمارنده‌ها + watermark)
+        در یک transaction نوشته می‌شود.
+
+        بازدید شرکت یا محصولاتش برای همه‌ی نمایشگاه‌هایی که شرکت در آن‌ها غرفه دارد حساب می‌شود.
+
+        Args:
+            full (bool): پاک کردن آمار و ساخت دوباره از ابتدا
+                (مثلاً بعد از اضافه شدن شرکت به نمایشگاه برای بازدیدهای قبلی)
+
+        Returns:
+            dict | None: تعداد رکوردهای پردازش شده، یا None اگر اجرای دیگری در جریان باشد
+        """
+        with file_lock(AGGREGATES_LOCK_FILE, blocking=False) as acquired:
+            if not acquired:
+                return None
+
+            if full:
+                self._clear_aggregates()
+
+            views = sum(
+                self._aggregate_table(table, VIEW_COLUMNS, batch_size, self._view_increments)
+                for table in self._source_tables("user_views")
+            )
+            favorites = self._aggregate_table(
+                UserFavorite.__table__, FAVORITE_COLUMNS, batch_size, self._favorite_increments
+            )
+            return {"views": views, "favorites": favorites}
+
+    def _clear_aggregates(self):
+        session = self.get_session()
+        try:
+            session.execute(delete(ExhibitionDailyStat))
+            session.execute(delete(ExpoCompanyStat))
+            session.execute(delete(JobWatermark).where(JobWatermark.job.like("aggregates:%")))
+            session.commit()
+        finally:
+            session.close()
+
+    def aggregates_refreshed_at(self):
+        session = self.get_session()
+        value = session.query(func.max(JobWatermark.updated_at)).filter(
+            JobWatermark.job.like("aggregates:%")
+        ).scalar()
+        session.close()
+        return value
+
+    def _aggregate_table(self, table, columns, batch_size, increments):
+        job = f"aggregates:{table.name}"
+        position = self._start_position(job, table)
+        cutoff = datetime.utcnow() - EXPORT_LAG
+        processed = 0
+
+        while True:
+            session = self.get_session()
+            try:
+                selected = [table.c[name] for name in columns]
+                batch = self._read_batch(session, table, selected, position, batch_size, cutoff)
+                if not batch:
+                    return processed
+
+                exhibition_rows, booth_rows = increments(session, batch)
+                dialect.increment(session, ExhibitionDailyStat, ("exhibition_id", "day"), exhibition_rows)
+                dialect.increment(session, ExpoCompanyStat, ("exhibition_id", "company_id"), booth_rows)
+
+                position = batch[-1].id
+                self.set_watermark(session, job, position)
+                session.commit()
+                processed += len(batch)
+            except Exception as e:
+                session.rollback()
+                raise e
+            finally:
+                session.close()
+
+            if len(batch) < batch_size:
+                return processed
+
+    def _booths_of(self, session, company_ids):
+        """company_id -> مجموعه‌ی exhibition_idهایی که شرکت در آن‌ها غرفه دارد"""
+        booths = {}
+        company_ids = sorted(company_ids)
+        for start in range(0, len(company_ids), LOOKUP_BATCH_SIZE):
+            for exhibition_id, company_id in session.execute(
+                select(ExpoCompany.exhibition_id, ExpoCompany.company_id).where(
+                    ExpoCompany.company_id.in_(company_ids[start:start + LOOKUP_BATCH_SIZE])
+                )
+            ):
+                booths.setdefault(company_id, set()).add(exhibition_id)
+        return booths
+
+    def _product_companies(self, session, product_ids):
+        owners = {}
+        product_ids = sorted(product_ids)
+        for start in range(0, len(product_ids), LOOKUP_BATCH_SIZE):
+            owners.update(session.execute(
+                select(Product.id, Product.company_id).where(
+                    Product.id.in_(product_ids[start:start + LOOKUP_BATCH_SIZE])
+                )
+            ).all())
+        return owners
+
+    def _booth_increments(self, session, counters, exhibition_rows):
+        """
+        توزیع شمارنده‌های (company_id, day) روی غرفه‌های شرکت.
+
+        Args:
+            counters: ستون ExpoCompanyStat -> Counter[(company_id, day)]
+            exhibition_rows: ردیف‌های ExhibitionDailyStat که جمع غرفه‌ها به آن‌ها اضافه می‌شود
+
+        Returns:
+            list: ردیف‌های ExpoCompanyStat
+        """
+        company_ids = {company_id for counter in counters.values() for company_id, _day in counter}
+        booths = self._booths_of(session, company_ids)
+
+        booth_rows = {}
+        for column, counter in counters.items():
+            daily_column = "booth_favorites" if column == "favorites" else "booth_views"
+            for (company_id, day), count in counter.items():
+                for exhibition_id in booths.get(company_id, ()):
+                    row = booth_rows.setdefault((exhibition_id, company_id), {
+                        "exhibition_id": exhibition_id, "company_id": company_id,
+                        "company_views": 0, "product_views": 0, "favorites": 0,
+                    })
+                    row[column] += count
+                    exhibition_rows[(exhibition_id, day)][daily_column] += count
+        return list(booth_rows.values())
+
+    def _exhibition_rows(self):
+        return _DefaultDict(lambda key: {
+            "exhibition_id": key[0], "day": key[1],
+            "views": 0, "favorites": 0, "booth_views": 0, "booth_favorites": 0,
+        })
+
+    def _view_increments(self, session, batch):
+        exhibition_rows = self._exhibition_rows()
+        company_views = Counter()
+        product_views = Counter()
+        for _id, target_type, target_id, viewed_at, *_ in batch:
+            day = viewed_at.date()
+            if target_type == ViewTargetEnum.exhibition:
+                exhibition_rows[(target_id, day)]["views"] += 1
+            elif target_type == ViewTargetEnum.company:
+                company_views[(target_id, day)] += 1
+            elif target_type == ViewTargetEnum.product:
+                product_views[(target_id, day)] += 1
+
+        owners = self._product_companies(session, {product_id for product_id, _day in product_views})
+        owner_views = Counter()
+        for (product_id, day), count in product_views.items():
+            if product_id in owners:
+                owner_views[(owners[product_id], day)] += count
+
+        booth_rows = self._booth_increments(
+            session, {"company_views": company_views, "product_views": owner_views}, exhibition_rows
+        )
+        return list(exhibition_rows.values()), booth_rows
+
+    def _favorite_increments(self, session, batch):
+        exhibition_rows = self._exhibition_rows()
+        company_favorites = Counter()
+        for _id, favorite_type, target_id, created_at, *_ in batch:
+            day = created_at.date()
+            if favorite_type == FavoriteTypeEnum.exhibition:
+                exhibition_rows[(target_id, day)]["favorites"] += 1
+            elif favorite_type == FavoriteTypeEnum.company:
+                company_favorites[(target_id, day)] += 1
+
+        booth_rows = self._booth_increments(session, {"favorites": company_favorites}, exhibition_rows)
+        return list(exhibition_rows.values()), booth_rows
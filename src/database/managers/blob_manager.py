@@ -0,0 +1,198 @@
+from .base import ManagerBase
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from src.database.models import (
+    StoredBlob,
+    CompanyBrochure, CompanyVideo,
+    ProductImage, ProductBrochure,
+    VerificationDocument,
+)
+from src.storage import blob_store, derivatives
+
+# ستون‌هایی که به فایل‌های content-addressed اشاره می‌کنند
+BLOB_REFERENCES = [
+    (CompanyBrochure, "file_url"),
+    (CompanyVideo, "video_url"),
+    (ProductImage, "url"),
+    (ProductBrochure, "url"),
+    (VerificationDocument, "file_url"),
+]
+
+# فایلی که تازه ذخیره شده ولی رکوردش هنوز ساخته نشده نباید پاک شود
+GC_GRACE_PERIOD = timedelta(minutes=30)
+
+
+def acquire_blob(session, content: bytes, filename: str = "") -> str:
+    """
+    ذخیره‌ی محتوا در blob store و افزایش شمارنده‌ی ارجاع، داخل session داده شده.
+    commit بر عهده‌ی فراخواننده است.
+
+    Returns:
+        str: مسیر فایل (همان مقداری که در ستون url ذخیره می‌شود)
+    """
+    sha256 = blob_store.content_hash(content)
+
+    blob = session.query(StoredBlob).filter(StoredBlob.sha256 == sha256).first()
+    if blob:
+        blob.ref_count += 1
+        return blob.path
+
+    path = blob_store.blob_path(sha256, blob_store.normalize_ext(filename))
+    blob_store.write_blob(path, content)
+
+    try:
+        # savepoint برای آپلود همزمان همان محتوا از دو worker
+        with session.begin_nested():
+            session.add(StoredBlob(sha256=sha256, path=path, size=len(content), ref_count=1))
+    except IntegrityError:
+        blob = session.query(StoredBlob).filter(StoredBlob.sha256 == sha256).one()
+        blob.ref_count += 1
+        return blob.path
+
+    return path
+
+
+def release_blob(session, url) -> bool:
+    """
+    کاهش شمارنده‌ی ارجاع یک فایل داخل session داده شده.
+    فایل‌های قدیمی (خارج از blob store) نادیده گرفته می‌شوند.
+    """
+    if not url:
+        return False
+
+    updated = session.query(StoredBlob).filter(
+        StoredBlob.path == url,
+        StoredBlob.ref_count > 0
+    ).update(
+        {StoredBlob.ref_count: StoredBlob.ref_count - 1},
+        synchronize_session=False
+    )
+    return updated > 0
+
+
+class BlobManager(ManagerBase):
+    def store(self, content: bytes, filename: str = "") -> str:
+        session = self.get_session()
+        try:
+            path = acquire_blob(session, content, filename)
+            session.commit()
+            return path
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            session.close()
+
+    def release(self, url) -> bool:
+        session = self.get_session()
+        try:
+            released = release_blob(session, url)
+            session.commit()
+            return released
+        finally:
+            session.close()
+
+    def get_by_path(self, path):
+        session = self.get_session()
+        blob = session.query(StoredBlob).filter(StoredBlob.path == path).first()
+        session.close()
+        return blob
+
+    def reconcile_ref_counts(self) -> int:
+        """
+        محاسبه‌ی مجدد شمارنده‌ها از روی ستون‌های ارجاع‌دهنده.
+        اختلاف‌ها (مثلاً حذف cascade محصول یا خطا بین ذخیره‌ی فایل و رکورد) را اصلاح می‌کند.
+
+        Returns:
+            int: تعداد blobهایی که شمارنده‌شان اصلاح شد
+        """
+        session = self.get_session()
+        try:
+            actual = {}
+            for model, attr in BLOB_REFERENCES:
+                column = getattr(model, attr)
+                rows = (
+                    session.query(column, func.count())
+                    .filter(column.like(f"{blob_store.BLOB_DIR}/%"))
+                    .group_by(column)
+                    .all()
+                )
+                for path, count in rows:
+                    actual[path] = actual.get(path, 0) + count
+
+            fixed = 0
+            for blob in session.query(StoredBlob).all():
+                expected = actual.get(blob.path, 0)
+                if blob.ref_count != expected:
+                    blob.ref_count = expected
+                    fixed += 1
+
+            session.commit()
+            return fixed
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            session.close()
+
+    def collect_garbage(self, reconcile=True, grace_period=GC_GRACE_PERIOD) -> dict:
+        """
+        پاک کردن blobهای بدون ارجاع و فایل‌های یتیم روی دیسک.
+
+        Args:
+            reconcile (bool): قبل از پاکسازی شمارنده‌ها دوباره محاسبه شوند
+            grace_period (timedelta): blobهای جدیدتر از این مدت پاک نمی‌شوند
+        """
+        fixed = self.reconcile_ref_counts() if reconcile else 0
+        cutoff = datetime.utcnow() - grace_period
+
+        session = self.get_session()
+        try:
+            unreferenced = session.query(
+                StoredBlob.id, StoredBlob.path, StoredBlob.size
+            ).filter(
+                StoredBlob.ref_count <= 0,
+                StoredBlob.updated_at < cutoff
+            ).all()
+
+            deleted = 0
+            freed_bytes = 0
+            for blob_id, path, size in unreferenced:
+                # شرط ref_count دوباره چک می‌شود تا آپلود همزمان از دست نرود
+                removed = session.query(StoredBlob).filter(
+                    StoredBlob.id == blob_id,
+                    StoredBlob.ref_count <= 0
+                ).delete(synchronize_session=False)
+                session.commit()
+
+                if removed:
+                    blob_store.remove_blob_file(path)
+                    for suffix in blob_store.COMPRESSED_SUFFIXES:
+                        blob_store.remove_blob_file(path + suffix)
+                    for variant in derivatives.VARIANTS:
+                        blob_store.remove_blob_file(derivatives.derivative_path(path, variant))
+                    deleted += 1
+                    freed_bytes += size
+
+            known = {path for (path,) in session.query(StoredBlob.path).all()}
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            session.close()
+
+        orphans = 0
+        for path in blob_store.iter_blob_files():
+            if blob_store.source_path(path) in known or blob_store.modified_at(path) >= cutoff:
+                continue
+            if blob_store.remove_blob_file(path):
+                orphans += 1
+
+        return {
+            "reconciled": fixed,
+            "deleted_blobs": deleted,
+            "deleted_orphan_files": orphans,
+            "freed_bytes": freed_bytes,
+        }
@@ -1,4 +1,5 @@
 from .base import ManagerBase
+from .blob_manager import release_blob
 from sqlalchemy.orm import selectinload
 
 from src.database.models import (
@@ -17,38 +18,40 @@ class CompanyManager(ManagerBase):
         return self.save(session, company)
 
     def get_by_id(self, company_id):
+        # همه‌ی روابطی که serialize_company می‌خواند از قبل load می‌شوند تا session بسته شود
         session = self.get_session()
-        return (
+        company = (
             session.query(CompanyProfile)
-            .options(
-                selectinload(CompanyProfile.websites),
-                selectinload(CompanyProfile.addresses),
-                selectinload(CompanyProfile.phones),
-                selectinload(CompanyProfile.tags),
-                selectinload(CompanyProfile.videos),
-                selectinload(CompanyProfile.brochures),
-                selectinload(CompanyProfile.knowledge_files),
-            )
+            .options(*self._detail_options())
             .filter(CompanyProfile.id == company_id)
             .first()
         )
+        session.close()
+        return company
 
     def get_by_user_id(self, user_id: int):
         session = self.get_session()
-        return (
+        company = (
             session.query(CompanyProfile)
-            .options(
-                selectinload(CompanyProfile.websites),
-                selectinload(CompanyProfile.addresses),
-                selectinload(CompanyProfile.phones),
-                selectinload(CompanyProfile.videos),
-                selectinload(CompanyProfile.brochures),
-                selectinload(CompanyProfile.knowledge_files),
-            )
+            .options(*self._detail_options())
             .filter(CompanyProfile.user_id == user_id)
             .first()
         )
-        tags = self.list_tags()
+        session.close()
+        return company
+
+    @staticmethod
+    def _detail_options():
+        return (
+            selectinload(CompanyProfile.websites),
+            selectinload(CompanyProfile.addresses),
+            selectinload(CompanyProfile.phones),
+            selectinload(CompanyProfile.tags),
+            selectinload(CompanyProfile.videos),
+            selectinload(CompanyProfile.brochures),
+            selectinload(CompanyProfile.knowledge_files),
+            selectinload(CompanyProfile.documents),
+        )
 
     def update(self, company_id, **kwargs):
         session = self.get_session()
@@ -66,6 +69,24 @@ class CompanyManager(ManagerBase):
 
         return self.save(session, company, add=False)
 
+    def set_logo_derivatives(self, company_id, logo, thumbnail=None, medium=None, webp=None):
+        """
+        ذخیره‌ی مسیر نسخه‌های کوچک لوگو.
+        اگر لوگو در این فاصله عوض شده باشد، نتیجه‌ی قدیمی نادیده گرفته می‌شود.
+        """
+        session = self.get_session()
+        updated = session.query(CompanyProfile).filter(
+            CompanyProfile.id == company_id,
+            CompanyProfile.logo == logo
+        ).update({
+            "logo_thumbnail": thumbnail,
+            "logo_medium": medium,
+            "logo_webp": webp,
+        })
+        session.commit()
+        session.close()
+        return updated > 0
+
     def get_pending_companies(self):
         session = self.get_session()
         return session.query(CompanyProfile).filter(
@@ -83,13 +104,17 @@ class CompanyManager(ManagerBase):
         item = model(company_id=company_id, **kwargs)
         return self.save(session, item)
 
-    def delete_child(self, model, item_id):
+    def delete_child(self, model, item_id, blob_attr=None):
         session = self.get_session()
         item = session.query(model).filter(model.id == item_id).first()
         print(item)
         if not item:
             raise ValueError(f"Item with id {item_id} does not exist")
 
+        # آزاد کردن ارجاع فایل در همان تراکنش حذف
+        if blob_attr:
+            release_blob(session, getattr(item, blob_attr))
+
         session.delete(item)
         session.commit()
         return True
@@ -212,7 +237,7 @@ class CompanyManager(ManagerBase):
 
 
     def delete_video(self, video_id):
-        return self.delete_child(CompanyVideo, video_id)
+        return self.delete_child(CompanyVideo, video_id, blob_attr="video_url")
 
     def list_videos(self, company_id):
         return self.get_child_list(CompanyVideo, company_id)
@@ -221,7 +246,7 @@ class CompanyManager(ManagerBase):
         return self.add_child(CompanyBrochure, company_id, title=title, orginal_name=orginal_name, file_url=file_url)
 
     def delete_brochure(self, brochure_id):
-        return self.delete_child(CompanyBrochure, brochure_id)
+        return self.delete_child(CompanyBrochure, brochure_id, blob_attr="file_url")
 
     def list_brochures(self, company_id):
         return self.get_child_list(CompanyBrochure, company_id)
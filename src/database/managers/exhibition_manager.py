@@ -1,13 +1,14 @@
 from .base import ManagerBase
+from .blob_manager import acquire_blob
 from src.database.models import (
     Exhibition, ExhibitionTag, ExhibitionMedia, 
     ExpoCompany, ExpoStatusEnum, VipLevelEnum,
     VerificationDocument, CompanyProfile
 )
-from sqlalchemy import or_, and_
+from src.database.read_models import ExhibitionRow, read_columns, to_read_models
+from sqlalchemy import or_, and_, select
 from sqlalchemy.orm import joinedload
 from datetime import datetime
-import os
 
 class ExhibitionManager(ManagerBase):
     def create(self, organizer_id, **kwargs):
@@ -17,17 +18,19 @@ class ExhibitionManager(ManagerBase):
     
     def get_by_id(self, exhibition_id):
         session = self.get_session()
-        exhibition = session.query(Exhibition).filter(Exhibition.id == exhibition_id).first()
+        row = session.query(*read_columns(ExhibitionRow, Exhibition)).filter(
+            Exhibition.id == exhibition_id
+        ).first()
         session.close()
-        return exhibition
+        return ExhibitionRow(*row) if row else None
 
     def get_by_organizer(self, organizer_id):
         session = self.get_session()
-        exhibitions = session.query(Exhibition).filter(
+        exhibitions = session.query(*read_columns(ExhibitionRow, Exhibition)).filter(
             Exhibition.organizer_id == organizer_id
         ).all()
         session.close()
-        return exhibitions
+        return to_read_models(ExhibitionRow, exhibitions)
 
     def update(self, exhibition_id: int, **kwargs):
         """
@@ -102,9 +105,7 @@ class ExhibitionManager(ManagerBase):
         media = ExhibitionMedia(exhibition_id=exhibition_id, media_url=media_url)
         return self.save(session, media)
 
-    def search(self, query=None, category=None, year=None, status=None):
-        session = self.get_session()
-        q = session.query(Exhibition)
+    def _filter_search(self, q, query=None, category=None, year=None, status=None):
         if query and not None:
             q = q.filter(
                 or_(
@@ -126,9 +127,33 @@ class ExhibitionManager(ManagerBase):
             except ValueError:
                 pass
 
-        exhibitions = q.all()
+        return q
+
+    def search(self, query=None, category=None, year=None, status=None):
+        """
+        Returns:
+            list[ExhibitionRow]: فقط ستون‌ها، بدون نمونه‌ی ORM
+        """
+        session = self.get_session()
+        q = session.query(*read_columns(ExhibitionRow, Exhibition))
+        q = self._filter_search(q, query, category, year, status)
+        exhibitions = to_read_models(ExhibitionRow, q.all())
         session.close()
         return exhibitions
+
+    def iter_search(self, query=None, category=None, year=None, status=None, batch_size=500):
+        """
+        نسخه‌ی generator از search برای خروجی stream؛ رکوردها دسته‌ای از cursor خوانده می‌شوند.
+        """
+        session = self.get_session()
+        try:
+            stmt = select(*read_columns(ExhibitionRow, Exhibition))
+            stmt = self._filter_search(stmt, query, category, year, status)
+            stmt = stmt.order_by(Exhibition.id).execution_options(yield_per=batch_size)
+            for row in session.execute(stmt):
+                yield ExhibitionRow(*row)
+        finally:
+            session.close()
     
     def list_exhibition_years(self):
         session = self.get_session()
@@ -248,25 +273,43 @@ class ExpoCompanyManager(ManagerBase):
                 ExpoCompany.exhibition_id == exhibition_id
             ).all()
 
-            result = []
-            for expo_company in companies:
-                company = expo_company.company
-                result.append({
-                    "id": expo_company.id,
-                    "company_id": company.id,
-                    "name": company.company_name,
-                    "logo": company.logo or "/static/default-logo-exhibition.jpg",
-                    "description": company.description,
-                    "category": company.industry_category,
-                    "quick_intro_video": None,
-                    "booth_number": expo_company.booth_number,
-                    "hall_name": expo_company.hall_name,
-                    "vip_level": expo_company.vip_level.value if expo_company.vip_level else "normal"
-                })
-
-            return result
+            return [self._company_details(expo_company, expo_company.company) for expo_company in companies]
         finally:
             session.close()
+
+    def iter_companies_with_details(self, exhibition_id, batch_size=500):
+        """
+        نسخه‌ی generator از list_companies_with_details برای خروجی stream.
+        """
+        session = self.get_session()
+        try:
+            stmt = select(ExpoCompany, CompanyProfile).join(
+                CompanyProfile, ExpoCompany.company_id == CompanyProfile.id
+            ).filter(
+                ExpoCompany.exhibition_id == exhibition_id
+            ).order_by(ExpoCompany.id).execution_options(yield_per=batch_size)
+
+            for expo_company, company in session.execute(stmt):
+                yield self._company_details(expo_company, company)
+        finally:
+            session.close()
+
+    @staticmethod
+    def _company_details(expo_company, company):
+        return {
+            "id": expo_company.id,
+            "company_id": company.id,
+            "name": company.company_name,
+            # در لیست، کوچک‌ترین نسخه‌ی لوگو کافی است
+            "logo": company.logo_thumbnail or company.logo or "/static/default-logo-exhibition.jpg",
+            "logo_webp": company.logo_webp,
+            "description": company.description,
+            "category": company.industry_category,
+            "quick_intro_video": None,
+            "booth_number": expo_company.booth_number,
+            "hall_name": expo_company.hall_name,
+            "vip_level": expo_company.vip_level.value if expo_company.vip_level else "normal"
+        }
     
 class VerificationManager(ManagerBase):
     
@@ -279,18 +322,12 @@ class VerificationManager(ManagerBase):
         """
         session = self.get_session()
         try:
-            # پوشه ذخیره فایل
-            upload_dir = "uploads/verification_docs"
-            os.makedirs(upload_dir, exist_ok=True)
-
-            # ساخت نام یکتا برای فایل
-            timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-            filename = f"{user_id}_{timestamp}_{uploaded_file.filename}"
-            file_path = os.path.join(upload_dir, filename)
-
-            # نوشتن فایل روی دیسک
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.file.read())  # اگر از FastAPI UploadFile است
+            # ذخیره در blob store (فایل‌های تکراری یک بار ذخیره می‌شوند)
+            file_path = acquire_blob(
+                session,
+                uploaded_file.file.read(),  # اگر از FastAPI UploadFile است
+                uploaded_file.filename
+            )
 
             # ساخت رکورد در دیتابیس
             verification_doc = VerificationDocument(
@@ -1,60 +1,336 @@
 from .base import ManagerBase
-from src.database.models import UserFavorite, FavoriteTypeEnum
+import os
+from datetime import datetime
+from sqlalchemy import func, delete, select, and_, exists, union_all
+from sqlalchemy.exc import IntegrityError
+from src.database import dialect
+from src.database.database import file_lock
+from src.database.models import UserFavorite, FavoriteCounter, FavoriteTypeEnum
+from src.database.read_models import FavoriteRow, read_columns, to_read_models
+
+# تطبیق شمارنده‌ها در هر لحظه فقط در یک process
+FAVORITE_RECONCILE_LOCK_FILE = os.getenv("FAVORITE_RECONCILE_LOCK_FILE", ".run/favorite_counters.lock")
+
+
+def bump_favorite_counter(session, favorite_type, target_id, delta):
+    """
+    تغییر شمارنده‌ی علاقه‌مندی یک target داخل session داده شده (همان transaction ثبت/حذف).
+    commit بر عهده‌ی فراخواننده است.
+    """
+    now = datetime.utcnow()
+
+    if dialect.supports_on_conflict(session):
+        stmt = dialect.insert(session, FavoriteCounter).values(
+            favorite_type=favorite_type,
+            target_id=target_id,
+            count=max(delta, 0)
+        ).on_conflict_do_update(
+            index_elements=["favorite_type", "target_id"],
+            set_={"count": FavoriteCounter.count + delta, "updated_at": now}
+        )
+        session.execute(stmt)
+        return
+
+    updated = session.query(FavoriteCounter).filter(
+        FavoriteCounter.favorite_type == favorite_type,
+        FavoriteCounter.target_id == target_id
+    ).update(
+        {FavoriteCounter.count: FavoriteCounter.count + delta, FavoriteCounter.updated_at: now},
+        synchronize_session=False
+    )
+    if not updated:
+        session.add(FavoriteCounter(favorite_type=favorite_type, target_id=target_id, count=max(delta, 0)))
+
 
 class FavoriteManager(ManagerBase):
-    def add_favorite(self, user_id, favorite_type, target_id):
-        session = self.get_session()
-        
-        existing = session.query(UserFavorite).filter(
+    def _single_statement(self, session) -> bool:
+        return dialect.supports_on_conflict(session) and dialect.supports_returning(session)
+
+    def _insert_favorites(self, session, user_id, items):
+        """
+        INSERT ... ON CONFLICT DO NOTHING RETURNING؛ فقط رکوردهایی که واقعاً اضافه شدند برگردانده می‌شوند.
+        کلیک تکراری یا همزمان به UniqueConstraint نمی‌خورد.
+        """
+        now = datetime.utcnow()
+        stmt = dialect.insert(session, UserFavorite).values([
+            {
+                "user_id": user_id,
+                "favorite_type": favorite_type,
+                "target_id": target_id,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for favorite_type, target_id in items
+        ]).on_conflict_do_nothing(
+            index_elements=["user_id", "favorite_type", "target_id"]
+        ).returning(*read_columns(FavoriteRow, UserFavorite))
+        return [FavoriteRow(*row) for row in session.execute(stmt)]
+
+    def _delete_favorites(self, session, user_id, favorite_type, target_ids):
+        """
+        DELETE ... RETURNING؛ target_idهایی که واقعاً حذف شدند برگردانده می‌شوند.
+        """
+        stmt = delete(UserFavorite).where(
+            UserFavorite.user_id == user_id,
+            UserFavorite.favorite_type == favorite_type,
+            UserFavorite.target_id.in_(target_ids)
+        ).returning(UserFavorite.target_id).execution_options(synchronize_session=False)
+        return [target_id for (target_id,) in session.execute(stmt)]
+
+    def _get_favorite(self, session, user_id, favorite_type, target_id):
+        row = session.query(*read_columns(FavoriteRow, UserFavorite)).filter(
             UserFavorite.user_id == user_id,
             UserFavorite.favorite_type == favorite_type,
             UserFavorite.target_id == target_id
         ).first()
-        
-        if existing:
+        return FavoriteRow(*row) if row else None
+
+    def add_favorite(self, user_id, favorite_type, target_id):
+        """
+        افزودن علاقه‌مندی به صورت idempotent.
+
+        Returns:
+            FavoriteRow: رکورد جدید یا رکوردی که از قبل وجود داشت
+        """
+        session = self.get_session()
+        try:
+            if self._single_statement(session):
+                inserted = self._insert_favorites(session, user_id, [(favorite_type, target_id)])
+            else:
+                inserted = self._insert_favorites_fallback(session, user_id, [(favorite_type, target_id)])
+
+            if inserted:
+                bump_favorite_counter(session, favorite_type, target_id, 1)
+                session.commit()
+                return inserted[0]
+
+            session.rollback()
+            return self._get_favorite(session, user_id, favorite_type, target_id)
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
             session.close()
-            return existing
-        
-        favorite = UserFavorite(
-            user_id=user_id,
-            favorite_type=favorite_type,
-            target_id=target_id
-        )
-        return self.save(session, favorite)
 
     def remove_favorite(self, user_id, favorite_type, target_id):
         session = self.get_session()
-        favorite = session.query(UserFavorite).filter(
-            UserFavorite.user_id == user_id,
-            UserFavorite.favorite_type == favorite_type,
-            UserFavorite.target_id == target_id
-        ).first()
-        
-        if favorite:
-            session.delete(favorite)
+        try:
+            removed = self._remove(session, user_id, favorite_type, [target_id])
+            if removed:
+                bump_favorite_counter(session, favorite_type, target_id, -1)
             session.commit()
-        
-        session.close()
-        return favorite is not None
+            return bool(removed)
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            session.close()
+
+    def sync_favorites(self, user_id, add=(), remove=()):
+        """
+        اعمال یکجای تغییرات علاقه‌مندی‌های کاربر (مثلاً بعد از آفلاین بودن اپ موبایل)
+        در یک transaction.
+
+        Args:
+            add: لیست (favorite_type, target_id) برای افزودن
+            remove: لیست (favorite_type, target_id) برای حذف
+
+        Returns:
+            dict: {"added": [...], "removed": [...]} فقط تغییراتی که واقعاً اعمال شدند
+        """
+        add = list(dict.fromkeys(add))
+        remove = list(dict.fromkeys(remove))
+
+        session = self.get_session()
+        try:
+            if not add:
+                added = []
+            elif self._single_statement(session):
+                added = [(f.favorite_type, f.target_id) for f in self._insert_favorites(session, user_id, add)]
+            else:
+                added = [(f.favorite_type, f.target_id) for f in self._insert_favorites_fallback(session, user_id, add)]
+
+            by_type = {}
+            for favorite_type, target_id in remove:
+                by_type.setdefault(favorite_type, []).append(target_id)
+
+            removed = []
+            for favorite_type, target_ids in by_type.items():
+                removed += [(favorite_type, target_id) for target_id in self._remove(session, user_id, favorite_type, target_ids)]
+
+            deltas = {}
+            for key in added:
+                deltas[key] = deltas.get(key, 0) + 1
+            for key in removed:
+                deltas[key] = deltas.get(key, 0) - 1
+            for (favorite_type, target_id), delta in deltas.items():
+                if delta:
+                    bump_favorite_counter(session, favorite_type, target_id, delta)
+
+            session.commit()
+            return {"added": added, "removed": removed}
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            session.close()
+
+    def _remove(self, session, user_id, favorite_type, target_ids):
+        if dialect.supports_returning(session):
+            return self._delete_favorites(session, user_id, favorite_type, target_ids)
+
+        existing = [
+            target_id for (target_id,) in session.query(UserFavorite.target_id).filter(
+                UserFavorite.user_id == user_id,
+                UserFavorite.favorite_type == favorite_type,
+                UserFavorite.target_id.in_(target_ids)
+            )
+        ]
+        if existing:
+            session.query(UserFavorite).filter(
+                UserFavorite.user_id == user_id,
+                UserFavorite.favorite_type == favorite_type,
+                UserFavorite.target_id.in_(existing)
+            ).delete(synchronize_session=False)
+        return existing
+
+    def _insert_favorites_fallback(self, session, user_id, items):
+        # برای دیتابیس‌های بدون ON CONFLICT: هر رکورد در یک savepoint
+        inserted = []
+        for favorite_type, target_id in items:
+            try:
+                with session.begin_nested():
+                    favorite = UserFavorite(user_id=user_id, favorite_type=favorite_type, target_id=target_id)
+                    session.add(favorite)
+            except IntegrityError:
+                continue
+            inserted.append(FavoriteRow(
+                favorite.id, favorite.user_id, favorite.favorite_type, favorite.target_id, favorite.created_at
+            ))
+        return inserted
 
     def get_user_favorites(self, user_id, favorite_type=None):
+        """
+        Returns:
+            list[FavoriteRow]: فقط ستون‌ها، بدون نمونه‌ی ORM
+        """
         session = self.get_session()
-        query = session.query(UserFavorite).filter(
+        query = session.query(*read_columns(FavoriteRow, UserFavorite)).filter(
             UserFavorite.user_id == user_id
         )
         
         if favorite_type:
             query = query.filter(UserFavorite.favorite_type == favorite_type)
         
-        favorites = query.all()
+        favorites = to_read_models(FavoriteRow, query.all())
         session.close()
         return favorites
 
     def count_favorites(self, favorite_type, target_id):
+        """
+        خواندن از favorite_counters (یک lookup روی کلید یکتا) به جای COUNT(*)
+        """
         session = self.get_session()
-        count = session.query(UserFavorite).filter(
+        count = session.query(FavoriteCounter.count).filter(
+            FavoriteCounter.favorite_type == favorite_type,
+            FavoriteCounter.target_id == target_id
+        ).scalar()
+        session.close()
+        return count or 0
+
+    def count_favorites_many(self, favorite_type, target_ids):
+        """
+        تعداد علاقه‌مندی‌های چند target با یک کوئری روی favorite_counters.
+
+        Returns:
+            dict: target_id -> count (برای idهای بدون رکورد مقدار 0)
+        """
+        target_ids = set(target_ids)
+        if not target_ids:
+            return {}
+
+        session = self.get_session()
+        rows = session.query(FavoriteCounter.target_id, FavoriteCounter.count).filter(
+            FavoriteCounter.favorite_type == favorite_type,
+            FavoriteCounter.target_id.in_(target_ids)
+        ).all()
+        session.close()
+
+        counts = dict.fromkeys(target_ids, 0)
+        counts.update(rows)
+        return counts
+
+    def favorited_by(self, user_id, favorite_type, target_ids):
+        """
+        کدام یک از targetها توسط کاربر علاقه‌مندی شده‌اند (یک کوئری IN).
+
+        Returns:
+            set: target_idهای علاقه‌مندی شده
+        """
+        target_ids = set(target_ids)
+        if not target_ids or user_id is None:
+            return set()
+
+        session = self.get_session()
+        rows = session.query(UserFavorite.target_id).filter(
+            UserFavorite.user_id == user_id,
             UserFavorite.favorite_type == favorite_type,
-            UserFavorite.target_id == target_id
-        ).count()
+            UserFavorite.target_id.in_(target_ids)
+        ).all()
         session.close()
-        return count
\ No newline at end of file
+        return {target_id for (target_id,) in rows}
+
+
+    def reconcile_counters(self):
+        """
+        تطبیق favorite_counters با user_favorites (منبع اصلی).
+
+        شمارش واقعی و مقدار ذخیره شده در یک statement (یک snapshot) خوانده می‌شوند و فقط
+        اختلاف به شمارنده اضافه می‌شود؛ پس ثبت/حذفی که بعد از آن snapshot commit شده از دست نمی‌رود.
+        در هر لحظه فقط یک process اجرا می‌کند.
+
+        Returns:
+            int | None: تعداد شمارنده‌هایی که اصلاح یا ساخته شدند، یا None اگر اجرای دیگری در جریان باشد
+        """
+        with file_lock(FAVORITE_RECONCILE_LOCK_FILE, blocking=False) as acquired:
+            if not acquired:
+                return None
+
+            favorites = UserFavorite.__table__
+            counters = FavoriteCounter.__table__
+            actual = select(
+                favorites.c.favorite_type, favorites.c.target_id, func.count().label("count")
+            ).group_by(favorites.c.favorite_type, favorites.c.target_id).subquery()
+
+            same_target = and_(
+                counters.c.favorite_type == actual.c.favorite_type,
+                counters.c.target_id == actual.c.target_id,
+            )
+            stored = func.coalesce(counters.c.count, 0)
+            drift = union_all(
+                # targetهایی که علاقه‌مندی دارند
+                select(actual.c.favorite_type, actual.c.target_id, (actual.c.count - stored).label("delta"))
+                .select_from(actual.outerjoin(counters, same_target))
+                .where(actual.c.count != stored),
+                # شمارنده‌هایی که دیگر علاقه‌مندی ندارند
+                select(counters.c.favorite_type, counters.c.target_id, (-counters.c.count).label("delta"))
+                .where(counters.c.count != 0, ~exists().where(
+                    favorites.c.favorite_type == counters.c.favorite_type,
+                    favorites.c.target_id == counters.c.target_id,
+                ))
+            )
+
+            session = self.get_session()
+            try:
+                rows = [
+                    {"favorite_type": favorite_type, "target_id": target_id, "count": delta}
+                    for favorite_type, target_id, delta in session.execute(drift)
+                ]
+                dialect.increment(session, FavoriteCounter, ("favorite_type", "target_id"), rows)
+                session.commit()
+                return len(rows)
+            except Exception as e:
+                session.rollback()
+                raise e
+            finally:
+                session.close()
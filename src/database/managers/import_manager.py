@@ -0,0 +1,482 @@
+from .base import ManagerBase
+from .user_manager import UserManager
+import logging
+import os
+import secrets
+import time
+from datetime import datetime
+from itertools import islice
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.database import dialect, stats
+from src.database.models import (
+    User, CompanyProfile, Exhibition, ExpoCompany, Product, ProductTag, ProductVector,
+    product_tag_association, RoleEnum,
+)
+from src.importer.rows import CompanyRow, BoothRow, ProductRow
+
+logger = logging.getLogger("importer")
+
+# ردیف‌های هر transaction
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+# حداکثر خطای ردیف که در گزارش برگردانده می‌شود (شمارش همه‌ی خطاها ادامه دارد)
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))
+
+_AMBIGUOUS = object()
+
+
+class ImportReport:
+    """شمارش و خطاهای یک import؛ progress بعد از هر batch با as_dict صدا زده می‌شود"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.total = 0
+        self.inserted = 0
+        self.skipped = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors = []
+        self._started = time.perf_counter()
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self):
+        return {
+            "kind": self.kind,
+            "total": self.total,
+            "inserted": self.inserted,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "seconds": round(time.perf_counter() - self._started, 3),
+        }
+
+
+class _Batch:
+    """نتیجه‌ی یک batch که فقط بعد از commit به گزارش اضافه می‌شود"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.skipped = 0
+        self.errors = []
+        self.after_commit = []
+
+    def error(self, line, message):
+        self.errors.append((line, message))
+
+
+def _describe(error: ValidationError) -> str:
+    parts = []
+    for item in error.errors(include_url=False):
+        field = ".".join(str(part) for part in item["loc"]) or "row"
+        parts.append(f"{field}: {item['msg'].removeprefix('Value error, ')}")
+    return "; ".join(parts)
+
+
+def _chunks(items, size):
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def _insert_ids(session, model, rows):
+    """
+    INSERT ... RETURNING id برای همه‌ی rows با یک statement کش شده؛ idها به ترتیب rows هستند.
+    sort_by_parameter_order در postgresql همچنان INSERT چندردیفی (insertmanyvalues) می‌فرستد؛
+    sqlite ستون sentinel ندارد و SQLAlchemy برای هر ردیف یک INSERT (بدون compile دوباره) اجرا می‌کند.
+    """
+    if not rows:
+        return []
+    table = model.__table__
+    return session.connection().execute(
+        insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+
+
+def _insert_all(session, table, rows):
+    """
+    executemany با یک statement کش شده؛ ساختن insert().values([...]) برای هر batch
+    هزینه‌ی compile هر بار را دارد که از خود INSERT بیشتر است.
+    """
+    if rows:
+        session.connection().execute(insert(table), rows)
+
+
+class _CompanyResolver:
+    """
+    نگاشت company_id / ایمیل صاحب شرکت / نام شرکت به id، با یک query برای هر نوع کلید در هر batch.
+    فقط مقادیر commit شده نگه داشته می‌شوند؛ بعد از rollback با clear خالی می‌شود.
+    """
+
+    def __init__(self):
+        self.by_id, self.by_email, self.by_name = {}, {}, {}
+
+    def clear(self):
+        self.by_id.clear()
+        self.by_email.clear()
+        self.by_name.clear()
+
+    def load(self, session, rows):
+        ids = {row.company_id for row in rows if row.company_id is not None} - self.by_id.keys()
+        emails = {row.company_email for row in rows if row.company_email is not None} - self.by_email.keys()
+        names = {row.company_name for row in rows if row.company_name} - self.by_name.keys()
+
+        if ids:
+            found = set(session.execute(select(CompanyProfile.id).where(CompanyProfile.id.in_(ids))).scalars())
+            self.by_id.update({company_id: company_id if company_id in found else None for company_id in ids})
+        if emails:
+            found = dict(session.execute(
+                select(User.email, CompanyProfile.id)
+                .join(CompanyProfile, CompanyProfile.user_id == User.id)
+                .where(User.email.in_(emails))
+            ).all())
+            self.by_email.update({email: found.get(email) for email in emails})
+        if names:
+            self.by_name.update(dict.fromkeys(names))
+            for name, company_id in session.execute(
+                select(CompanyProfile.company_name, CompanyProfile.id).where(CompanyProfile.company_name.in_(names))
+            ):
+                self.by_name[name] = company_id if self.by_name[name] is None else _AMBIGUOUS
+
+    def resolve(self, row):
+        """
+        Returns:
+            tuple: (company_id، پیام خطا)
+        """
+        if row.company_id is not None:
+            found = self.by_id.get(row.company_id)
+            return found, None if found else f"Company {row.company_id} does not exist"
+        if row.company_email is not None:
+            found = self.by_email.get(row.company_email)
+            return found, None if found else f"No company owned by {row.company_email}"
+        found = self.by_name.get(row.company_name)
+        if found is _AMBIGUOUS:
+            return None, f"Company name {row.company_name!r} is not unique; use company_id or company_email"
+        return found, None if found else f"Company {row.company_name!r} does not exist"
+
+
+class ImportManager(ManagerBase):
+    """
+    import دسته‌ای شرکت‌ها، غرفه‌ها (ExpoCompany) و محصولات از ردیف‌های src.importer.readers.
+
+    ردیف‌ها به صورت stream خوانده و اعتبارسنجی می‌شوند؛ هر batch (IMPORT_BATCH_SIZE ردیف)
+    با INSERTهای چندتایی در یک transaction نوشته می‌شود. ردیف نامعتبر فقط همان ردیف را رد می‌کند
+    و ردیفی که قبلاً وارد شده (شرکت همان کاربر، غرفه‌ی همان شرکت، محصول هم‌نام همان شرکت) skip می‌شود
+    تا اجرای دوباره‌ی همان فایل بعد از رفع خطاها امن باشد.
+    """
+
+    def _run(self, kind, rows, schema, write, batch_size=None, progress=None, on_failure=None):
+        report = ImportReport(kind)
+        for chunk in _chunks(rows, batch_size or IMPORT_BATCH_SIZE):
+            valid, invalid = [], []
+            for line, data, error in chunk:
+                report.total += 1
+                if error is not None:
+                    invalid.append((line, error))
+                    continue
+                try:
+                    valid.append((line, schema.model_validate(data)))
+                except ValidationError as e:
+                    invalid.append((line, _describe(e)))
+
+            batch = _Batch()
+            if valid:
+                session = self.get_session()
+                try:
+                    write(session, valid, batch)
+                    session.commit()
+                except SQLAlchemyError as e:
+                    session.rollback()
+                    logger.exception(f"Import {kind} batch {report.batches + 1} failed")
+                    if on_failure is not None:
+                        on_failure()
+                    batch = _Batch()
+                    for line, _row in valid:
+                        batch.error(line, f"Batch failed: {e.__class__.__name__}: {str(e).splitlines()[0]}")
+                finally:
+                    session.close()
+
+            for callback in batch.after_commit:
+                callback()
+            report.inserted += batch.inserted
+            report.skipped += batch.skipped
+            for line, message in sorted(invalid + batch.errors):
+                report.error(line, message)
+
+            report.batches += 1
+            if progress is not None:
+                progress(report.as_dict())
+
+        result = report.as_dict()
+        logger.info(
+            f"Imported {kind}: {result['inserted']} inserted, {result['skipped']} skipped, "
+            f"{result['failed']} failed of {result['total']} rows in {result['seconds']}s"
+        )
+        return result
+
+    # -------------------- companies --------------------
+    def import_companies(self, rows, batch_size=None, progress=None):
+        """
+        هر ردیف یک شرکت؛ کاربر صاحب شرکت با user_id موجود یا email پیدا می‌شود و اگر وجود ندارد
+        به صورت exhibitor غیرفعال با رمز تصادفی ساخته می‌شود (ورود بعد از فعال‌سازی و تعیین رمز).
+        """
+        seen = {}
+        password = []
+
+        def unusable_password():
+            # یک hash برای کل import؛ hash جدا برای هر کاربر import را کند می‌کند
+            if not password:
+                password.append(UserManager(self.db).hash_password(secrets.token_urlsafe(32)))
+            return password[0]
+
+        def write(session, rows, batch):
+            owners = []
+            # کلیدهای این batch فقط بعد از commit به seen اضافه می‌شوند
+            pending = {}
+            for line, row in rows:
+                key = ("email", row.email) if row.user_id is None else ("user_id", row.user_id)
+                first = seen.get(key) or pending.get(key)
+                if first:
+                    batch.error(line, f"Duplicate {key[0]} {key[1]} (line {first})")
+                    continue
+                pending[key] = line
+                owners.append((line, row))
+            batch.after_commit.append(lambda: seen.update(pending))
+
+            emails = {row.email for _line, row in owners if row.user_id is None}
+            user_ids = {row.user_id for _line, row in owners if row.user_id is not None}
+            by_email = dict(session.execute(select(User.email, User.id).where(User.email.in_(emails))).all()) \
+                if emails else {}
+            existing_users = set(session.execute(select(User.id).where(User.id.in_(user_ids))).scalars()) \
+                if user_ids else set()
+
+            now = datetime.utcnow()
+            new_users = [
+                (line, row) for line, row in owners
+                if row.user_id is None and row.email not in by_email
+            ]
+            if new_users:
+                ids = _insert_ids(session, User, [
+                    {
+                        "username": row.username or row.company_name[:100],
+                        "email": row.email,
+                        "password": unusable_password(),
+                        "role": RoleEnum.exhibitor,
+                        "is_active": False,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for _line, row in new_users
+                ])
+                by_email.update({row.email: user_id for (_line, row), user_id in zip(new_users, ids)})
+                stats.record(session, "users", now, added=len(ids))
+
+            resolved = []
+            for line, row in owners:
+                if row.user_id is not None and row.user_id not in existing_users:
+                    batch.error(line, f"User {row.user_id} does not exist")
+                    continue
+                resolved.append((line, row, row.user_id or by_email[row.email]))
+
+            owner_ids = {user_id for _line, _row, user_id in resolved}
+            with_company = set(session.execute(
+                select(CompanyProfile.user_id).where(CompanyProfile.user_id.in_(owner_ids))
+            ).scalars()) if owner_ids else set()
+
+            companies = [
+                {
+                    "user_id": user_id,
+                    "company_name": row.company_name,
+                    "industry_category": row.industry_category,
+                    "description": row.description,
+                    "logo": row.logo,
+                    "approval_status": row.approval_status,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for _line, row, user_id in resolved if user_id not in with_company
+            ]
+            batch.skipped += len(resolved) - len(companies)
+            if companies:
+                _insert_all(session, CompanyProfile.__table__, companies)
+                stats.record(session, "companies", now, added=len(companies))
+            batch.inserted += len(companies)
+
+        return self._run("companies", rows, CompanyRow, write, batch_size, progress)
+
+    # -------------------- booths --------------------
+    def import_booths(self, exhibition_id, rows, batch_size=None, progress=None):
+        """
+        تخصیص غرفه‌ی شرکت‌ها در یک نمایشگاه (معادل دسته‌ای POST /exhibition/{id}/companies)
+
+        Raises:
+            ValueError: اگر نمایشگاه وجود ندارد
+        """
+        session = self.get_session()
+        try:
+            if session.get(Exhibition, exhibition_id) is None:
+                raise ValueError(f"Exhibition with id {exhibition_id} does not exist")
+        finally:
+            session.close()
+
+        companies = _CompanyResolver()
+        seen = {}
+
+        def write(session, rows, batch):
+            companies.load(session, [row for _line, row in rows])
+            resolved = []
+            pending = {}
+            for line, row in rows:
+                company_id, error = companies.resolve(row)
+                first = seen.get(company_id) or pending.get(company_id)
+                if error:
+                    batch.error(line, error)
+                elif first:
+                    batch.error(line, f"Duplicate company {company_id} (line {first})")
+                else:
+                    pending[company_id] = line
+                    resolved.append((row, company_id))
+            batch.after_commit.append(lambda: seen.update(pending))
+
+            company_ids = {company_id for _row, company_id in resolved}
+            assigned = set(session.execute(
+                select(ExpoCompany.company_id).where(
+                    ExpoCompany.exhibition_id == exhibition_id,
+                    ExpoCompany.company_id.in_(company_ids),
+                )
+            ).scalars()) if company_ids else set()
+
+            now = datetime.utcnow()
+            booths = [
+                {
+                    "exhibition_id": exhibition_id,
+                    "company_id": company_id,
+                    "booth_number": row.booth_number,
+                    "hall_name": row.hall_name,
+                    "vip_level": row.vip_level,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for row, company_id in resolved if company_id not in assigned
+            ]
+            batch.skipped += len(resolved) - len(booths)
+            if booths:
+                _insert_all(session, ExpoCompany.__table__, booths)
+            batch.inserted += len(booths)
+
+        return self._run("booths", rows, BoothRow, write, batch_size, progress, on_failure=companies.clear)
+
+    # -------------------- products --------------------
+    def _tag_ids(self, session, names, cache):
+        """id تگ‌ها؛ تگ‌های جدید با یک INSERT ساخته می‌شوند"""
+        missing = [name for name in names if name not in cache]
+        if missing:
+            cache.update(session.execute(
+                select(ProductTag.name, ProductTag.id).where(ProductTag.name.in_(missing))
+            ).all())
+            new = [name for name in missing if name not in cache]
+            if new:
+                now = datetime.utcnow()
+                rows = [{"name": name, "created_at": now, "updated_at": now} for name in new]
+                if dialect.supports_on_conflict(session):
+                    # import همزمان یا create همان تگ به خطای unique نمی‌خورد
+                    session.execute(
+                        dialect.insert(session, ProductTag).values(rows).on_conflict_do_nothing(index_elements=["name"])
+                    )
+                else:
+                    session.execute(insert(ProductTag).values(rows))
+                cache.update(session.execute(
+                    select(ProductTag.name, ProductTag.id).where(ProductTag.name.in_(new))
+                ).all())
+        return cache
+
+    def import_products(self, rows, batch_size=None, progress=None):
+        """
+        محصولات به همراه تگ‌ها و بردار شباهت (مثل ProductManager.create)؛
+        محصولی با همان عنوان برای همان شرکت skip می‌شود.
+        """
+        from src.search import similarity
+
+        companies = _CompanyResolver()
+        tags = {}
+        seen = {}
+
+        def clear():
+            companies.clear()
+            tags.clear()
+
+        def write(session, rows, batch):
+            companies.load(session, [row for _line, row in rows])
+            resolved = []
+            # کلیدهای این batch فقط بعد از commit به seen اضافه می‌شوند
+            pending = {}
+            for line, row in rows:
+                company_id, error = companies.resolve(row)
+                if error:
+                    batch.error(line, error)
+                    continue
+                key = (company_id, row.title)
+                first = seen.get(key) or pending.get(key)
+                if first:
+                    batch.error(line, f"Duplicate product {row.title!r} for company {company_id} (line {first})")
+                    continue
+                pending[key] = line
+                resolved.append((row, company_id))
+            batch.after_commit.append(lambda: seen.update(pending))
+
+            existing = set(session.execute(
+                select(Product.company_id, Product.title).where(
+                    tuple_(Product.company_id, Product.title).in_(
+                        [(company_id, row.title) for row, company_id in resolved]
+                    )
+                )
+            ).all()) if resolved else set()
+            new = [(row, company_id) for row, company_id in resolved if (company_id, row.title) not in existing]
+            batch.skipped += len(resolved) - len(new)
+            if not new:
+                return
+
+            now = datetime.utcnow()
+            ids = _insert_ids(session, Product, [
+                {
+                    "company_id": company_id,
+                    "title": row.title,
+                    "summary": row.summary,
+                    "long_description": row.long_description,
+                    "video_pitch_url": row.video_pitch_url,
+                    "price_range": row.price_range,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for row, company_id in new
+            ])
+
+            tag_ids = self._tag_ids(session, list(dict.fromkeys(tag for row, _c in new for tag in row.tags)), tags)
+            _insert_all(session, product_tag_association, [
+                {"product_id": product_id, "tag_id": tag_ids[tag]}
+                for (row, _company_id), product_id in zip(new, ids)
+                for tag in row.tags
+            ])
+
+            vectors = [
+                similarity.text_vector(similarity.product_text(row.title, row.summary, row.long_description))
+                for row, _company_id in new
+            ]
+            _insert_all(session, ProductVector.__table__, [
+                {"product_id": product_id, "vector": similarity.encode_vector(vector), "created_at": now, "updated_at": now}
+                for product_id, vector in zip(ids, vectors)
+            ])
+            stats.record(session, "products", now, added=len(ids))
+            batch.inserted += len(ids)
+            # شاخص شباهت حافظه‌ای فقط بعد از commit
+            batch.after_commit.append(lambda: similarity.get_index().upsert(ids, vectors))
+
+        return self._run("products", rows, ProductRow, write, batch_size, progress, on_failure=clear)
@@ -1,5 +1,10 @@
 from .base import ManagerBase
-from src.database.models import OrganizerProfile
+from datetime import datetime, timedelta
+from sqlalchemy import select, func, and_
+from src.database.models import (
+    OrganizerProfile, Exhibition, ExpoCompany, CompanyProfile,
+    ExhibitionDailyStat, ExpoCompanyStat, FavoriteCounter, FavoriteTypeEnum,
+)
 
 class OrganizerManager(ManagerBase):
     def create(self, user_id, **kwargs):
@@ -53,4 +58,142 @@ class OrganizerManager(ManagerBase):
         
         organizers = q.all()
         session.close()
-        return organizers
\ No newline at end of file
+        return organizers
+
+    def dashboard(self, organizer_id, days=30):
+        """
+        داشبورد برگزارکننده از جداول آمار تجمیعی (exhibition_daily_stats، expo_company_stats)
+        و favorite_counters؛ تعداد queryها به تعداد غرفه‌ها بستگی ندارد.
+        تعداد favorite نمایشگاه و غرفه هر دو از favorite_counters (با احتساب حذف‌ها) است؛
+        سری روزانه فقط favoriteهای جدید هر روز را نشان می‌دهد.
+
+        Args:
+            days (int): طول سری روزانه (روزهای اخیر)
+
+        Returns:
+            dict: exhibitions، booths، daily و جمع کل
+        """
+        since = (datetime.utcnow() - timedelta(days=days - 1)).date()
+        session = self.get_session()
+        try:
+            exhibitions = session.execute(
+                select(Exhibition.id, Exhibition.name, Exhibition.status, Exhibition.start_date, Exhibition.end_date)
+                .where(Exhibition.organizer_id == organizer_id)
+                .order_by(Exhibition.start_date.desc())
+            ).all()
+            exhibition_ids = [row.id for row in exhibitions]
+            if not exhibition_ids:
+                return self._dashboard_result(organizer_id, days, [], [], [])
+
+            page_views = dict(session.execute(
+                select(ExhibitionDailyStat.exhibition_id, func.sum(ExhibitionDailyStat.views))
+                .where(ExhibitionDailyStat.exhibition_id.in_(exhibition_ids))
+                .group_by(ExhibitionDailyStat.exhibition_id)
+            ).all())
+            favorites = dict(session.execute(
+                select(FavoriteCounter.target_id, FavoriteCounter.count).where(
+                    FavoriteCounter.favorite_type == FavoriteTypeEnum.exhibition,
+                    FavoriteCounter.target_id.in_(exhibition_ids),
+                )
+            ).all())
+
+            booths = session.execute(
+                select(
+                    ExpoCompany.exhibition_id,
+                    ExpoCompany.company_id,
+                    CompanyProfile.company_name,
+                    ExpoCompany.booth_number,
+                    ExpoCompany.hall_name,
+                    func.coalesce(ExpoCompanyStat.company_views, 0).label("company_views"),
+                    func.coalesce(ExpoCompanyStat.product_views, 0).label("product_views"),
+                    func.coalesce(FavoriteCounter.count, 0).label("favorites"),
+                )
+                .join(CompanyProfile, CompanyProfile.id == ExpoCompany.company_id)
+                .outerjoin(ExpoCompanyStat, and_(
+                    ExpoCompanyStat.exhibition_id == ExpoCompany.exhibition_id,
+                    ExpoCompanyStat.company_id == ExpoCompany.company_id,
+                ))
+                .outerjoin(FavoriteCounter, and_(
+                    FavoriteCounter.favorite_type == FavoriteTypeEnum.company,
+                    FavoriteCounter.target_id == ExpoCompany.company_id,
+                ))
+                .where(ExpoCompany.exhibition_id.in_(exhibition_ids))
+            ).all()
+
+            daily = [
+                {
+                    "date": day,
+                    "exhibition_views": views,
+                    "booth_views": booth_views,
+                    "new_favorites": new_favorites,
+                }
+                for day, views, booth_views, new_favorites in session.execute(
+                    select(
+                        ExhibitionDailyStat.day,
+                        func.sum(ExhibitionDailyStat.views),
+                        func.sum(ExhibitionDailyStat.booth_views),
+                        func.sum(ExhibitionDailyStat.favorites + ExhibitionDailyStat.booth_favorites),
+                    )
+                    .where(ExhibitionDailyStat.exhibition_id.in_(exhibition_ids), ExhibitionDailyStat.day >= since)
+                    .group_by(ExhibitionDailyStat.day)
+                    .order_by(ExhibitionDailyStat.day)
+                )
+            ]
+        finally:
+            session.close()
+
+        booth_rows = [
+            {
+                "exhibition_id": row.exhibition_id,
+                "company_id": row.company_id,
+                "company_name": row.company_name,
+                "booth_number": row.booth_number,
+                "hall_name": row.hall_name,
+                "views": row.company_views + row.product_views,
+                "company_views": row.company_views,
+                "product_views": row.product_views,
+                "favorites": row.favorites,
+            }
+            for row in booths
+        ]
+        booth_rows.sort(key=lambda row: row["views"], reverse=True)
+
+        booth_views = {}
+        booth_counts = {}
+        for row in booth_rows:
+            booth_views[row["exhibition_id"]] = booth_views.get(row["exhibition_id"], 0) + row["views"]
+            booth_counts[row["exhibition_id"]] = booth_counts.get(row["exhibition_id"], 0) + 1
+
+        exhibition_rows = []
+        for row in exhibitions:
+            exhibition_rows.append({
+                "id": row.id,
+                "name": row.name,
+                "status": row.status.value if row.status else None,
+                "start_date": row.start_date,
+                "end_date": row.end_date,
+                "views": page_views.get(row.id) or 0,
+                "favorites": favorites.get(row.id) or 0,
+                "booths": booth_counts.get(row.id, 0),
+                "booth_views": booth_views.get(row.id, 0),
+            })
+
+        return self._dashboard_result(
+            organizer_id, days, exhibition_rows, booth_rows, daily
+        )
+
+    def _dashboard_result(self, organizer_id, days, exhibitions, booths, daily):
+        return {
+            "organizer_id": organizer_id,
+            "days": days,
+            "totals": {
+                "exhibitions": len(exhibitions),
+                "booths": len(booths),
+                "exhibition_views": sum(row["views"] for row in exhibitions),
+                "booth_views": sum(row["views"] for row in booths),
+                "exhibition_favorites": sum(row["favorites"] for row in exhibitions),
+            },
+            "exhibitions": exhibitions,
+            "booths": booths,
+            "daily": daily,
+        }
@@ -1,15 +1,69 @@
 from .base import ManagerBase
-from sqlalchemy import or_, desc
-from datetime import datetime
-from sqlalchemy.orm import joinedload
+from .blob_manager import release_blob
+import os
+import threading
+import time
+from sqlalchemy import or_, desc, select, delete
+from datetime import datetime, timedelta
+from sqlalchemy.orm import joinedload, selectinload
 
+from src.database import dialect
 from src.database.models import (
     Product,
     ProductImage,
     ProductBrochure,
     ProductTag,
+    ProductVector,
+    product_tag_association,
 )
 
+# فیلدهایی که تغییرشان بردار متنی محصول را عوض می‌کند
+VECTOR_FIELDS = ("title", "summary", "long_description")
+
+# هر چند ثانیه بردارهایی که process دیگری نوشته به شاخص محلی اضافه می‌شوند
+SIMILARITY_REFRESH_SECONDS = float(os.getenv("SIMILARITY_REFRESH_SECONDS", 5))
+# updated_at قبل از commit گرفته می‌شود؛ transactionی که دیرتر commit شده با updated_at
+# کوچک‌تر از آخرین مقدار خوانده شده ظاهر می‌شود. این بازه پشت watermark دوباره خوانده می‌شود
+# (upsert بردارهای بدون تغییر را نادیده می‌گیرد)
+SIMILARITY_SYNC_OVERLAP_SECONDS = float(os.getenv("SIMILARITY_SYNC_OVERLAP_SECONDS", 30))
+
+# تعداد کاندیدهای شاخص برداری که با Jaccard تگ‌ها دوباره امتیازدهی می‌شوند
+SIMILAR_CANDIDATES = 50
+TEXT_WEIGHT = 0.7
+TAG_WEIGHT = 0.3
+
+VECTOR_LOAD_BATCH = 10000
+
+_index_sync = {"loaded_until": None, "checked_at": 0.0}
+_index_sync_lock = threading.Lock()
+
+
+def store_product_vector(session, product):
+    """
+    محاسبه و ذخیره‌ی بردار متنی محصول داخل session داده شده؛ commit بر عهده‌ی فراخواننده است.
+    """
+    from src.search import similarity
+
+    vector = similarity.text_vector(
+        similarity.product_text(product.title, product.summary, product.long_description)
+    )
+    blob = similarity.encode_vector(vector)
+    now = datetime.utcnow()
+
+    if dialect.supports_on_conflict(session):
+        stmt = dialect.insert(session, ProductVector).values(
+            product_id=product.id, vector=blob, created_at=now, updated_at=now
+        ).on_conflict_do_update(
+            index_elements=["product_id"],
+            set_={"vector": blob, "updated_at": now}
+        )
+        session.execute(stmt)
+    else:
+        session.execute(delete(ProductVector).where(ProductVector.product_id == product.id))
+        session.add(ProductVector(product_id=product.id, vector=blob))
+    return vector
+
+
 class ProductManager(ManagerBase):
     def create(self, company_id, **data):
         session = self.get_session()
@@ -34,9 +88,13 @@ class ProductManager(ManagerBase):
         for b in brochures_data:
             session.add(ProductBrochure(product_id=product.id, **b))
 
+        vector = store_product_vector(session, product)
+
         session.commit()
         session.refresh(product)
         session.close()
+
+        self._index_upsert(product.id, vector)
         return product
 
     def get_by_id(self, product_id):
@@ -56,6 +114,10 @@ class ProductManager(ManagerBase):
         images_data = data.pop("images", None)
         brochures_data = data.pop("brochures", None)
 
+        text_changed = any(
+            key in VECTOR_FIELDS and getattr(product, key) != value for key, value in data.items()
+        )
+
         for key, value in data.items():
             if hasattr(product, key):
                 setattr(product, key, value)
@@ -67,10 +129,15 @@ class ProductManager(ManagerBase):
             for name in tags_data:
                 self._add_tag_to_product(session, product, name)
 
+        vector = store_product_vector(session, product) if text_changed else None
+
         session.commit()
         session.refresh(product)
 
         session.close()
+
+        if vector is not None:
+            self._index_upsert(product.id, vector)
         return product
 
 
@@ -80,9 +147,12 @@ class ProductManager(ManagerBase):
         if not product:
             session.close()
             return False
+        session.execute(delete(ProductVector).where(ProductVector.product_id == product_id))
         session.delete(product)
         session.commit()
         session.close()
+
+        self._index_remove(product_id)
         return True
 
     def add_image(self, product_id, url, orginal_name, is_primary=0):
@@ -97,12 +167,23 @@ class ProductManager(ManagerBase):
         return image
 
 
+    def set_image_derivatives(self, image_id, thumbnail_url=None, medium_url=None, webp_url=None):
+        session = self.get_session()
+        session.query(ProductImage).filter_by(id=image_id).update({
+            "thumbnail_url": thumbnail_url,
+            "medium_url": medium_url,
+            "webp_url": webp_url,
+        })
+        session.commit()
+        session.close()
+
     def remove_image(self, image_id):
         session = self.get_session()
         image = session.query(ProductImage).filter_by(id=image_id).first()
         if not image:
             session.close()
             return False
+        release_blob(session, image.url)
         session.delete(image)
         session.commit()
         session.close()
@@ -141,6 +222,7 @@ class ProductManager(ManagerBase):
         if not brochure:
             session.close()
             return False
+        release_blob(session, brochure.url)
         session.delete(brochure)
         session.commit()
         session.close()
@@ -192,9 +274,8 @@ class ProductManager(ManagerBase):
         session.close()
         return tags  # برگرداندن لیست تگ‌ها
 
-    def search(self, query=None, company_id=None, limit=50, offset=0):
-        session = self.get_session()
-        q = session.query(Product).options(joinedload(Product.images))
+    def _filter_search(self, q, query=None, company_id=None):
+        # هم روی Query و هم روی select() کار می‌کند
         if query:
             q = q.filter(or_(
                 Product.title.ilike(f"%{query}%"),
@@ -203,10 +284,143 @@ class ProductManager(ManagerBase):
             ))
         if company_id:
             q = q.filter(Product.company_id == company_id)
+        return q
+
+    def search(self, query=None, company_id=None, limit=50, offset=0):
+        session = self.get_session()
+        q = session.query(Product).options(
+            joinedload(Product.images),
+            selectinload(Product.tags),
+            selectinload(Product.brochures),
+        )
+        q = self._filter_search(q, query=query, company_id=company_id)
         products = q.order_by(desc(Product.created_at)).offset(offset).limit(limit).all()
         session.close()
         return products
 
+    def iter_search(self, query=None, company_id=None, batch_size=500):
+        """
+        مثل search ولی بدون limit و به صورت generator؛
+        رکوردها دسته‌ای (yield_per) از cursor خوانده می‌شوند و حافظه ثابت می‌ماند.
+        session تا پایان پیمایش باز می‌ماند.
+        """
+        session = self.get_session()
+        try:
+            stmt = select(Product).options(
+                # joinedload روی collection با yield_per سازگار نیست
+                selectinload(Product.images),
+                selectinload(Product.tags),
+                selectinload(Product.brochures),
+            )
+            stmt = self._filter_search(stmt, query=query, company_id=company_id)
+            stmt = stmt.order_by(Product.id).execution_options(yield_per=batch_size)
+            yield from session.scalars(stmt)
+        finally:
+            session.close()
+
+    def similar(self, product_id, limit=10):
+        """
+        محصولات مشابه: کاندیدها از شاخص برداری (شباهت کسینوسی متن)،
+        سپس امتیاز نهایی = TEXT_WEIGHT * کسینوسی + TAG_WEIGHT * Jaccard تگ‌ها.
+
+        Returns:
+            list[dict] | None: {"id", "title", "score"} به ترتیب نزولی، یا None اگر محصول پیدا نشد
+        """
+        from src.search import similarity
+
+        index = self._synced_index()
+
+        session = self.get_session()
+        try:
+            vector = index.get(product_id)
+            if vector is None:
+                product = session.query(Product).filter(Product.id == product_id).first()
+                if not product:
+                    return None
+                # محصولی که هنوز بردار ندارد (قبل از backfill)
+                vector = store_product_vector(session, product)
+                session.commit()
+                index.upsert([product_id], [vector])
+
+            candidate_ids, cosines = index.query(vector, SIMILAR_CANDIDATES, exclude_id=product_id)
+            candidate_ids = candidate_ids.tolist()
+
+            # یک query برای عنوان و تگ‌های محصول و کاندیدها؛ محصولات حذف شده خودبه‌خود کنار می‌روند
+            rows = session.query(Product.id, Product.title, ProductTag.name).outerjoin(
+                product_tag_association, product_tag_association.c.product_id == Product.id
+            ).outerjoin(
+                ProductTag, ProductTag.id == product_tag_association.c.tag_id
+            ).filter(Product.id.in_([product_id, *candidate_ids])).all()
+        finally:
+            session.close()
+
+        titles, tags = {}, {}
+        for row_id, title, tag in rows:
+            titles[row_id] = title
+            if tag is not None:
+                tags.setdefault(row_id, set()).add(tag)
+
+        if product_id not in titles:
+            return None
+
+        own_tags = tags.get(product_id, set())
+        results = []
+        for candidate_id, cosine in zip(candidate_ids, cosines.tolist()):
+            if candidate_id not in titles:
+                continue
+            score = TEXT_WEIGHT * cosine + TAG_WEIGHT * similarity.jaccard(own_tags, tags.get(candidate_id, set()))
+            results.append({"id": candidate_id, "title": titles[candidate_id], "score": round(score, 4)})
+
+        results.sort(key=lambda item: item["score"], reverse=True)
+        return results[:limit]
+
+    def _synced_index(self):
+        """
+        شاخص محلی این process؛ بار اول همه‌ی بردارها و بعد از آن هر
+        SIMILARITY_REFRESH_SECONDS فقط بردارهایی با updated_at بعد از
+        (آخرین updated_at خوانده شده - SIMILARITY_SYNC_OVERLAP_SECONDS).
+        """
+        from src.search import similarity
+
+        index = similarity.get_index()
+        if time.monotonic() - _index_sync["checked_at"] < SIMILARITY_REFRESH_SECONDS:
+            return index
+
+        with _index_sync_lock:
+            if time.monotonic() - _index_sync["checked_at"] < SIMILARITY_REFRESH_SECONDS:
+                return index
+
+            loaded_until = _index_sync["loaded_until"]
+            stmt = select(ProductVector.product_id, ProductVector.vector, ProductVector.updated_at)
+            if loaded_until is not None:
+                stmt = stmt.where(
+                    ProductVector.updated_at > loaded_until - timedelta(seconds=SIMILARITY_SYNC_OVERLAP_SECONDS)
+                )
+            stmt = stmt.order_by(ProductVector.updated_at)
+
+            session = self.get_session()
+            try:
+                for batch in session.execute(stmt.execution_options(yield_per=VECTOR_LOAD_BATCH)).partitions():
+                    index.upsert(
+                        [row.product_id for row in batch],
+                        [similarity.decode_vector(row.vector) for row in batch]
+                    )
+                    loaded_until = max(loaded_until or batch[-1].updated_at, batch[-1].updated_at)
+            finally:
+                session.close()
+
+            _index_sync["loaded_until"] = loaded_until
+            _index_sync["checked_at"] = time.monotonic()
+        return index
+
+    def _index_upsert(self, product_id, vector):
+        from src.search import similarity
+        similarity.get_index().upsert([product_id], [vector])
+
+    def _index_remove(self, product_id):
+        from src.search import similarity
+        similarity.get_index().remove([product_id])
+
     def _add_tag_to_product(self, session, product, tag_name):
         tag = session.query(ProductTag).filter_by(name=tag_name).first()
         if not tag:
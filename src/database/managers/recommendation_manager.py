@@ -0,0 +1,254 @@
+from .base import ManagerBase
+import math
+import os
+from datetime import datetime
+from sqlalchemy import func, insert, delete, or_, select
+
+from src.database.database import file_lock
+from src.database.partitions import retry_dropped
+from src.database.models import (
+    UserRecommendation, UserView, UserFavorite,
+    UserProfile, UserPreferredCategory,
+    Exhibition, CompanyProfile, Product,
+    ViewTargetEnum, FavoriteTypeEnum,
+)
+from src.recommendations import codec
+
+# نوع‌هایی که برای آن‌ها پیشنهاد ساخته می‌شود
+RECOMMENDATION_TYPES = ("exhibition", "company", "product")
+
+RECOMMENDATION_TOP_N = int(os.getenv("RECOMMENDATION_TOP_N", 50))
+RECOMMENDATION_LOCK_FILE = os.getenv("RECOMMENDATION_LOCK_FILE", ".run/recommendations.lock")
+
+# وزن هر نوع تعامل؛ بازدیدهای تکراری با log1p میرا می‌شوند
+FAVORITE_WEIGHT = 3.0
+VIEW_WEIGHT = 1.0
+
+# user_id ردیف پیشنهادهای عمومی
+GLOBAL_USER_ID = 0
+
+WRITE_BATCH_SIZE = 500
+
+
+class RecommendationManager(ManagerBase):
+    def get(self, user_id, target_type=None, limit=None):
+        """
+        پیشنهادهای از پیش محاسبه شده‌ی یک کاربر (یک lookup روی کلید یکتا به ازای هر نوع).
+        اگر برای کاربر ردیفی نباشد، پیشنهادهای عمومی برگردانده می‌شود.
+
+        Returns:
+            dict: target_type -> {"personalized": bool, "items": [(target_id, score), ...]}
+        """
+        types = [target_type] if target_type else list(RECOMMENDATION_TYPES)
+        types = [ViewTargetEnum(t) for t in types]
+
+        session = self.get_session()
+        rows = session.query(
+            UserRecommendation.user_id,
+            UserRecommendation.target_type,
+            UserRecommendation.target_ids,
+            UserRecommendation.scores
+        ).filter(
+            UserRecommendation.user_id.in_((user_id, GLOBAL_USER_ID)),
+            UserRecommendation.target_type.in_(types)
+        ).all()
+        session.close()
+
+        found = {}
+        for row_user_id, row_type, ids_blob, scores_blob in rows:
+            if row_type in found and row_user_id == GLOBAL_USER_ID:
+                continue
+            found[row_type] = (row_user_id, ids_blob, scores_blob)
+
+        result = {}
+        for t in types:
+            if t not in found:
+                result[t.value] = {"personalized": False, "items": []}
+                continue
+            row_user_id, ids_blob, scores_blob = found[t]
+            ids, scores = codec.decode(ids_blob, scores_blob)
+            items = list(zip(ids, scores))
+            result[t.value] = {
+                "personalized": row_user_id != GLOBAL_USER_ID,
+                "items": items[:limit] if limit else items,
+            }
+        return result
+
+    def last_built_at(self):
+        session = self.get_session()
+        value = session.query(func.max(UserRecommendation.updated_at)).scalar()
+        session.close()
+        return value
+
+    def rebuild(self, full=True, top_n=RECOMMENDATION_TOP_N):
+        """
+        محاسبه‌ی پیشنهادها (کار پس‌زمینه). در هر لحظه فقط یک process آن را اجرا می‌کند.
+
+        Args:
+            full (bool): اگر False باشد فقط کاربرانی که از آخرین اجرا تعامل جدید داشته‌اند
+                دوباره نوشته می‌شوند (ماتریس شباهت همیشه کامل ساخته می‌شود).
+
+        Returns:
+            dict | None: تعداد کاربران نوشته شده برای هر نوع، یا None اگر اجرای دیگری در جریان باشد
+        """
+        with file_lock(RECOMMENDATION_LOCK_FILE, blocking=False) as acquired:
+            if not acquired:
+                return None
+
+            since = None if full else self.last_built_at()
+            return {
+                target_type: self._rebuild_type(ViewTargetEnum(target_type), since, top_n)
+                for target_type in RECOMMENDATION_TYPES
+            }
+
+    @retry_dropped
+    def _rebuild_type(self, target_type, since, top_n):
+        from src.recommendations import engine
+
+        session = self.get_session()
+        try:
+            user_ids, item_ids, weights = self._load_interactions(session, target_type)
+            item_categories = self._load_item_categories(session, target_type)
+            user_categories = self._load_user_categories(session)
+
+            if since is None:
+                targets = set(user_ids) | set(user_categories)
+            else:
+                targets = self._active_users(session, target_type, since)
+
+            interactions = engine.InteractionMatrix(user_ids, item_ids, weights)
+            similarity = engine.item_similarity(interactions)
+            candidates = set(item_categories)
+
+            recommendations = engine.recommend(
+                interactions,
+                similarity,
+                sorted(targets),
+                top_n,
+                item_categories=item_categories,
+                user_categories=user_categories,
+                candidate_items=candidates,
+            )
+
+            # ردیف‌های قبلی همین کاربران (یا در حالت کامل، همه) داخل همان transaction پاک می‌شوند
+            self._clear(session, target_type, None if since is None else targets | {GLOBAL_USER_ID})
+
+            written = 0
+            batch = []
+            for user_id, ids, scores in recommendations:
+                batch.append((user_id, ids, scores))
+                if len(batch) >= WRITE_BATCH_SIZE:
+                    written += self._write(session, target_type, batch)
+                    batch = []
+
+            ids, scores = engine.popular(interactions, top_n, candidate_items=candidates)
+            batch.append((GLOBAL_USER_ID, ids, scores))
+            written += self._write(session, target_type, batch) - 1
+
+            session.commit()
+            return written
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            session.close()
+
+    def _clear(self, session, target_type, user_ids=None):
+        if user_ids is None:
+            session.execute(delete(UserRecommendation).where(UserRecommendation.target_type == target_type))
+            return
+
+        user_ids = sorted(user_ids)
+        for start in range(0, len(user_ids), WRITE_BATCH_SIZE):
+            session.execute(delete(UserRecommendation).where(
+                UserRecommendation.target_type == target_type,
+                UserRecommendation.user_id.in_(user_ids[start:start + WRITE_BATCH_SIZE])
+            ))
+
+    def _write(self, session, target_type, batch):
+        if not batch:
+            return 0
+
+        now = datetime.utcnow()
+
+        values = []
+        for user_id, ids, scores in batch:
+            ids_blob, scores_blob = codec.encode(ids, scores)
+            values.append({
+                "user_id": int(user_id),
+                "target_type": target_type,
+                "target_ids": ids_blob,
+                "scores": scores_blob,
+                "created_at": now,
+                "updated_at": now,
+            })
+        session.execute(insert(UserRecommendation), values)
+        return len(values)
+
+    def _load_interactions(self, session, target_type):
+        favorite_type = FavoriteTypeEnum(target_type.value)
+        user_ids, item_ids, weights = [], [], []
+
+        for user_id, target_id in session.query(UserFavorite.user_id, UserFavorite.target_id).filter(
+            UserFavorite.favorite_type == favorite_type
+        ):
+            user_ids.append(user_id)
+            item_ids.append(target_id)
+            weights.append(FAVORITE_WEIGHT)
+
+        views = self.db.partitions.source(UserView.__tablename__)
+        for user_id, target_id, count in session.execute(
+            select(views.c.user_id, views.c.target_id, func.count()).where(
+                views.c.target_type == target_type,
+                views.c.user_id.isnot(None)
+            ).group_by(views.c.user_id, views.c.target_id)
+        ):
+            user_ids.append(user_id)
+            item_ids.append(target_id)
+            weights.append(VIEW_WEIGHT * math.log1p(count))
+
+        return user_ids, item_ids, weights
+
+    def _load_item_categories(self, session, target_type):
+        """
+        item_id -> دسته‌بندی؛ کلیدها همان آیتم‌های موجود (حذف نشده) هستند
+        """
+        if target_type == ViewTargetEnum.exhibition:
+            rows = session.query(Exhibition.id, Exhibition.category_level)
+        elif target_type == ViewTargetEnum.company:
+            rows = session.query(CompanyProfile.id, CompanyProfile.industry_category)
+        else:
+            rows = session.query(Product.id, CompanyProfile.industry_category).join(
+                CompanyProfile, Product.company_id == CompanyProfile.id
+            )
+        return dict(rows.all())
+
+    def _load_user_categories(self, session):
+        categories = {}
+        for user_id, category in session.query(
+            UserProfile.user_id, UserPreferredCategory.category_name
+        ).join(
+            UserPreferredCategory, UserPreferredCategory.user_profile_id == UserProfile.id
+        ):
+            categories.setdefault(user_id, set()).add(category)
+        return categories
+
+    def _active_users(self, session, target_type, since):
+        """
+        کاربرانی که بعد از since تعامل یا دسته‌ی مورد علاقه‌ی جدید داشته‌اند
+        """
+        favorite_type = FavoriteTypeEnum(target_type.value)
+        users = {user_id for (user_id,) in session.query(UserFavorite.user_id).filter(
+            UserFavorite.favorite_type == favorite_type,
+            or_(UserFavorite.created_at > since, UserFavorite.updated_at > since)
+        ).distinct()}
+        views = self.db.partitions.source(UserView.__tablename__, start=since)
+        users |= {user_id for (user_id,) in session.execute(select(views.c.user_id).where(
+            views.c.target_type == target_type,
+            views.c.user_id.isnot(None),
+            views.c.viewed_at > since
+        ).distinct())}
+        users |= {user_id for (user_id,) in session.query(UserProfile.user_id).join(
+            UserPreferredCategory, UserPreferredCategory.user_profile_id == UserProfile.id
+        ).filter(UserPreferredCategory.updated_at > since).distinct()}
+        return users
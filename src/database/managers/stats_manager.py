@@ -0,0 +1,181 @@
+from .base import ManagerBase
+import logging
+import os
+from datetime import datetime, date, timedelta
+from sqlalchemy import select, func
+
+from src.database import dialect, stats
+from src.database.database import file_lock
+from src.database.partitions import retry_dropped
+from src.database.models import StatCounter, StatDailyCount
+
+logger = logging.getLogger("stats")
+
+# چند روز اخیر که reconcile برای روزهای بدون ردیف در stat_daily_counts پر می‌کند
+STATS_BACKFILL_DAYS = int(os.getenv("STATS_BACKFILL_DAYS", 365))
+
+STATS_LOCK_FILE = os.getenv("STATS_LOCK_FILE", ".run/stat_counters.lock")
+
+
+class StatsManager(ManagerBase):
+    """
+    آمار کلی سایت از روی stat_counters و stat_daily_counts (بدون COUNT روی جداول اصلی).
+    شمارنده‌ها با eventهای src.database.stats به‌روز می‌شوند؛ reconcile تنها جایی است
+    که جداول اصلی را می‌شمارد و به صورت دوره‌ای اجرا می‌شود.
+    """
+
+    def totals(self):
+        """
+        مقدار همه‌ی شمارنده‌ها با یک query؛ جداول اصلی هیچ‌وقت اینجا شمرده نمی‌شوند.
+
+        Returns:
+            dict: {"users": ..., "views": ..., "reconciled_at": قدیمی‌ترین زمان reconcile،
+                یا None اگر شمارنده‌ای هنوز reconcile نشده}
+        """
+        session = self.get_session()
+        try:
+            rows = session.execute(
+                select(StatCounter.name, func.sum(StatCounter.value), func.max(StatCounter.reconciled_at))
+                .group_by(StatCounter.name)
+            ).all()
+        finally:
+            session.close()
+
+        values = {name: (value, reconciled_at) for name, value, reconciled_at in rows}
+        result = {name: values.get(name, (0, None))[0] for name in stats.COUNTERS}
+        reconciled = [values.get(name, (0, None))[1] for name in stats.COUNTERS]
+        result["reconciled_at"] = None if None in reconciled else min(reconciled)
+        return result
+
+    def needs_reconcile(self) -> bool:
+        """True اگر شمارنده‌ای هنوز هیچ‌وقت reconcile نشده (اولین اجرا روی دیتابیس موجود)"""
+        return self.totals()["reconciled_at"] is None
+
+    def series(self, days=30, names=None):
+        """
+        رشد روزانه‌ی days روز اخیر (شامل امروز)، روزهای بدون تغییر با صفر.
+        total مقدار شمارنده در پایان هر روز است (از مقدار فعلی به عقب محاسبه می‌شود).
+
+        Returns:
+            dict: name -> لیست {"date", "added", "removed", "total"} به ترتیب تاریخ
+        """
+        names = list(names or stats.COUNTERS)
+        today = datetime.utcnow().date()
+        start = today - timedelta(days=days - 1)
+
+        session = self.get_session()
+        try:
+            current = dict(session.execute(
+                select(StatCounter.name, func.sum(StatCounter.value))
+                .where(StatCounter.name.in_(names))
+                .group_by(StatCounter.name)
+            ).all())
+            rows = session.execute(
+                select(
+                    StatDailyCount.name, StatDailyCount.day,
+                    func.sum(StatDailyCount.added), func.sum(StatDailyCount.removed)
+                )
+                .where(StatDailyCount.name.in_(names), StatDailyCount.day >= start)
+                .group_by(StatDailyCount.name, StatDailyCount.day)
+            ).all()
+        finally:
+            session.close()
+
+        by_day = {(name, day): (added, removed) for name, day, added, removed in rows}
+        result = {}
+        for name in names:
+            total = current.get(name, 0)
+            points = []
+            for offset in range(days):
+                day = today - timedelta(days=offset)
+                added, removed = by_day.get((name, day), (0, 0))
+                points.append({"date": day.isoformat(), "added": added, "removed": removed, "total": total})
+                total -= added - removed
+            points.reverse()
+            result[name] = points
+        return result
+
+    @retry_dropped
+    def reconcile(self, names=None, backfill_days=STATS_BACKFILL_DAYS):
+        """
+        اصلاح شمارنده‌ها با شمارش جداول اصلی و پر کردن روزهای بدون ردیف در stat_daily_counts.
+
+        جمع shardهای شمارنده و COUNT(*) در یک statement (یک snapshot) خوانده می‌شوند و فقط
+        اختلاف به shard صفر اضافه می‌شود؛ پس eventهایی که بعد از آن snapshot commit شده‌اند از دست نمی‌روند.
+
+        Returns:
+            dict | None: name -> اختلاف اصلاح شده، یا None اگر process دیگری در حال reconcile باشد
+        """
+        with file_lock(STATS_LOCK_FILE, blocking=False) as acquired:
+            if not acquired:
+                return None
+
+            drift = {}
+            for name in names or stats.COUNTERS:
+                table, time_column = self._source(name)
+                counted = select(func.count()).select_from(table).scalar_subquery()
+                stored = select(func.sum(StatCounter.value)).where(StatCounter.name == name).scalar_subquery()
+
+                session = self.get_session()
+                try:
+                    actual, observed = session.execute(select(counted, stored)).one()
+                    drift[name] = actual - (observed or 0)
+                    dialect.increment(
+                        session, StatCounter, ("name", "shard"), [{"name": name, "shard": 0, "value": drift[name]}]
+                    )
+                    session.execute(
+                        StatCounter.__table__.update()
+                        .where(StatCounter.name == name, StatCounter.shard == 0)
+                        .values(reconciled_at=datetime.utcnow())
+                    )
+                    if backfill_days:
+                        self._backfill(session, name, table, time_column, backfill_days)
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    raise e
+                finally:
+                    session.close()
+
+                if drift[name]:
+                    logger.info(f"Stat counter {name} reconciled (drift {drift[name]:+d})")
+            return drift
+
+    def _source(self, name):
+        """جدول (یا UNION پارتیشن‌ها) و ستون زمان هر شمارنده"""
+        if name in stats.TABLE_COUNTERS:
+            base, time_column = stats.TABLE_COUNTERS[name]
+            table = self.db.partitions.source(base)
+        else:
+            table = stats.MODEL_COUNTERS[name].__table__
+            time_column = "created_at"
+        return table, table.c[time_column]
+
+    def _backfill(self, session, name, table, time_column, days):
+        """
+        ردیف روزهایی که در stat_daily_counts نیستند (تاریخچه‌ی قبل از فعال شدن eventها)
+        از ردیف‌های موجود ساخته می‌شود؛ روزهای موجود تغییر نمی‌کنند.
+        """
+        start = datetime.combine(datetime.utcnow().date() - timedelta(days=days - 1), datetime.min.time())
+        existing = select(StatDailyCount.day).distinct().where(
+            StatDailyCount.name == name, StatDailyCount.day >= start.date()
+        )
+        known = {_as_date(day) for day in session.execute(existing).scalars()}
+
+        day = func.date(time_column)
+        counts = session.execute(
+            select(day, func.count()).select_from(table).where(time_column >= start).group_by(day)
+        ).all()
+
+        rows = [
+            {"name": name, "day": _as_date(value), "shard": 0, "added": count, "removed": 0}
+            for value, count in counts
+            if _as_date(value) not in known
+        ]
+        if rows:
+            dialect.increment(session, StatDailyCount, ("name", "day", "shard"), rows)
+
+
+def _as_date(value) -> date:
+    # func.date روی sqlite رشته برمی‌گرداند
+    return date.fromisoformat(value) if isinstance(value, str) else value
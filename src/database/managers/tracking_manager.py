@@ -0,0 +1,323 @@
+from .base import ManagerBase
+import logging
+import os
+import threading
+from datetime import datetime
+from sqlalchemy import select, update, insert, bindparam, case, func
+from sqlalchemy.exc import IntegrityError, OperationalError, DisconnectionError
+
+from src.database import dialect
+from src.database.models import TrackingSession, TrackingPageView, User
+from src.tracking.buffer import LRUCache, TrackingBuffer
+
+logger = logging.getLogger("tracking")
+
+# نوشتن وقتی بافر به این اندازه برسد یا هر TRACKING_FLUSH_INTERVAL ثانیه
+TRACKING_BATCH_SIZE = int(os.getenv("TRACKING_BATCH_SIZE", 500))
+TRACKING_FLUSH_INTERVAL = float(os.getenv("TRACKING_FLUSH_INTERVAL", 1.0))
+# سقف رویدادهای نوشته نشده؛ بیشتر از این دور ریخته می‌شوند تا حافظه محدود بماند
+TRACKING_MAX_PENDING = int(os.getenv("TRACKING_MAX_PENDING", 100000))
+TRACKING_SESSION_CACHE_SIZE = int(os.getenv("TRACKING_SESSION_CACHE_SIZE", 100000))
+# تعداد flushهای ناموفق پشت سر هم (خطای موقت دیتابیس) قبل از جدا کردن sessionهای خراب
+TRACKING_MAX_RETRIES = int(os.getenv("TRACKING_MAX_RETRIES", 3))
+
+# ستون‌هایی از TrackingSession که کلاینت هنگام ساخت session می‌فرستد
+SESSION_META_FIELDS = ("device_type", "browser", "os", "ip_address", "country", "city")
+
+LOOKUP_BATCH_SIZE = 500
+
+# جدول منطقی page viewها؛ با VIEW_PARTITIONING به جداول ماهانه مسیریابی می‌شود
+PAGE_VIEWS_TABLE = TrackingPageView.__tablename__
+
+_sessions = TrackingSession.__table__
+
+
+def _is_transient(error) -> bool:
+    # قفل بودن SQLite یا قطع اتصال؛ تکرار همان دسته ممکن است موفق شود
+    return isinstance(error, (OperationalError, DisconnectionError))
+
+
+class TrackingManager(ManagerBase):
+    """
+    ثبت page viewها: record فقط در حافظه کار می‌کند و یک thread پس‌زمینه
+    رویدادها را دسته‌ای می‌نویسد (یک INSERT چندردیفی برای page viewها و
+    یک UPDATE به ازای هر session برای last_activity و page_views_count).
+    """
+
+    def __init__(self, db):
+        super().__init__(db)
+        self.buffer = TrackingBuffer(TRACKING_MAX_PENDING)
+        self.session_ids = LRUCache(TRACKING_SESSION_CACHE_SIZE)
+
+        self._flush_lock = threading.Lock()
+        self._failures = 0
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    # -------------------- ingestion --------------------
+    def record(self, session_id, pages, user_id=None, meta=None) -> bool:
+        """
+        اضافه کردن page viewهای یک session به بافر (بدون دسترسی به دیتابیس).
+
+        Args:
+            session_id (str): شناسه‌ی session سمت کلاینت
+            pages: لیست (page_url, viewed_at)
+            meta (dict): مشخصات دستگاه برای ساخت session جدید (SESSION_META_FIELDS)
+
+        Returns:
+            bool: False اگر بافر پر بوده و رویدادها ثبت نشده‌اند
+        """
+        if not pages:
+            return True
+
+        self._ensure_flusher()
+        accepted = self.buffer.add(session_id, pages, user_id=user_id, meta=meta)
+        if len(self.buffer) >= TRACKING_BATCH_SIZE:
+            self._wake.set()
+        return accepted
+
+    def flush(self):
+        """
+        نوشتن همه‌ی رویدادهای بافر شده در یک transaction.
+
+        اگر نوشتن با خطای موقت (قفل یا قطع اتصال) شکست بخورد دسته به بافر برمی‌گردد؛
+        با خطای دیگر یا بعد از TRACKING_MAX_RETRIES بار شکست، sessionها دو-نیمه می‌شوند
+        تا فقط رویدادهای sessionهایی که باز هم نوشته نمی‌شوند دور ریخته شوند.
+
+        Returns:
+            int: تعداد page viewهای نوشته شده
+        """
+        with self._flush_lock:
+            views, pending = self.buffer.drain()
+            if not views:
+                return 0
+
+            try:
+                written = self._write(views, pending)
+            except Exception as e:
+                self._failures += 1
+                if _is_transient(e) and self._failures < TRACKING_MAX_RETRIES:
+                    self.buffer.requeue(views, pending)
+                    logger.error(f"Tracking flush failed ({len(views)} page views requeued): {e}")
+                    return 0
+                logger.error(f"Tracking flush failed ({len(views)} page views), isolating bad sessions: {e}")
+                written = self._write_isolated(views, pending)
+
+            self._failures = 0
+            return written
+
+    def _write(self, views, pending):
+        by_table = self._route_views(views)
+
+        session = self.get_session()
+        try:
+            self._drop_unknown_users(session, pending)
+            ids = self._resolve_sessions(session, pending)
+            now = datetime.utcnow()
+
+            for table, table_views in by_table.items():
+                session.execute(insert(table), [
+                    {
+                        "session_id": ids[session_id],
+                        "page_url": page_url,
+                        "viewed_at": viewed_at,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for session_id, page_url, viewed_at in table_views
+                ])
+
+            # coalesced: یک UPDATE برای هر session، نه برای هر page view
+            session.connection().execute(
+                update(_sessions).where(_sessions.c.id == bindparam("b_id")).values(
+                    page_views_count=func.coalesce(_sessions.c.page_views_count, 0) + bindparam("b_views"),
+                    last_activity=case(
+                        (_sessions.c.last_activity > bindparam("b_last"), _sessions.c.last_activity),
+                        else_=bindparam("b_last")
+                    ),
+                    user_id=func.coalesce(bindparam("b_user_id"), _sessions.c.user_id),
+                    updated_at=now,
+                ),
+                [
+                    {
+                        "b_id": ids[session_id],
+                        "b_views": item.views,
+                        "b_last": item.last_activity,
+                        "b_user_id": item.user_id,
+                    }
+                    for session_id, item in pending.items()
+                ]
+            )
+
+            session.commit()
+            return len(views)
+        except Exception:
+            session.rollback()
+            # ممکن است id داخل LRU مربوط به ردیفی باشد که insertش rollback شده
+            self.session_ids.clear()
+            raise
+        finally:
+            session.close()
+
+    def _write_isolated(self, views, pending):
+        """
+        نوشتن دسته با دو-نیمه کردن sessionها؛ sessionی که به تنهایی هم نوشته نشود
+        (مثلاً مقدار نامعتبر) همراه با page viewهایش دور ریخته می‌شود.
+        """
+        by_session = {}
+        for view in views:
+            by_session.setdefault(view[0], []).append(view)
+
+        written = 0
+        parts = [list(pending)]
+        while parts:
+            session_ids = parts.pop()
+            part_views = [view for session_id in session_ids for view in by_session.get(session_id, ())]
+            try:
+                written += self._write(part_views, {session_id: pending[session_id] for session_id in session_ids})
+            except Exception as e:
+                if len(session_ids) > 1:
+                    middle = len(session_ids) // 2
+                    parts += [session_ids[middle:], session_ids[:middle]]
+                    continue
+                self.buffer.dropped += len(part_views)
+                logger.error(f"Dropped {len(part_views)} page views of tracking session {session_ids[0]!r}: {e}")
+        return written
+
+    def _route_views(self, views):
+        """
+        گروه‌بندی page viewها بر اساس جدول مقصد (با VIEW_PARTITIONING، جدول ماه رویداد).
+        پارتیشن‌های جدید همین‌جا و قبل از باز شدن transaction نوشتن ساخته می‌شوند.
+        """
+        partitions = self.db.partitions
+        if not partitions.enabled:
+            return {partitions.base_table(PAGE_VIEWS_TABLE): views}
+
+        by_table = {}
+        for view in views:
+            table = partitions.table_for(PAGE_VIEWS_TABLE, view[2])
+            by_table.setdefault(table, []).append(view)
+        return by_table
+
+    # -------------------- sessions --------------------
+    def _drop_unknown_users(self, session, pending):
+        """user_id ارسالی کلاینت بررسی نمی‌شود؛ کاربری که وجود ندارد به None تبدیل می‌شود"""
+        user_ids = list({item.user_id for item in pending.values() if item.user_id is not None})
+        if not user_ids:
+            return
+
+        known = set()
+        for start in range(0, len(user_ids), LOOKUP_BATCH_SIZE):
+            known.update(session.scalars(
+                select(User.id).where(User.id.in_(user_ids[start:start + LOOKUP_BATCH_SIZE]))
+            ))
+        for item in pending.values():
+            if item.user_id is not None and item.user_id not in known:
+                item.user_id = None
+
+    def _resolve_sessions(self, session, pending):
+        """
+        session_id -> id ردیف؛ ابتدا از LRU، سپس یک SELECT برای بقیه،
+        و ساخت sessionهایی که هنوز وجود ندارند.
+        """
+        ids = {}
+        missing = []
+        for session_id in pending:
+            row_id = self.session_ids.get(session_id)
+            if row_id is None:
+                missing.append(session_id)
+            else:
+                ids[session_id] = row_id
+
+        if not missing:
+            return ids
+
+        found = self._lookup(session, missing)
+        new = [session_id for session_id in missing if session_id not in found]
+        if new:
+            self._create_sessions(session, {session_id: pending[session_id] for session_id in new})
+            found.update(self._lookup(session, new))
+
+        for session_id, row_id in found.items():
+            self.session_ids.put(session_id, row_id)
+        ids.update(found)
+        return ids
+
+    def _lookup(self, session, session_ids):
+        found = {}
+        for start in range(0, len(session_ids), LOOKUP_BATCH_SIZE):
+            found.update(session.execute(
+                select(_sessions.c.session_id, _sessions.c.id).where(
+                    _sessions.c.session_id.in_(session_ids[start:start + LOOKUP_BATCH_SIZE])
+                )
+            ).all())
+        return found
+
+    def _create_sessions(self, session, pending):
+        now = datetime.utcnow()
+        rows = [
+            {
+                "session_id": session_id,
+                "user_id": item.user_id,
+                "start_time": item.first_seen,
+                "last_activity": item.first_seen,
+                "page_views_count": 0,
+                "created_at": now,
+                "updated_at": now,
+                **{key: item.meta.get(key) for key in SESSION_META_FIELDS},
+            }
+            for session_id, item in pending.items()
+        ]
+
+        if dialect.supports_on_conflict(session):
+            # worker دیگری ممکن است همزمان همین session را ساخته باشد
+            session.execute(
+                dialect.insert(session, TrackingSession).on_conflict_do_nothing(index_elements=["session_id"]),
+                rows
+            )
+            return
+
+        for row in rows:
+            try:
+                with session.begin_nested():
+                    session.execute(insert(_sessions).values(**row))
+            except IntegrityError:
+                pass
+
+    def get_session_by_key(self, session_id):
+        session = self.get_session()
+        tracking_session = session.query(TrackingSession).filter(TrackingSession.session_id == session_id).first()
+        session.close()
+        return tracking_session
+
+    # -------------------- background writer --------------------
+    def _ensure_flusher(self):
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None and not self._stopping:
+                self._thread = threading.Thread(target=self._run, name="tracking-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(TRACKING_FLUSH_INTERVAL)
+            self._wake.clear()
+            self.flush()
+
+    def shutdown(self):
+        """توقف thread نویسنده و نوشتن باقی‌مانده‌ی بافر"""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush()
+
+    def stats(self):
+        return {
+            "pending": len(self.buffer),
+            "dropped": self.buffer.dropped,
+            "cached_sessions": len(self.session_ids),
+        }
@@ -1,12 +1,15 @@
 from src.database.managers.base import ManagerBase
 from src.database.models import User, UserProfile, UserPreferredCategory, UserSocialLink
 from sqlalchemy import or_
-from passlib.context import CryptContext
+from functools import cached_property
 
 class UserManager(ManagerBase):
-    def __init__(self, db):
-        self.db = db
-        self.pwd_context = CryptContext(
+    @cached_property
+    def pwd_context(self):
+        # passlib/argon2 فقط در اولین hash یا verify بارگذاری می‌شود
+        from passlib.context import CryptContext
+
+        return CryptContext(
             schemes=["argon2"], 
             deprecated="auto"
         )
@@ -1,80 +1,120 @@
 from .base import ManagerBase
+from datetime import datetime
+from sqlalchemy import insert, select, func
+from src.database import stats
 from src.database.models import UserView, ViewTargetEnum
+from src.database.partitions import retry_dropped
+
+# جدول منطقی بازدیدها؛ با VIEW_PARTITIONING به جداول ماهانه مسیریابی می‌شود
+VIEWS_TABLE = "user_views"
 
 class ViewManager(ManagerBase):
     def add_view(self, user_id, target_type, target_id, ip=None, ua=None):
-        session = self.get_session()
-        view = UserView(
+        now = datetime.utcnow()
+        values = dict(
             user_id=user_id,
             target_type=target_type,
             target_id=target_id,
             ip_address=ip,
-            user_agent=ua
+            user_agent=ua,
+            viewed_at=now,
+            created_at=now,
+            updated_at=now,
         )
-        return self.save(session, view)
+        table = self.db.partitions.table_for(VIEWS_TABLE, now)
 
-    def count(self, target_type, target_id):
         session = self.get_session()
-        count = (
-            session.query(UserView)
-            .filter(
-                UserView.target_type == target_type,
-                UserView.target_id == target_id
-            )
-            .count()
-        )
+        result = session.execute(insert(table).values(**values))
+        # insert با Core است و eventهای ORM اجرا نمی‌شوند
+        stats.record(session, "views", now, added=1)
+        session.commit()
         session.close()
-        return count
 
+        # نمونه‌ی detached؛ id فقط داخل پارتیشن خودش یکتاست
+        return UserView(id=result.inserted_primary_key[0], **values)
+
+    @retry_dropped
+    def count(self, target_type, target_id):
+        views = self.db.partitions.source(VIEWS_TABLE)
+        session = self.get_session()
+        try:
+            return session.execute(
+                select(func.count())
+                .select_from(views)
+                .where(
+                    views.c.target_type == target_type,
+                    views.c.target_id == target_id
+                )
+            ).scalar()
+        finally:
+            session.close()
+
+    @retry_dropped
     def get_recent_views(self, user_id=None, limit=20):
+        # پارتیشن‌ها از جدید به قدیم خوانده می‌شوند تا limit پر شود
         session = self.get_session()
-        query = session.query(UserView).order_by(UserView.viewed_at.desc())
-        
-        if user_id:
-            query = query.filter(UserView.user_id == user_id)
-        
-        views = query.limit(limit).all()
-        session.close()
-        return views
+        views = []
+        try:
+            for table in reversed(self.db.partitions.tables(VIEWS_TABLE)):
+                query = select(table).order_by(table.c.viewed_at.desc()).limit(limit)
+                if user_id:
+                    query = query.where(table.c.user_id == user_id)
+                views.extend(UserView(**row._mapping) for row in session.execute(query))
+        finally:
+            session.close()
+
+        views.sort(key=lambda view: view.viewed_at, reverse=True)
+        return views[:limit]
 
-    def get_popular_items(self, target_type, limit=10):
+    @retry_dropped
+    def get_popular_items(self, target_type, limit=10, since=None):
+        views = self.db.partitions.source(VIEWS_TABLE, start=since)
         session = self.get_session()
-        from sqlalchemy import func
-        
-        popular = (
-            session.query(
-                UserView.target_id,
-                func.count(UserView.id).label('view_count')
+
+        query = (
+            select(
+                views.c.target_id,
+                func.count().label('view_count')
             )
-            .filter(UserView.target_type == target_type)
-            .group_by(UserView.target_id)
-            .order_by(func.count(UserView.id).desc())
+            .select_from(views)
+            .where(views.c.target_type == target_type)
+            .group_by(views.c.target_id)
+            .order_by(func.count().desc())
             .limit(limit)
-            .all()
         )
-        session.close()
-        return popular
+        if since is not None:
+            query = query.where(views.c.viewed_at >= since)
+
+        try:
+            return session.execute(query).all()
+        finally:
+            session.close()
 
+    @retry_dropped
     def get_views_by_period(self, target_type, target_id, days=30):
-        session = self.get_session()
-        from datetime import datetime, timedelta
-        from sqlalchemy import func, extract
-        
+        from datetime import timedelta
+
         start_date = datetime.utcnow() - timedelta(days=days)
-        
-        views = (
-            session.query(
-                func.date(UserView.viewed_at).label('view_date'),
-                func.count(UserView.id).label('count')
-            )
-            .filter(
-                UserView.target_type == target_type,
-                UserView.target_id == target_id,
-                UserView.viewed_at >= start_date
+        # فقط پارتیشن‌های ماه‌های داخل بازه خوانده می‌شوند
+        views = self.db.partitions.source(VIEWS_TABLE, start=start_date)
+
+        session = self.get_session()
+        try:
+            return (
+                session.execute(
+                    select(
+                        func.date(views.c.viewed_at).label('view_date'),
+                        func.count().label('count')
+                    )
+                    .where(
+                        views.c.target_type == target_type,
+                        views.c.target_id == target_id,
+                        views.c.viewed_at >= start_date
+                    )
+                    .group_by(func.date(views.c.viewed_at))
+                    .order_by(func.date(views.c.viewed_at))
+                )
+                .all()
             )
-            .group_by(func.date(UserView.viewed_at))
-            .order_by(func.date(UserView.viewed_at))
-            .all()
-        )
-        session.close()
-        return views
\ No newline at end of file
+        finally:
+            session.close()
\ No newline at end of file
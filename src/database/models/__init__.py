@@ -23,13 +23,17 @@ from .product import (Product,
                       product_tag_association
                       )
 
-from .misc import UserFavorite, UserView
+from .misc import UserFavorite, UserView, FavoriteCounter, JobWatermark
 from .enums import (
     RoleEnum, ApprovalStatusEnum, ExpoStatusEnum, 
     VipLevelEnum, FavoriteTypeEnum, ViewTargetEnum
 )
 from .token import Token
 from .tracking import TrackingSession, TrackingPageView
+from .storage import StoredBlob
+from .recommendation import UserRecommendation
+from .search import ProductVector
+from .stats import ExhibitionDailyStat, ExpoCompanyStat, StatCounter, StatDailyCount
 
 
 __all__ = [
@@ -66,9 +70,18 @@ __all__ = [
     # Misc
     "UserFavorite",
     "UserView",
+    "FavoriteCounter",
+    "JobWatermark",
     "Token",
     "TrackingSession",
     "TrackingPageView",
+    "StoredBlob",
+    "UserRecommendation",
+    "ProductVector",
+    "ExhibitionDailyStat",
+    "ExpoCompanyStat",
+    "StatCounter",
+    "StatDailyCount",
     
     # Enums
     "RoleEnum",
@@ -18,6 +18,9 @@ class CompanyProfile(BaseModel):
 
     company_name = Column(String, nullable=False)
     logo = Column(String, nullable=True)
+    logo_thumbnail = Column(String, nullable=True)
+    logo_medium = Column(String, nullable=True)
+    logo_webp = Column(String, nullable=True)
     industry_category = Column(String, nullable=True)
     description = Column(Text, nullable=True)
     approval_status = Column(Enum(ApprovalStatusEnum), default=ApprovalStatusEnum.pending)
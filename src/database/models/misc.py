@@ -34,4 +34,29 @@ class UserView(BaseModel):
 
     __table_args__ = (
         UniqueConstraint("user_id", "target_type", "target_id", "viewed_at"),
-    )
\ No newline at end of file
+    )
+
+class FavoriteCounter(BaseModel):
+    """
+    تعداد علاقه‌مندی‌های هر target؛ همراه با user_favorites در همان transaction به‌روز می‌شود
+    و به صورت دوره‌ای با آن تطبیق داده می‌شود.
+    """
+    __tablename__ = "favorite_counters"
+
+    favorite_type = Column(Enum(FavoriteTypeEnum), nullable=False)
+    target_id = Column(Integer, nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("favorite_type", "target_id"),
+    )
+
+
+class JobWatermark(BaseModel):
+    """
+    پیشرفت کارهای افزایشی (مثلاً خروجی تحلیلی): آخرین id پردازش شده‌ی هر جدول منبع
+    """
+    __tablename__ = "job_watermarks"
+
+    job = Column(String, unique=True, nullable=False)
+    position = Column(Integer, default=0, nullable=False)
@@ -54,6 +54,11 @@ class ProductImage(BaseModel):
     orginal_name = Column(String, nullable=False)
     is_primary = Column(Integer, default=0)
 
+    # نسخه‌های کوچک‌تر که بعد از آپلود در پس‌زمینه ساخته می‌شوند
+    thumbnail_url = Column(String, nullable=True)
+    medium_url = Column(String, nullable=True)
+    webp_url = Column(String, nullable=True)
+
     product = relationship("Product", back_populates="images")
 
 class ProductBrochure(BaseModel):
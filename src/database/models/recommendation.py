@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Enum, LargeBinary, UniqueConstraint
+from src.database.database import BaseModel
+from src.database.models.enums import ViewTargetEnum
+
+
+class UserRecommendation(BaseModel):
+    """
+    پیشنهادهای از پیش محاسبه شده‌ی هر کاربر برای هر نوع target.
+    idها و امتیازها به صورت آرایه‌ی فشرده (int32 / float32) ذخیره می‌شوند
+    تا خواندن پیشنهادهای یک کاربر فقط یک lookup روی کلید یکتا باشد.
+    """
+    __tablename__ = "user_recommendations"
+
+    # 0 = پیشنهادهای عمومی برای کاربر بدون سابقه
+    user_id = Column(Integer, nullable=False)
+    target_type = Column(Enum(ViewTargetEnum), nullable=False)
+    target_ids = Column(LargeBinary, nullable=False)
+    scores = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "target_type"),
+    )
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, ForeignKey, LargeBinary
+from src.database.database import BaseModel
+
+
+class ProductVector(BaseModel):
+    """
+    بردار متنی هر محصول برای شاخص «محصولات مشابه» (float16، little-endian)
+    """
+    __tablename__ = "product_vectors"
+
+    product_id = Column(Integer, ForeignKey("products.id"), unique=True, nullable=False)
+    vector = Column(LargeBinary, nullable=False)
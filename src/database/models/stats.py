@@ -0,0 +1,77 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, UniqueConstraint
+from src.database.database import BaseModel
+
+
+class ExhibitionDailyStat(BaseModel):
+    """
+    آمار روزانه‌ی هر نمایشگاه: صفحه‌ی نمایشگاه و جمع غرفه‌هایش.
+    به صورت افزایشی از user_views و user_favorites ساخته می‌شود (AnalyticsManager.refresh_aggregates)
+    """
+    __tablename__ = "exhibition_daily_stats"
+
+    exhibition_id = Column(Integer, nullable=False)
+    day = Column(Date, nullable=False)
+    views = Column(Integer, default=0, nullable=False)
+    favorites = Column(Integer, default=0, nullable=False)
+    booth_views = Column(Integer, default=0, nullable=False)
+    booth_favorites = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("exhibition_id", "day"),
+    )
+
+
+class ExpoCompanyStat(BaseModel):
+    """
+    جمع ترافیک هر غرفه (شرکت در یک نمایشگاه): بازدید صفحه‌ی شرکت، بازدید محصولاتش
+    و علاقه‌مندی‌های ثبت شده به شرکت
+    """
+    __tablename__ = "expo_company_stats"
+
+    exhibition_id = Column(Integer, nullable=False)
+    company_id = Column(Integer, nullable=False)
+    company_views = Column(Integer, default=0, nullable=False)
+    product_views = Column(Integer, default=0, nullable=False)
+    favorites = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("exhibition_id", "company_id"),
+    )
+
+
+class StatCounter(BaseModel):
+    """
+    شمارنده‌ی کل ردیف‌های یک جدول (users، products، views و ...).
+    با eventهای ORM همراه همان transaction نوشتن به‌روز می‌شود و StatsManager.reconcile
+    اختلاف‌ها را به صورت دوره‌ای اصلاح می‌کند.
+
+    هر شمارنده چند ردیف (shard) دارد و هر transaction فقط یکی را قفل می‌کند؛
+    مقدار شمارنده جمع shardهاست. reconciled_at روی shard صفر نوشته می‌شود.
+    """
+    __tablename__ = "stat_counters"
+
+    name = Column(String(50), nullable=False)
+    shard = Column(Integer, default=0, nullable=False)
+    value = Column(BigInteger, default=0, nullable=False)
+    reconciled_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("name", "shard"),
+    )
+
+
+class StatDailyCount(BaseModel):
+    """
+    رشد روزانه‌ی هر شمارنده: تعداد ردیف‌های اضافه و حذف شده در هر روز (UTC)، به تفکیک shard
+    """
+    __tablename__ = "stat_daily_counts"
+
+    name = Column(String(50), nullable=False)
+    day = Column(Date, nullable=False)
+    shard = Column(Integer, default=0, nullable=False)
+    added = Column(Integer, default=0, nullable=False)
+    removed = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("name", "day", "shard"),
+    )
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+from src.database.database import BaseModel
+
+
+class StoredBlob(BaseModel):
+    __tablename__ = "stored_blobs"
+
+    sha256 = Column(String(64), unique=True, nullable=False, index=True)
+    path = Column(String, unique=True, nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, default=0, nullable=False)
@@ -0,0 +1,372 @@
+"""
+پارتیشن‌بندی ماهانه‌ی جداول لاگ (user_views و tracking_page_views)
+
+با VIEW_PARTITIONING=true هر ماه یک جدول جدا دارد (مثلاً user_views_202610) با همان
+ستون‌ها و ایندکس‌های جدول اصلی. نوشتن‌ها به جدول ماه رویداد می‌روند و خواندن‌ها فقط
+پارتیشن‌هایی را می‌بینند که با بازه‌ی تاریخ درخواست هم‌پوشانی دارند (UNION ALL).
+نگهداری (retention) کل جدول ماه‌های قدیمی را DROP می‌کند، نه DELETE ردیف به ردیف.
+
+جدول اصلی به عنوان پارتیشن «قدیمی» (ردیف‌های قبل از فعال شدن پارتیشن‌بندی) خوانده می‌شود
+تا وقتی که با `python -m src.database.partitions migrate` به پارتیشن‌ها منتقل شود.
+id ردیف‌های جدید هر پارتیشن بعد از بزرگ‌ترین id جدول اصلی شروع می‌شود تا ردیف‌های قدیمی
+با همان id منتقل شوند و watermark کارهای افزایشی (خروجی تحلیلی، آمار تجمیعی) معتبر بماند.
+
+اجرا:
+    python -m src.database.partitions list
+    python -m src.database.partitions maintain    # ساخت ماه جاری و بعدی + حذف ماه‌های منقضی
+    python -m src.database.partitions migrate     # انتقال ردیف‌های جدول اصلی به پارتیشن‌ها
+                                                  # (فقط ردیف‌هایی که کارهای افزایشی پردازش کرده‌اند)
+"""
+import os
+import re
+import sys
+import json
+import functools
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import Table, Column, MetaData, UniqueConstraint, inspect, select, delete, insert, union_all, func
+from sqlalchemy.exc import DBAPIError
+
+from src.database import dialect
+from src.database.database import Base, file_lock, schema_lock
+from src.database.models import JobWatermark
+
+VIEW_PARTITIONING = os.getenv("VIEW_PARTITIONING", "false").lower() == "true"
+
+# تعداد ماه‌هایی که نگه داشته می‌شوند (0 = بدون حذف)
+RETENTION_MONTHS = {
+    "user_views": int(os.getenv("VIEW_RETENTION_MONTHS", 0)),
+    "tracking_page_views": int(os.getenv("TRACKING_RETENTION_MONTHS", 0)),
+}
+
+# جدول اصلی -> ستون زمان رویداد
+PARTITIONED_TABLES = {
+    "user_views": "viewed_at",
+    "tracking_page_views": "viewed_at",
+}
+
+# لیست پارتیشن‌ها (که workerهای دیگر هم می‌سازند) هر چند ثانیه دوباره خوانده می‌شود
+PARTITION_CACHE_SECONDS = float(os.getenv("PARTITION_CACHE_SECONDS", 60))
+
+MIGRATE_BATCH_SIZE = 5000
+
+# نگهداری (ساخت ماه بعد و DROP ماه‌های منقضی) در هر لحظه فقط در یک process
+PARTITION_LOCK_FILE = os.getenv("PARTITION_LOCK_FILE", ".run/partitions.lock")
+
+_PARTITION_RE = re.compile(r"^(?P<base>.+)_(?P<key>\d{6})$")
+
+
+def month_key(value: datetime) -> int:
+    return value.year * 100 + value.month
+
+
+def add_months(key: int, months: int) -> int:
+    year, month = divmod(key, 100)
+    index = year * 12 + (month - 1) + months
+    return (index // 12) * 100 + index % 12 + 1
+
+
+def month_start(key: int) -> datetime:
+    return datetime(key // 100, key % 100, 1)
+
+
+def partition_name(base: str, key: int) -> str:
+    return f"{base}_{key}"
+
+
+def seed_job(table_name: str) -> str:
+    """
+    نام ردیف job_watermarks که id شروع پارتیشن را نگه می‌دارد؛ ردیف‌های پارتیشن با
+    id تا این مقدار از جدول اصلی منتقل شده‌اند.
+    """
+    return f"partition_seed:{table_name}"
+
+
+def is_missing_table(error) -> bool:
+    message = str(getattr(error, "orig", error)).lower()
+    return "no such table" in message or "does not exist" in message or "doesn't exist" in message
+
+
+def retry_dropped(method):
+    """
+    برای متدهای Manager که از source() یا tables() می‌خوانند: اگر process دیگری پارتیشنی را
+    که هنوز در لیست cache شده‌ی این process بود DROP کرده باشد، لیست دوباره خوانده و متد
+    یک بار دیگر اجرا می‌شود.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        except DBAPIError as e:
+            partitions = self.db.partitions
+            if not partitions.enabled or not is_missing_table(e):
+                raise
+            partitions.refresh()
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class Partitioner:
+    """
+    مسیریابی نوشتن/خواندن جداول پارتیشن شده. هر Database یک نمونه دارد.
+    """
+
+    def __init__(self, engine, enabled=VIEW_PARTITIONING):
+        self.engine = engine
+        self.enabled = enabled
+        self.metadata = MetaData()
+
+        self._known = {base: set() for base in PARTITIONED_TABLES}
+        self._legacy = {base: True for base in PARTITIONED_TABLES}
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+
+    # -------------------- tables --------------------
+    def base_table(self, base) -> Table:
+        return Base.metadata.tables[base]
+
+    def _define(self, base, key) -> Table:
+        name = partition_name(base, key)
+        if name in self.metadata.tables:
+            return self.metadata.tables[name]
+
+        source = self.base_table(base)
+        columns = [
+            # بدون ForeignKey: پارتیشن‌ها جدا از بقیه‌ی schema ساخته و DROP می‌شوند
+            Column(
+                column.name,
+                column.type,
+                primary_key=column.primary_key,
+                nullable=column.nullable,
+                index=column.index,
+                default=column.default.arg if column.default is not None else None,
+                onupdate=column.onupdate.arg if column.onupdate is not None else None,
+            )
+            for column in source.columns
+        ]
+        constraints = [
+            UniqueConstraint(*[column.name for column in constraint.columns])
+            for constraint in source.constraints
+            if isinstance(constraint, UniqueConstraint)
+        ]
+        # AUTOINCREMENT در sqlite تا شروع id قابل تنظیم باشد (dialect.seed_ids)
+        return Table(name, self.metadata, *columns, *constraints, sqlite_autoincrement=True)
+
+    def _discover(self, force=False):
+        if not force and time.monotonic() - self._checked_at < PARTITION_CACHE_SECONDS:
+            return
+
+        with self._lock:
+            known = {base: set() for base in PARTITIONED_TABLES}
+            for name in inspect(self.engine).get_table_names():
+                match = _PARTITION_RE.match(name)
+                if match and match.group("base") in known:
+                    known[match.group("base")].add(int(match.group("key")))
+
+            legacy = {}
+            with self.engine.connect() as connection:
+                for base in PARTITIONED_TABLES:
+                    table = self.base_table(base)
+                    legacy[base] = connection.execute(select(table.c.id).limit(1)).first() is not None
+
+            self._known = known
+            self._legacy = legacy
+            self._checked_at = time.monotonic()
+
+    def refresh(self):
+        """خواندن دوباره‌ی لیست پارتیشن‌ها (مثلاً بعد از DROP توسط process دیگر)"""
+        self._discover(force=True)
+
+    def create(self, base, key) -> Table:
+        table = self._define(base, key)
+        with self._lock:
+            if key not in self._known[base]:
+                with schema_lock(), self.engine.begin() as connection:
+                    if not inspect(connection).has_table(table.name):
+                        table.create(connection)
+                        self._seed_ids(connection, base, table)
+                self._known[base].add(key)
+        return table
+
+    def _seed_ids(self, connection, base, table):
+        """
+        شروع id پارتیشن جدید بعد از بزرگ‌ترین id جدول اصلی (اگر ردیف قدیمی دارد)
+        """
+        last_id = connection.execute(select(func.max(self.base_table(base).c.id))).scalar()
+        if not last_id or not dialect.seed_ids(connection, table, last_id):
+            return
+
+        now = datetime.utcnow()
+        watermarks = JobWatermark.__table__
+        job = seed_job(table.name)
+        connection.execute(delete(watermarks).where(watermarks.c.job == job))
+        connection.execute(insert(watermarks).values(job=job, position=last_id, created_at=now, updated_at=now))
+
+    def table_for(self, base, when: datetime = None) -> Table:
+        """
+        جدول مقصد نوشتن برای رویدادی با زمان when (پیش‌فرض اکنون)
+        """
+        if not self.enabled:
+            return self.base_table(base)
+        return self.create(base, month_key(when or datetime.utcnow()))
+
+    # -------------------- reads --------------------
+    def partitions(self, base, start: datetime = None, end: datetime = None):
+        """
+        کلید ماه پارتیشن‌های موجود که با بازه‌ی [start, end) هم‌پوشانی دارند (قدیمی به جدید)
+        """
+        self._discover()
+        keys = sorted(self._known[base])
+        if start is not None:
+            keys = [key for key in keys if key >= month_key(start)]
+        if end is not None:
+            keys = [key for key in keys if month_start(key) < end]
+        return keys
+
+    def tables(self, base, start: datetime = None, end: datetime = None):
+        """جداولی که یک query روی بازه‌ی داده شده باید بخواند"""
+        if not self.enabled:
+            return [self.base_table(base)]
+
+        tables = [self._define(base, key) for key in self.partitions(base, start, end)]
+        if self._legacy[base]:
+            tables.insert(0, self.base_table(base))
+        return tables or [self.base_table(base)]
+
+    def source(self, base, start: datetime = None, end: datetime = None):
+        """
+        منبع خواندن با همان ستون‌های جدول اصلی: خود جدول وقتی یک جدول کافی است،
+        وگرنه UNION ALL پارتیشن‌های بازه. شرط تاریخ همچنان باید روی نتیجه اعمال شود.
+        """
+        tables = self.tables(base, start, end)
+        if len(tables) == 1:
+            return tables[0]
+        return union_all(*[select(*table.c) for table in tables]).subquery(base)
+
+    # -------------------- maintenance --------------------
+    def drop_expired(self, base, months, now: datetime = None):
+        """
+        DROP پارتیشن‌هایی که کل ماهشان از پنجره‌ی months ماه اخیر بیرون است
+
+        Returns:
+            list[str]: نام جداول حذف شده
+        """
+        if not months:
+            return []
+
+        self._discover(force=True)
+        cutoff = add_months(month_key(now or datetime.utcnow()), -months + 1)
+        dropped = []
+        with self._lock:
+            for key in sorted(self._known[base]):
+                if key >= cutoff:
+                    break
+                table = self._define(base, key)
+                with schema_lock():
+                    table.drop(self.engine, checkfirst=True)
+                self.metadata.remove(table)
+                self._known[base].discard(key)
+                dropped.append(table.name)
+        return dropped
+
+    def maintain(self, now: datetime = None):
+        """
+        ساخت پارتیشن ماه جاری و بعدی (تا اولین نوشتن ماه DDL نداشته باشد) و اعمال retention.
+        در هر لحظه فقط یک process اجرا می‌کند.
+
+        Returns:
+            dict | None: جدول اصلی -> نام جداول حذف شده، یا None اگر اجرای دیگری در جریان باشد
+        """
+        if not self.enabled:
+            return {}
+
+        with file_lock(PARTITION_LOCK_FILE, blocking=False) as acquired:
+            if not acquired:
+                return None
+
+            now = now or datetime.utcnow()
+            current = month_key(now)
+            result = {}
+            for base in PARTITIONED_TABLES:
+                self.create(base, current)
+                self.create(base, add_months(current, 1))
+                result[base] = self.drop_expired(base, RETENTION_MONTHS[base], now)
+            return result
+
+    def migrate_legacy(self, base, batch_size=MIGRATE_BATCH_SIZE, upto_id=None):
+        """
+        انتقال ردیف‌های جدول اصلی به پارتیشن ماه خودشان با همان id (دسته‌ای، هر دسته یک transaction)
+
+        پارتیشن‌ها id ردیف‌های جدید را بعد از بزرگ‌ترین id جدول اصلی شروع می‌کنند، پس id تکراری
+        نمی‌شود؛ پارتیشنی که قبل از این قاعده ساخته شده ممکن است با IntegrityError متوقف شود.
+
+        Args:
+            upto_id: فقط ردیف‌هایی با id تا این مقدار (ردیف‌هایی که کارهای افزایشی از جدول
+                اصلی پردازش کرده‌اند و در پارتیشن دوباره خوانده نمی‌شوند)
+
+        Returns:
+            int: تعداد ردیف‌های منتقل شده
+        """
+        if not self.enabled:
+            return 0
+
+        table = self.base_table(base)
+        time_column = PARTITIONED_TABLES[base]
+        moved = 0
+
+        query = select(table).order_by(table.c.id).limit(batch_size)
+        if upto_id is not None:
+            query = query.where(table.c.id <= upto_id)
+
+        while True:
+            with self.engine.connect() as connection:
+                rows = connection.execute(query).all()
+            if not rows:
+                break
+
+            by_month = {}
+            for row in rows:
+                values = dict(row._mapping)
+                when = values[time_column] or values["created_at"]
+                by_month.setdefault(month_key(when), []).append(values)
+
+            # DDL قبل از transaction نوشتن
+            targets = {key: self.create(base, key) for key in by_month}
+
+            with self.engine.begin() as connection:
+                for key, values in by_month.items():
+                    connection.execute(insert(targets[key]), values)
+                connection.execute(delete(table).where(table.c.id.in_([row.id for row in rows])))
+            moved += len(rows)
+
+        self._discover(force=True)
+        return moved
+
+
+def main():
+    from src.database.db_manager import get_db_manager
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    partitioner = get_db_manager().db.partitions
+
+    if command == "maintain":
+        result = partitioner.maintain()
+    elif command == "migrate":
+        analytics = get_db_manager().analytics
+        result = {
+            base: partitioner.migrate_legacy(base, upto_id=analytics.legacy_processed_upto(base))
+            for base in PARTITIONED_TABLES
+        }
+    else:
+        result = {
+            base: [partition_name(base, key) for key in partitioner.partitions(base)]
+            for base in PARTITIONED_TABLES
+        }
+
+    print(json.dumps({"enabled": partitioner.enabled, command: result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
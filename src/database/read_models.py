@@ -0,0 +1,48 @@
+"""
+مدل‌های فقط-خواندنی برای مسیرهای لیست و نمایش
+
+به جای نمونه‌های ORM (با identity map، instance state و lazy loader)
+فقط ستون‌ها select می‌شوند و در dataclassهای frozen با __slots__ قرار می‌گیرند.
+دسترسی به relationship روی این‌ها ممکن نیست، پس DetachedInstanceError هم رخ نمی‌دهد.
+"""
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Optional
+
+from src.database.models import ExpoStatusEnum, FavoriteTypeEnum
+
+
+def read_columns(read_model, model):
+    """
+    ستون‌های مدل ORM به ترتیب فیلدهای read model، برای session.query(*columns) یا select(*columns)
+    """
+    return [getattr(model, field.name) for field in fields(read_model)]
+
+
+def to_read_models(read_model, rows):
+    return [read_model(*row) for row in rows]
+
+
+@dataclass(frozen=True, slots=True)
+class ExhibitionRow:
+    id: int
+    organizer_id: Optional[int]
+    name: str
+    description: Optional[str]
+    start_date: datetime
+    end_date: datetime
+    year: Optional[int]
+    category_level: Optional[str]
+    status: Optional[ExpoStatusEnum]
+    banner_image: Optional[str]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+
+@dataclass(frozen=True, slots=True)
+class FavoriteRow:
+    id: int
+    user_id: int
+    favorite_type: FavoriteTypeEnum
+    target_id: int
+    created_at: Optional[datetime]
@@ -0,0 +1,84 @@
+"""
+تبدیل سریع رکوردهای ORM به dict برای پاسخ‌های JSON
+
+برای هر مدل یک تابع مخصوص از روی mapper ساخته (compile) می‌شود؛
+به جای hasattr/getattr روی تک‌تک فیلدها، فقط یک dict literal اجرا می‌شود.
+خروجی مستقیماً با orjson (ORJSONResponse) encode می‌شود؛ datetime و Enum را خود orjson می‌شناسد.
+"""
+from sqlalchemy import inspect
+
+
+class RowSerializer:
+    """
+    Args:
+        model: کلاس مدل SQLAlchemy
+        fields: لیست فیلدها؛ هر مورد یا نام ستون است یا (کلید خروجی، منبع).
+            منبع می‌تواند نام ستون یا tuple از چند ستون باشد (اولین مقدار غیر خالی).
+            اگر داده نشود همه‌ی ستون‌های mapper استفاده می‌شوند.
+        children: کلید خروجی -> (نام relationship، RowSerializer یا نام ستون)
+            با نام ستون، لیستی از مقدار همان ستون ساخته می‌شود (مثلاً نام تگ‌ها).
+        defaults: کلید خروجی -> مقدار پیش‌فرض وقتی مقدار خالی است
+
+    تابع نهایی در اولین استفاده ساخته می‌شود تا import باعث configure شدن mapperها نشود.
+    """
+
+    def __init__(self, model, fields=None, children=None, defaults=None):
+        self.model = model
+        self.fields = fields
+        self.children = children or {}
+        self.defaults = defaults or {}
+        self._compiled = None
+
+    def __call__(self, obj):
+        return self.compiled(obj)
+
+    def many(self, rows):
+        serialize = self.compiled
+        return [serialize(row) for row in rows]
+
+    @property
+    def compiled(self):
+        if self._compiled is None:
+            self._compiled = self._compile()
+        return self._compiled
+
+    def _source_expr(self, source):
+        attrs = source if isinstance(source, tuple) else (source,)
+        parts = []
+        for attr in attrs:
+            if not attr.isidentifier():
+                raise ValueError(f"Invalid attribute name: {attr!r}")
+            # فیلدی که در مدل وجود ندارد همیشه None است (مثل رفتار getattr با default)
+            parts.append(f"obj.{attr}" if hasattr(self.model, attr) else "None")
+        return " or ".join(parts) if len(parts) > 1 else parts[0]
+
+    def _compile(self):
+        fields = self.fields
+        if fields is None:
+            fields = [prop.key for prop in inspect(self.model).column_attrs]
+
+        namespace = {}
+        items = []
+        for field in fields:
+            key, source = field if isinstance(field, tuple) else (field, field)
+            expr = self._source_expr(source)
+            if key in self.defaults:
+                default_name = f"_default_{len(namespace)}"
+                namespace[default_name] = self.defaults[key]
+                expr = f"({expr}) or {default_name}"
+            items.append(f"{key!r}: {expr}")
+
+        for key, (relation, child) in self.children.items():
+            if not relation.isidentifier():
+                raise ValueError(f"Invalid relationship name: {relation!r}")
+            if isinstance(child, str):
+                items.append(f"{key!r}: [row.{child} for row in obj.{relation} or ()]")
+            else:
+                child_name = f"_child_{len(namespace)}"
+                namespace[child_name] = child.compiled
+                items.append(f"{key!r}: [{child_name}(row) for row in obj.{relation} or ()]")
+
+        source = "def serialize(obj):\n    return {" + ", ".join(items) + "}\n"
+        code = compile(source, f"<serializer {self.model.__name__}>", "exec")
+        exec(code, namespace)
+        return namespace["serialize"]
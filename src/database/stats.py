@@ -0,0 +1,110 @@
+"""
+شمارنده‌های کلی (stat_counters) و رشد روزانه (stat_daily_counts)
+
+ردیف‌هایی که با ORM اضافه یا حذف می‌شوند با eventهای after_insert / after_delete
+در session جمع می‌شوند و در after_flush با یک upsert برای هر (شمارنده، روز) روی همان
+connection نوشته می‌شوند؛ پس با rollback نوشتن اصلی، شمارنده هم برمی‌گردد.
+هر upsert به یک shard تصادفی از STAT_COUNTER_SHARDS ردیف می‌رود تا نوشتن‌های همزمان
+پشت قفل یک ردیف صف نکشند.
+بازدیدها با Core نوشته می‌شوند (ViewManager) و record را مستقیم صدا می‌زنند.
+
+تغییراتی که از ORM رد نمی‌شوند (query.delete، DROP پارتیشن‌های منقضی و ...)
+با StatsManager.reconcile اصلاح می‌شوند.
+"""
+import os
+import random
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from src.database import dialect
+from src.database.models import User, CompanyProfile, Exhibition, Product, StatCounter, StatDailyCount
+
+# نام شمارنده -> مدل ORM که eventهایش شمرده می‌شوند
+MODEL_COUNTERS = {
+    "users": User,
+    "companies": CompanyProfile,
+    "exhibitions": Exhibition,
+    "products": Product,
+}
+
+# شمارنده‌هایی که مستقیم با record به‌روز می‌شوند -> (جدول منطقی، ستون زمان)
+TABLE_COUNTERS = {
+    "views": ("user_views", "viewed_at"),
+}
+
+COUNTERS = (*MODEL_COUNTERS, *TABLE_COUNTERS)
+
+# تعداد ردیف هر شمارنده (و هر روز)؛ بیشتر = رقابت کمتر روی قفل ردیف، جمع خواندن کمی سنگین‌تر
+STAT_COUNTER_SHARDS = max(int(os.getenv("STAT_COUNTER_SHARDS", 16)), 1)
+
+_PENDING_KEY = "stat_deltas"
+
+_registered = False
+
+
+def record(session, name, when: datetime = None, added=0, removed=0):
+    """
+    ثبت تغییر یک شمارنده داخل transaction جاری session (بدون commit)
+    """
+    _write(session, {(name, (when or datetime.utcnow()).date()): [added, removed]})
+
+
+def _write(session, deltas):
+    totals = {}
+    for (name, _day), (added, removed) in deltas.items():
+        totals[name] = totals.get(name, 0) + added - removed
+
+    # یک shard برای کل transaction؛ ترتیب ثابت ردیف‌ها از deadlock بین دو transaction جلوگیری می‌کند
+    shard = random.randrange(STAT_COUNTER_SHARDS)
+    counters = [
+        {"name": name, "shard": shard, "value": value}
+        for name, value in sorted(totals.items()) if value
+    ]
+    daily = [
+        {"name": name, "day": day, "shard": shard, "added": added, "removed": removed}
+        for (name, day), (added, removed) in sorted(deltas.items())
+    ]
+    dialect.increment(session, StatCounter, ("name", "shard"), counters)
+    dialect.increment(session, StatDailyCount, ("name", "day", "shard"), daily)
+
+
+def _pending(session):
+    return session.info.setdefault(_PENDING_KEY, {})
+
+
+def _counter(name, index):
+    def listener(_mapper, _connection, target):
+        session = object_session(target)
+        if session is None:
+            return
+        when = target.created_at if index == 0 else None
+        day = (when or datetime.utcnow()).date()
+        delta = _pending(session).setdefault((name, day), [0, 0])
+        delta[index] += 1
+    return listener
+
+
+def _after_flush(session, _flush_context):
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if deltas:
+        _write(session, deltas)
+
+
+def _after_rollback(session, _previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def register_events():
+    """اتصال eventها (یک بار در هر process)"""
+    global _registered
+
+    if _registered:
+        return
+    for name, model in MODEL_COUNTERS.items():
+        event.listen(model, "after_insert", _counter(name, 0))
+        event.listen(model, "after_delete", _counter(name, 1))
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_soft_rollback", _after_rollback)
+    _registered = True
@@ -0,0 +1,66 @@
+"""
+import دسته‌ای شرکت‌ها، غرفه‌ها و محصولات از فایل CSV یا JSONL
+
+اجرا:
+    python -m src.importer.job companies exhibitors.csv
+    python -m src.importer.job booths booths.csv --exhibition 12
+    python -m src.importer.job products products.jsonl --batch-size 2000
+
+ستون‌ها (CSV) یا کلیدها (JSONL) همان فیلدهای src.importer.rows هستند؛ تگ‌های محصول در CSV با | جدا می‌شوند.
+پیشرفت روی stderr و گزارش نهایی به صورت JSON روی stdout چاپ می‌شود؛ با خطای ردیف کد خروج 1 است.
+"""
+import argparse
+import json
+import sys
+
+from src.database.db_manager import get_db_manager
+from src.importer.readers import FORMATS, detect_format, read_rows
+
+KINDS = ("companies", "booths", "products")
+
+
+def _progress(report):
+    print(
+        f"{report['kind']}: {report['total']} rows, {report['inserted']} inserted, "
+        f"{report['skipped']} skipped, {report['failed']} failed ({report['seconds']}s)",
+        file=sys.stderr, flush=True
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import companies, booths or products")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--exhibition", type=int, help="exhibition id (required for booths)")
+    parser.add_argument("--batch-size", type=int)
+    args = parser.parse_args()
+
+    if args.kind == "booths" and args.exhibition is None:
+        parser.error("--exhibition is required for booths")
+    try:
+        format = args.format or detect_format(args.path)
+    except ValueError as e:
+        parser.error(str(e))
+
+    importer = get_db_manager().importer
+    with open(args.path, "rb") as f:
+        rows = read_rows(f, format)
+        if args.kind == "companies":
+            result = importer.import_companies(rows, args.batch_size, _progress)
+        elif args.kind == "booths":
+            try:
+                result = importer.import_booths(args.exhibition, rows, args.batch_size, _progress)
+            except ValueError as e:
+                print(e, file=sys.stderr)
+                sys.exit(2)
+        else:
+            result = importer.import_products(rows, args.batch_size, _progress)
+
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if result["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
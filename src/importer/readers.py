@@ -0,0 +1,109 @@
+"""
+خواندن stream فایل‌های ورودی import (CSV یا JSONL) ردیف به ردیف
+
+هر ردیف به صورت (شماره‌ی خط، dict، خطا) برگردانده می‌شود؛ خطِ خراب (از جمله خطی که
+UTF-8 معتبر نیست) کل فایل را متوقف نمی‌کند.
+در CSV مقدارهای خالی حذف می‌شوند تا مقدار پیش‌فرض schema اعمال شود.
+"""
+import codecs
+import csv
+import io
+import os
+
+import orjson
+
+FORMATS = ("csv", "jsonl")
+
+_EXTENSIONS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+
+def detect_format(filename, content_type=None) -> str:
+    """
+    Raises:
+        ValueError: وقتی فرمت از پسوند یا content type معلوم نیست
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in _EXTENSIONS:
+        return _EXTENSIONS[extension]
+    if content_type:
+        if "csv" in content_type:
+            return "csv"
+        if "ndjson" in content_type or "jsonl" in content_type:
+            return "jsonl"
+    raise ValueError(f"Cannot detect file format of {filename!r}; use one of {', '.join(FORMATS)}")
+
+
+INVALID_ENCODING = "Line is not valid UTF-8"
+
+
+def _decode_lines(stream, invalid_lines: set):
+    """
+    خواندن فایل باینری خط به خط؛ شماره‌ی خط‌هایی که UTF-8 نیستند در invalid_lines ثبت
+    و با کاراکتر جایگزین decode می‌شوند تا خواندن بقیه‌ی فایل ادامه پیدا کند.
+    """
+    for line_number, raw in enumerate(stream, 1):
+        if line_number == 1 and raw.startswith(codecs.BOM_UTF8):
+            # BOM فایل‌های CSV خروجی Excel
+            raw = raw[len(codecs.BOM_UTF8):]
+        try:
+            yield raw.decode("utf-8")
+        except UnicodeDecodeError:
+            invalid_lines.add(line_number)
+            yield raw.decode("utf-8", errors="replace")
+
+
+def read_csv(stream, invalid_lines=frozenset()):
+    reader = csv.DictReader(stream)
+    last_line = 1
+    for record in reader:
+        first_line, last_line = last_line + 1, reader.line_num
+        # یک ردیف CSV می‌تواند چند خط فیزیکی باشد (مقدار quote شده با newline)
+        if invalid_lines and any(line in invalid_lines for line in range(first_line, last_line + 1)):
+            yield reader.line_num, None, INVALID_ENCODING
+            continue
+        if None in record:
+            yield reader.line_num, None, "Row has more columns than the header"
+            continue
+        data = {
+            key.strip(): value.strip()
+            for key, value in record.items()
+            if key and value is not None and value.strip()
+        }
+        if data:
+            yield reader.line_num, data, None
+
+
+def read_jsonl(stream, invalid_lines=frozenset()):
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        if line_number in invalid_lines:
+            yield line_number, None, INVALID_ENCODING
+            continue
+        try:
+            data = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(data, dict):
+            yield line_number, None, "Each line must be a JSON object"
+            continue
+        yield line_number, data, None
+
+
+def read_rows(stream, format):
+    """
+    Args:
+        stream: فایل باینری (UploadFile.file) یا متنی
+        format: csv یا jsonl
+    """
+    if format not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    invalid_lines = set()
+    if not isinstance(stream, io.TextIOBase):
+        stream = _decode_lines(stream, invalid_lines)
+    return read_csv(stream, invalid_lines) if format == "csv" else read_jsonl(stream, invalid_lines)
@@ -0,0 +1,98 @@
+"""
+schema هر ردیف فایل‌های import
+
+شرکت در ردیف‌های غرفه و محصول با یکی از company_id، company_email (ایمیل کاربر صاحب شرکت)
+یا company_name (فقط وقتی یکتا باشد) مشخص می‌شود.
+"""
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+from src.database.models import ApprovalStatusEnum, VipLevelEnum
+
+# جداکننده‌ی تگ‌ها در ستون tags فایل CSV
+TAG_SEPARATORS = ("|", ";", ",")
+
+
+def _normalize_email(value):
+    if value is None:
+        return None
+    # مثل UserManager.create ایمیل همان‌طور که هست مقایسه می‌شود
+    value = value.strip()
+    if "@" not in value or value.startswith("@") or value.endswith("@"):
+        raise ValueError("Invalid email address")
+    return value
+
+
+class _Row(BaseModel):
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True)
+
+
+class CompanyRow(_Row):
+    """ردیف شرکت؛ کاربر صاحب شرکت با user_id موجود یا email (ساخته می‌شود اگر وجود ندارد)"""
+    company_name: str = Field(..., min_length=1, max_length=255)
+    email: Optional[str] = Field(None, max_length=255)
+    user_id: Optional[int] = Field(None, gt=0)
+    username: Optional[str] = Field(None, max_length=100)
+    industry_category: Optional[str] = Field(None, max_length=255)
+    description: Optional[str] = None
+    logo: Optional[str] = Field(None, max_length=2048)
+    approval_status: ApprovalStatusEnum = ApprovalStatusEnum.pending
+
+    @field_validator("email")
+    @classmethod
+    def _email(cls, value):
+        return _normalize_email(value)
+
+    @model_validator(mode="after")
+    def _owner(self):
+        if self.email is None and self.user_id is None:
+            raise ValueError("Either email or user_id is required")
+        return self
+
+
+class _CompanyReference(_Row):
+    company_id: Optional[int] = Field(None, gt=0)
+    company_email: Optional[str] = Field(None, max_length=255)
+    company_name: Optional[str] = Field(None, max_length=255)
+
+    @field_validator("company_email")
+    @classmethod
+    def _company_email(cls, value):
+        return _normalize_email(value)
+
+    @model_validator(mode="after")
+    def _reference(self):
+        if self.company_id is None and self.company_email is None and not self.company_name:
+            raise ValueError("One of company_id, company_email or company_name is required")
+        return self
+
+
+class BoothRow(_CompanyReference):
+    """تخصیص غرفه‌ی یک شرکت در نمایشگاه (ExpoCompany)"""
+    booth_number: Optional[str] = Field(None, max_length=50)
+    hall_name: Optional[str] = Field(None, max_length=100)
+    vip_level: VipLevelEnum = VipLevelEnum.normal
+
+
+class ProductRow(_CompanyReference):
+    title: str = Field(..., min_length=1, max_length=255)
+    summary: Optional[str] = None
+    long_description: Optional[str] = None
+    video_pitch_url: Optional[str] = Field(None, max_length=2048)
+    price_range: Optional[str] = Field(None, max_length=100)
+    tags: List[str] = Field(default_factory=list, max_length=50)
+
+    @field_validator("tags", mode="before")
+    @classmethod
+    def _split_tags(cls, value):
+        if isinstance(value, str):
+            separator = next((sep for sep in TAG_SEPARATORS if sep in value), None)
+            value = value.split(separator) if separator else [value]
+        return value
+
+    @field_validator("tags")
+    @classmethod
+    def _clean_tags(cls, value):
+        # ترتیب حفظ و تکراری‌ها حذف می‌شوند
+        return list(dict.fromkeys(tag.strip() for tag in value if tag and tag.strip()))
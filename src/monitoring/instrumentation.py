@@ -0,0 +1,211 @@
+"""
+اندازه‌گیری درخواست‌ها، queryها، pool دیتابیس، آپلودها و صف threadpool
+
+- MetricsMiddleware: زمان هر درخواست با برچسب الگوی route (مثلاً /products/{product_id})،
+  نه آدرس واقعی، تا تعداد سری‌ها محدود بماند.
+- hookهای before/after_cursor_execute روی همه‌ی engineها: زمان هر query بر اساس نوع
+  (SELECT/INSERT/...) و تعداد و زمان queryهای هر درخواست.
+- gaugeها (pool، threadpool، حافظه) فقط هنگام خواندن /metrics محاسبه می‌شوند.
+- همان hookها و middleware، لاگ query کند و تشخیص N+1 (src.monitoring.queries) را تغذیه می‌کنند.
+"""
+import contextvars
+import os
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.monitoring import queries
+from src.monitoring.metrics import REGISTRY
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# برچسب درخواست‌هایی که به هیچ route نرسیده‌اند (404) تا آدرس‌های دلخواه سری جدید نسازند
+UNMATCHED_ROUTE = "<unmatched>"
+
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+
+http_requests = REGISTRY.counter(
+    "http_requests_total", "HTTP requests by route template, method and status", ("route", "method", "status"))
+http_duration = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("route", "method"))
+http_db_queries = REGISTRY.histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ("route", "method"), QUERY_COUNT_BUCKETS)
+http_db_duration = REGISTRY.histogram(
+    "http_request_db_seconds", "Total SQL time per HTTP request", ("route", "method"), QUERY_BUCKETS)
+db_queries = REGISTRY.histogram(
+    "db_query_duration_seconds", "SQL statement latency by statement type", ("operation",), QUERY_BUCKETS)
+upload_bytes = REGISTRY.counter(
+    "http_upload_bytes_total", "Request body bytes received by multipart uploads", ("route",))
+upload_seconds = REGISTRY.counter(
+    "http_upload_seconds_total", "Time spent handling multipart uploads", ("route",))
+
+# [تعداد query، مجموع زمان] درخواست جاری؛ threadهای threadpool همین لیست را از context کپی شده می‌بینند
+_request_queries = contextvars.ContextVar("request_queries", default=None)
+
+_instrumented = False
+
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", UNMATCHED_ROUTE)
+    # Mount (مثل /uploads) route ندارد ولی endpoint و root_path مسیر mount را دارد
+    if "endpoint" in scope:
+        return scope.get("root_path") or UNMATCHED_ROUTE
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    middleware خام ASGI (بدون BaseHTTPMiddleware تا body و streaming دست نخورند)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = {"status": 500, "received": 0}
+        counts = [0, 0.0]
+        token = _request_queries.set(counts)
+        scope_token = queries.begin(f"{scope['method']} {scope['path']}")
+        is_upload = _header(scope, b"content-type").startswith(b"multipart/form-data")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            await send(message)
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["received"] += len(message.get("body", b""))
+            return message
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper if is_upload else receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_queries.reset(token)
+
+            route = route_label(scope)
+            method = scope["method"]
+            if METRICS_ENABLED:
+                http_requests.inc(route, method, str(state["status"]))
+                http_duration.observe(elapsed, route, method)
+                http_db_queries.observe(counts[0], route, method)
+                http_db_duration.observe(counts[1], route, method)
+                if is_upload:
+                    upload_bytes.inc(route, amount=state["received"])
+                    upload_seconds.inc(route, amount=elapsed)
+
+            # با NPLUSONE_RAISE=true اینجا NPlusOneError بالا می‌رود
+            queries.end(scope_token, f"{method} {route}")
+
+
+def _header(scope, name: bytes) -> bytes:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.lower()
+    return b""
+
+
+# -------------------- SQLAlchemy --------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # زمان شروع روی context همان statement؛ statement ناموفق چیزی روی connection جا نمی‌گذارد
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    if METRICS_ENABLED:
+        db_queries.observe(elapsed, _operation(statement))
+        counts = _request_queries.get()
+        if counts is not None:
+            counts[0] += 1
+            counts[1] += elapsed
+    if queries.enabled():
+        queries.on_query(statement, elapsed)
+
+
+def _operation(statement: str) -> str:
+    head = statement.lstrip()[:12].split(None, 1)
+    return head[0].upper() if head else "OTHER"
+
+
+# -------------------- gauges --------------------
+def _pool_stats(engine):
+    pool = engine.pool
+    stats = {}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if method is not None:
+            stats[(name,)] = method()
+    return stats or None
+
+
+def _threadpool_stats():
+    """
+    threadpool پیش‌فرض anyio که endpointهای sync در آن اجرا می‌شوند.
+    فقط داخل event loop قابل خواندن است؛ /metrics یک endpoint async است.
+    """
+    try:
+        from anyio.to_thread import current_default_thread_limiter
+        limiter = current_default_thread_limiter()
+        statistics = limiter.statistics()
+    except Exception:
+        return None
+    return {
+        ("busy",): statistics.borrowed_tokens,
+        ("max",): limiter.total_tokens,
+        ("queued",): statistics.tasks_waiting,
+    }
+
+
+def _process_memory():
+    import psutil
+    return psutil.Process().memory_info().rss
+
+
+def install_query_hooks():
+    """hookهای before/after_cursor_execute روی همه‌ی engineها (یک بار در هر process)"""
+    global _instrumented
+
+    if not _instrumented:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _instrumented = True
+
+
+def install(app):
+    """
+    اتصال middleware به app، hookهای SQL و ثبت gaugeها.
+    باید قبل از شروع app (زمان ساخت آن) صدا زده شود؛ engine با watch_engine جدا اضافه می‌شود.
+    middleware همیشه اضافه می‌شود تا detect_n_plus_one در تست‌ها درخواست‌ها را هم ببیند.
+    """
+    app.add_middleware(MetricsMiddleware)
+    if not (METRICS_ENABLED or queries.enabled()):
+        return
+    install_query_hooks()
+
+    REGISTRY.gauge("threadpool_threads", "anyio worker threadpool: busy, max and queued tasks",
+                   _threadpool_stats, ("state",))
+    REGISTRY.gauge("process_resident_memory_bytes", "Resident memory of this worker", _process_memory)
+
+
+def watch_engine(engine):
+    """gauge وضعیت connection pool یک engine"""
+    if not METRICS_ENABLED:
+        return
+    REGISTRY.gauge("db_pool_connections", "SQLAlchemy connection pool state",
+                   lambda: _pool_stats(engine), ("state",))
@@ -0,0 +1,104 @@
+"""
+snapshot حافظه‌ی worker با tracemalloc
+
+tracemalloc تخصیص‌ها را کندتر می‌کند، پس فقط با اولین درخواست snapshot (یا TRACEMALLOC=true)
+روشن می‌شود و با stop خاموش می‌شود. هر snapshot با snapshot قبلی مقایسه می‌شود
+تا رشد حافظه بین دو درخواست دیده شود.
+"""
+import os
+import threading
+import tracemalloc
+from datetime import datetime
+
+# تعداد frameهای ذخیره شده برای هر تخصیص (برای group_by=traceback)
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", 10))
+
+KEY_TYPES = ("lineno", "filename", "traceback")
+
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+_lock = threading.Lock()
+_previous = {}
+_started_at = None
+
+
+def start(frames=TRACEMALLOC_FRAMES):
+    global _started_at
+
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            _started_at = datetime.utcnow()
+            _previous.clear()
+
+
+def stop():
+    global _started_at
+
+    with _lock:
+        tracemalloc.stop()
+        _previous.clear()
+        _started_at = None
+
+
+def _location(statistic, key_type):
+    frames = statistic.traceback
+    if key_type == "traceback":
+        return [f"{frame.filename}:{frame.lineno}" for frame in frames]
+    frame = frames[0]
+    return frame.filename if key_type == "filename" else f"{frame.filename}:{frame.lineno}"
+
+
+def snapshot(limit=25, key_type="lineno") -> dict:
+    """
+    پرمصرف‌ترین محل‌های تخصیص و بیشترین رشد نسبت به snapshot قبلی (با همان key_type)
+
+    Returns:
+        dict: اگر tracemalloc خاموش بوده روشن می‌شود و فقط وضعیت برمی‌گردد
+    """
+    if key_type not in KEY_TYPES:
+        raise ValueError(f"key_type must be one of {', '.join(KEY_TYPES)}")
+
+    if not tracemalloc.is_tracing():
+        start()
+        return {"tracing": True, "started_at": _started_at, "message": "tracemalloc started; request again for a snapshot"}
+
+    current = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    traced, peak = tracemalloc.get_traced_memory()
+
+    with _lock:
+        previous = _previous.get(key_type)
+        _previous[key_type] = current
+
+    result = {
+        "tracing": True,
+        "started_at": _started_at,
+        "traced_bytes": traced,
+        "peak_bytes": peak,
+        "top": [
+            {"location": _location(stat, key_type), "size_bytes": stat.size, "count": stat.count}
+            for stat in current.statistics(key_type)[:limit]
+        ],
+        "growth": None,
+    }
+    if previous is not None:
+        result["growth"] = [
+            {
+                "location": _location(stat, key_type),
+                "size_diff_bytes": stat.size_diff,
+                "size_bytes": stat.size,
+                "count_diff": stat.count_diff,
+            }
+            for stat in current.compare_to(previous, key_type)[:limit]
+            if stat.size_diff
+        ]
+    return result
+
+
+if os.getenv("TRACEMALLOC", "false").lower() == "true":
+    start()
@@ -0,0 +1,203 @@
+"""
+شمارنده و histogram سبک با خروجی متنی Prometheus (text exposition format 0.0.4)
+
+مسیر داغ (inc / observe) قفل ندارد: هر thread مقادیر را در shard خودش (threading.local)
+جمع می‌کند و فقط هنگام ساخت خروجی /metrics همه‌ی shardها با هم جمع می‌شوند.
+shard threadهای تمام شده (مثلاً threadهای بیکار threadpool که anyio می‌بندد) در یک
+مجموع retired ادغام و آزاد می‌شوند تا تعداد shardها به threadهای زنده محدود بماند.
+هر worker (process) متریک‌های خودش را دارد.
+"""
+import math
+import threading
+from bisect import bisect_left
+
+# مرزهای پیش‌فرض histogram زمان (ثانیه)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+
+        self._local = threading.local()
+        # (thread, shard) برای هر thread که تا حالا مقدار ثبت کرده
+        self._shards = []
+        self._retired = {}
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            # فقط یک بار برای هر thread
+            with self._shards_lock:
+                self._retire_dead()
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def _retire_dead(self):
+        """ادغام shard threadهای تمام شده در _retired (با _shards_lock گرفته شده)"""
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                # thread تمام شده دیگر روی shard نمی‌نویسد
+                self._merge(self._retired, shard)
+        self._shards = alive
+
+    def _merge(self, totals: dict, shard: dict):
+        raise NotImplementedError
+
+    def values(self) -> dict:
+        with self._shards_lock:
+            self._retire_dead()
+            shards = [shard for _thread, shard in self._shards]
+            totals = {}
+            self._merge(totals, self._retired)
+        # copy در CPython یک عمل اتمیک است؛ thread صاحب shard در همین حین می‌تواند بنویسد
+        for shard in shards:
+            self._merge(totals, shard.copy())
+        return totals
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def _merge(self, totals, shard):
+        for labels, value in shard.items():
+            totals[labels] = totals.get(labels, 0) + value
+
+    def render(self):
+        lines = self._header()
+        for labels, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # تعداد هر bucket (غیر تجمعی) + آخرین خانه برای +Inf، سپس sum
+            state = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def _merge(self, totals, shard):
+        for labels, state in shard.items():
+            total = totals.get(labels)
+            if total is None:
+                totals[labels] = list(state)
+            else:
+                for index, value in enumerate(state):
+                    total[index] += value
+
+    def render(self):
+        lines = self._header()
+        bounds = [*self.buckets, math.inf]
+        for labels, state in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, state):
+                cumulative += count
+                bucket = _labels(self.label_names, labels, f'le="{_number(float(bound))}"')
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            suffix = _labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{suffix} {_number(state[-1])}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    مقدار لحظه‌ای که هنگام ساخت خروجی از callback خوانده می‌شود.
+    callback یک عدد یا dict با کلید tuple برچسب‌ها برمی‌گرداند (None = بدون خروجی).
+    """
+    kind = "gauge"
+
+    def __init__(self, name, help_text, callback, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.callback = callback
+
+    def render(self):
+        value = self.callback()
+        if value is None:
+            return []
+        values = value if isinstance(value, dict) else {(): value}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, item in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(item)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        # ثبت دوباره با همان نام (مثلاً import مجدد) همان نمونه‌ی قبلی را برمی‌گرداند
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labels=()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name, help_text, callback, labels=()) -> Gauge:
+        return self.register(Gauge(name, help_text, callback, labels))
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                lines.append(f"# {metric.name} unavailable: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
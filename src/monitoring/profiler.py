@@ -0,0 +1,186 @@
+"""
+profiler نمونه‌برداری (statistical sampling) برای worker در حال اجرا
+
+هر interval ثانیه یک بار (با setitimer و SIGPROF / SIGALRM) stack همه‌ی threadها
+خوانده و به شکل collapsed stack («thread;frame;frame count») شمرده می‌شود؛
+همان ورودی flamegraph.pl و speedscope. کد برنامه هیچ hook یا trace اضافه‌ای ندارد.
+
+signal فقط در thread اصلی قابل نصب است؛ اگر profile از thread دیگری شروع شود
+(یا سیستم SIGPROF ندارد) یک thread نمونه‌بردار با همان خروجی جایگزین می‌شود.
+"""
+import os
+import signal
+import sys
+import threading
+import time
+
+# mode -> (timer، signal): cpu فقط وقتی process زمان CPU مصرف می‌کند نمونه می‌گیرد، wall همیشه
+_TIMERS = {
+    "cpu": ("ITIMER_PROF", "SIGPROF"),
+    "wall": ("ITIMER_REAL", "SIGALRM"),
+}
+
+# برگ stackهای threadهای منتظر (threadpool بیکار، select حلقه‌ی رویداد و ...)
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "Condition.wait"),
+    ("threading.py", "Event.wait"),
+    ("selectors.py", "EpollSelector.select"),
+    ("selectors.py", "KqueueSelector.select"),
+    ("selectors.py", "SelectSelector.select"),
+    ("queue.py", "Queue.get"),
+    ("thread.py", "_worker"),
+}
+
+MAX_DEPTH = 128
+
+_running = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """profile دیگری روی همین worker در حال اجراست"""
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.01, mode="cpu", include_idle=False):
+        if mode not in _TIMERS:
+            raise ValueError(f"mode must be one of {', '.join(_TIMERS)}")
+        self.interval = interval
+        self.mode = mode
+        self.include_idle = include_idle
+
+        self.counts = {}
+        self.samples = 0
+        self.sampling_seconds = 0.0
+        self.method = None
+
+        self._labels = {}
+        self._previous_handler = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._started_at = None
+        self.duration = 0.0
+
+    # -------------------- sampling --------------------
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _is_idle(self, frame):
+        code = frame.f_code
+        return (os.path.basename(code.co_filename), code.co_qualname) in _IDLE_FRAMES
+
+    def _collapse(self, thread_name, frame):
+        labels = []
+        while frame is not None and len(labels) < MAX_DEPTH:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.append(thread_name)
+        labels.reverse()
+        return ";".join(labels)
+
+    def _sample(self, current_thread_id=None, current_frame=None):
+        start = time.perf_counter()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == current_thread_id:
+                # frame خود handler/نمونه‌بردار نه؛ frameی که قطع شده
+                frame = current_frame
+                if frame is None:
+                    continue
+            if not self.include_idle and self._is_idle(frame):
+                continue
+            stack = self._collapse(names.get(thread_id, f"thread-{thread_id}"), frame)
+            self.counts[stack] = self.counts.get(stack, 0) + 1
+        self.samples += 1
+        self.sampling_seconds += time.perf_counter() - start
+
+    def _handle_signal(self, _signum, frame):
+        self._sample(threading.main_thread().ident, frame)
+
+    def _run_thread(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self._sample(own_id)
+
+    # -------------------- control --------------------
+    def start(self):
+        if not _running.acquire(blocking=False):
+            raise ProfilerBusy("a profile is already running in this worker")
+        self._started_at = time.perf_counter()
+
+        timer_name, signal_name = _TIMERS[self.mode]
+        try:
+            if threading.current_thread() is threading.main_thread() and hasattr(signal, signal_name):
+                self.method = "signal"
+                self._previous_handler = signal.signal(getattr(signal, signal_name), self._handle_signal)
+                try:
+                    signal.setitimer(getattr(signal, timer_name), self.interval, self.interval)
+                except BaseException:
+                    signal.signal(getattr(signal, signal_name), self._previous_handler or signal.SIG_DFL)
+                    raise
+            else:
+                self.method = "thread"
+                self._thread = threading.Thread(target=self._run_thread, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        except BaseException:
+            # بدون release، profile بعدی در این worker برای همیشه ProfilerBusy می‌گیرد
+            self.method = None
+            _running.release()
+            raise
+
+    def stop(self):
+        try:
+            if self.method == "signal":
+                timer_name, signal_name = _TIMERS[self.mode]
+                signal.setitimer(getattr(signal, timer_name), 0)
+                signal.signal(getattr(signal, signal_name), self._previous_handler or signal.SIG_DFL)
+            elif self._thread is not None:
+                self._stop.set()
+                self._thread.join()
+        finally:
+            self.duration = time.perf_counter() - self._started_at
+            _running.release()
+
+    # -------------------- output --------------------
+    def collapsed(self) -> str:
+        """خروجی متنی برای flamegraph.pl / speedscope (پرتکرارترین stack اول)"""
+        lines = [f"{stack} {count}" for stack, count in sorted(self.counts.items(), key=lambda item: -item[1])]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def summary(self, limit=50) -> dict:
+        """
+        خلاصه به همراه پرتکرارترین stackها و توابع (self = برگ stack، total = هر جای stack)
+        """
+        own, total = {}, {}
+        for stack, count in self.counts.items():
+            frames = stack.split(";")[1:]
+            if frames:
+                own[frames[-1]] = own.get(frames[-1], 0) + count
+            for label in set(frames):
+                total[label] = total.get(label, 0) + count
+
+        def top(counter):
+            return [
+                {"frame": label, "samples": count}
+                for label, count in sorted(counter.items(), key=lambda item: -item[1])[:limit]
+            ]
+
+        return {
+            "pid": os.getpid(),
+            "mode": self.mode,
+            "method": self.method,
+            "interval": self.interval,
+            "duration": round(self.duration, 3),
+            "samples": self.samples,
+            # هزینه‌ی خود profiler نسبت به مدت profile
+            "overhead": round(self.sampling_seconds / self.duration, 4) if self.duration else 0.0,
+            "top_self": top(own),
+            "top_total": top(total),
+            "stacks": [
+                {"stack": stack, "samples": count}
+                for stack, count in sorted(self.counts.items(), key=lambda item: -item[1])[:limit]
+            ],
+        }
@@ -0,0 +1,209 @@
+"""
+لاگ queryهای کند و تشخیص N+1
+
+- queryهای کندتر از SLOW_QUERY_MS با متد Manager (یا تابع) صدا زننده لاگ می‌شوند.
+- در هر درخواست (یا هر query_scope) statementها با fingerprint (بدون مقادیر و طول لیست IN)
+  شمرده می‌شوند؛ fingerprintی که بیشتر از NPLUSONE_THRESHOLD بار اجرا شود N+1 گزارش می‌شود.
+- با NPLUSONE_RAISE=true (یا detect_n_plus_one در تست‌ها) گزارش به NPlusOneError تبدیل می‌شود.
+
+stack فقط برای query کند و اولین تکرار اضافه‌ی هر fingerprint خوانده می‌شود.
+"""
+import contextvars
+import logging
+import os
+import re
+import sys
+import sysconfig
+from contextlib import contextmanager
+from functools import lru_cache
+
+logger = logging.getLogger("queries")
+
+# 0 = غیرفعال
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 500))
+NPLUSONE_THRESHOLD = int(os.getenv("NPLUSONE_THRESHOLD", 0))
+NPLUSONE_RAISE = os.getenv("NPLUSONE_RAISE", "false").lower() == "true"
+
+STATEMENT_LOG_LENGTH = 500
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_MONITORING_DIR = os.path.dirname(os.path.abspath(__file__))
+_MANAGERS_DIR = os.path.join(_PROJECT_ROOT, "src", "database", "managers")
+_LIBRARY_DIRS = tuple({sysconfig.get_paths()["stdlib"], sysconfig.get_paths()["purelib"], sysconfig.get_paths()["platlib"]})
+
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\(\w+\)s|%s|:\w+|\$\d+)\s*,?)+\)", re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r"\s+")
+
+_scope = contextvars.ContextVar("query_scope", default=None)
+
+# لیست‌های detect_n_plus_one فعال؛ گزارش همه‌ی scopeها (از جمله درخواست‌ها در thread دیگر) به آن‌ها می‌رسد
+_collectors = []
+
+
+class NPlusOneError(Exception):
+    """یک fingerprint بیشتر از حد مجاز در یک درخواست اجرا شده است"""
+
+    def __init__(self, violations):
+        self.violations = violations
+        super().__init__("; ".join(describe(violation) for violation in violations))
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """statement بدون مقادیر ثابت و با لیست IN یکسان (SQLAlchemy خودش پارامترها را جدا می‌کند)"""
+    text = _IN_LIST_RE.sub("IN (?)", statement)
+    text = _STRING_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def caller() -> str:
+    """
+    اولین frame بیرون از کتابخانه‌ها (sqlalchemy، starlette و ...) و این ماژول،
+    به همراه متد Manager که query از داخل آن اجرا شده
+    """
+    frame = sys._getframe(1)
+    origin = None
+    while frame is not None:
+        path = frame.f_code.co_filename
+        if not path.startswith(_MONITORING_DIR) and not path.startswith(_LIBRARY_DIRS) and not path.startswith("<"):
+            location = f"{_relative(path)}:{frame.f_lineno} {frame.f_code.co_qualname}"
+            if path.startswith(_MANAGERS_DIR):
+                return location if origin is None else f"{origin} in {frame.f_code.co_qualname}"
+            if origin is None:
+                origin = location
+        frame = frame.f_back
+    return origin or "<unknown>"
+
+
+def _relative(path):
+    return os.path.relpath(path, _PROJECT_ROOT) if path.startswith(_PROJECT_ROOT) else path
+
+
+def describe(violation) -> str:
+    return (
+        f"{violation['count']}x in {violation['scope']} from {violation['caller']}: "
+        f"{violation['fingerprint'][:STATEMENT_LOG_LENGTH]}"
+    )
+
+
+class QueryScope:
+    """شمارش fingerprintهای یک درخواست یا یک بلوک کد"""
+
+    def __init__(self, name, threshold):
+        self.name = name
+        self.threshold = threshold
+        self.counts = {}
+        self.flagged = {}
+
+    def record(self, statement):
+        key = fingerprint(statement)
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+        if count == self.threshold + 1:
+            self.flagged[key] = caller()
+
+    def violations(self):
+        return [
+            {"scope": self.name, "fingerprint": key, "count": self.counts[key], "caller": source}
+            for key, source in self.flagged.items()
+        ]
+
+
+def enabled() -> bool:
+    return SLOW_QUERY_MS > 0 or NPLUSONE_THRESHOLD > 0 or bool(_collectors)
+
+
+def on_query(statement, elapsed):
+    """از hook after_cursor_execute برای هر statement صدا زده می‌شود"""
+    if SLOW_QUERY_MS > 0 and elapsed * 1000 >= SLOW_QUERY_MS:
+        scope = _scope.get()
+        logger.warning(
+            f"Slow query {elapsed * 1000:.1f}ms"
+            f"{f' in {scope.name}' if scope is not None else ''} from {caller()}: "
+            f"{_SPACE_RE.sub(' ', statement)[:STATEMENT_LOG_LENGTH]}"
+        )
+
+    scope = _scope.get()
+    if scope is not None and scope.threshold > 0:
+        scope.record(statement)
+
+
+def begin(name, threshold=None):
+    """
+    شروع scope جدید در context جاری (مثلاً هر درخواست)
+
+    Returns:
+        token برای end، یا None اگر تشخیص N+1 خاموش است
+    """
+    threshold = NPLUSONE_THRESHOLD if threshold is None else threshold
+    if threshold <= 0 and not _collectors:
+        return None
+    if threshold <= 0:
+        threshold = min(collector_threshold for collector_threshold, _violations in _collectors)
+    return _scope.set(QueryScope(name, threshold))
+
+
+def end(token, name=None, raise_errors=None):
+    """
+    پایان scope و گزارش N+1ها
+
+    Args:
+        name: نام نهایی scope (مثلاً الگوی route که بعد از اجرای درخواست معلوم می‌شود)
+
+    Returns:
+        list[dict]: تکرارهای بیش از حد
+    """
+    if token is None:
+        return []
+    scope = _scope.get()
+    _scope.reset(token)
+    if name:
+        scope.name = name
+
+    violations = scope.violations()
+    for violation in violations:
+        logger.warning(f"N+1 query: {describe(violation)}")
+    for _threshold, collected in list(_collectors):
+        collected.extend(violations)
+
+    if violations and (NPLUSONE_RAISE if raise_errors is None else raise_errors):
+        raise NPlusOneError(violations)
+    return violations
+
+
+@contextmanager
+def query_scope(name, threshold=None, raise_errors=None):
+    """
+    شمارش queryهای یک بلوک کد خارج از درخواست HTTP (مثلاً یک job یا اسکریپت)
+    """
+    token = begin(name, threshold)
+    try:
+        yield
+    finally:
+        end(token, raise_errors=raise_errors)
+
+
+@contextmanager
+def detect_n_plus_one(threshold=3):
+    """
+    برای تست‌ها: هر N+1 داخل بلوک (چه مستقیم، چه در درخواست‌های TestClient) NPlusOneError می‌دهد.
+
+        with detect_n_plus_one(threshold=3):
+            client.get("/products/search?q=...")
+    """
+    from src.monitoring import instrumentation
+
+    instrumentation.install_query_hooks()
+    entry = (threshold, [])
+    _collectors.append(entry)
+    try:
+        with query_scope("detect_n_plus_one", threshold, raise_errors=False):
+            yield entry[1]
+    finally:
+        _collectors.remove(entry)
+
+    if entry[1]:
+        raise NPlusOneError(entry[1])
@@ -0,0 +1,29 @@
+"""
+تبدیل لیست پیشنهادها به bytes و برعکس، بدون نیاز به numpy در مسیر درخواست
+"""
+import sys
+from array import array
+
+
+def _little_endian(values: array) -> array:
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def encode(target_ids, scores):
+    """
+    Returns:
+        (bytes, bytes): idها به صورت int32 و امتیازها به صورت float32 (little-endian)
+    """
+    ids = _little_endian(array("i", (int(i) for i in target_ids)))
+    values = _little_endian(array("f", (float(s) for s in scores)))
+    return ids.tobytes(), values.tobytes()
+
+
+def decode(ids_blob: bytes, scores_blob: bytes):
+    ids = array("i")
+    ids.frombytes(ids_blob)
+    values = array("f")
+    values.frombytes(scores_blob)
+    return _little_endian(ids).tolist(), _little_endian(values).tolist()
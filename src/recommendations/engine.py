@@ -0,0 +1,182 @@
+"""
+محاسبه‌ی پیشنهادها با co-occurrence آیتم-آیتم روی ماتریس‌های sparse
+
+ورودی: تعاملات (کاربر، آیتم، وزن) از بازدیدها و علاقه‌مندی‌ها.
+خروجی: top-N آیتم برای هر کاربر. این ماژول به دیتابیس دسترسی ندارد.
+"""
+import numpy as np
+from scipy import sparse
+
+# هر آیتم فقط با نزدیک‌ترین همسایه‌هایش مقایسه می‌شود تا ماتریس شباهت sparse بماند
+NEIGHBOURS_PER_ITEM = 50
+
+
+class InteractionMatrix:
+    """
+    ماتریس کاربر × آیتم؛ وزن‌های تکراری یک (کاربر، آیتم) جمع می‌شوند.
+    """
+
+    def __init__(self, user_ids, item_ids, weights):
+        self.users, user_index = np.unique(np.asarray(user_ids, dtype=np.int64), return_inverse=True)
+        self.items, item_index = np.unique(np.asarray(item_ids, dtype=np.int64), return_inverse=True)
+        self.matrix = sparse.csr_matrix(
+            (np.asarray(weights, dtype=np.float32), (user_index, item_index)),
+            shape=(len(self.users), len(self.items))
+        )
+        self.matrix.sum_duplicates()
+        self._user_rows = {int(user_id): row for row, user_id in enumerate(self.users)}
+
+    def user_row(self, user_id):
+        return self._user_rows.get(user_id)
+
+    def popularity(self):
+        """امتیاز محبوبیت هر آیتم (جمع وزن‌ها روی همه‌ی کاربران)"""
+        return np.asarray(self.matrix.sum(axis=0)).ravel()
+
+
+def _keep_top_k_per_row(matrix, k):
+    matrix = matrix.tocsr()
+    data, indices, indptr = [], [], [0]
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        row_data = matrix.data[start:end]
+        row_indices = matrix.indices[start:end]
+        if len(row_data) > k:
+            keep = np.argpartition(-row_data, k)[:k]
+            row_data, row_indices = row_data[keep], row_indices[keep]
+        data.append(row_data)
+        indices.append(row_indices)
+        indptr.append(indptr[-1] + len(row_data))
+
+    return sparse.csr_matrix(
+        (np.concatenate(data) if data else np.array([], dtype=np.float32),
+         np.concatenate(indices) if indices else np.array([], dtype=np.int32),
+         np.asarray(indptr)),
+        shape=matrix.shape
+    )
+
+
+def item_similarity(interactions: InteractionMatrix, neighbours=NEIGHBOURS_PER_ITEM):
+    """
+    شباهت کسینوسی آیتم‌ها بر اساس تعداد کاربران مشترک (co-occurrence).
+    """
+    binary = interactions.matrix.copy()
+    binary.data[:] = 1.0
+
+    co_occurrence = (binary.T @ binary).tocsr()
+    norms = np.sqrt(co_occurrence.diagonal())
+    co_occurrence.setdiag(0)
+    co_occurrence.eliminate_zeros()
+
+    inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    scale = sparse.diags(inverse.astype(np.float32))
+    similarity = (scale @ co_occurrence @ scale).tocsr()
+
+    return _keep_top_k_per_row(similarity, neighbours)
+
+
+def _top(item_indices, scores, n):
+    if len(scores) > n:
+        keep = np.argpartition(-scores, n)[:n]
+        item_indices, scores = item_indices[keep], scores[keep]
+    order = np.argsort(-scores, kind="stable")
+    return item_indices[order], scores[order]
+
+
+def recommend(
+    interactions: InteractionMatrix,
+    similarity,
+    user_ids,
+    top_n,
+    item_categories=None,
+    user_categories=None,
+    category_boost=0.5,
+    candidate_items=None,
+):
+    """
+    top-N پیشنهاد برای کاربران داده شده.
+
+    Args:
+        item_categories: item_id -> دسته‌بندی
+        user_categories: user_id -> مجموعه‌ی دسته‌های مورد علاقه
+        category_boost: ضریب افزایش امتیاز آیتم‌های هم‌دسته با علاقه‌مندی کاربر
+        candidate_items: مجموعه‌ی آیتم‌های مجاز (مثلاً آیتم‌های حذف نشده)
+
+    Yields:
+        (user_id, item_ids, scores)
+    """
+    item_categories = item_categories or {}
+    user_categories = user_categories or {}
+    items = interactions.items
+
+    allowed = None
+    if candidate_items is not None:
+        allowed = np.isin(items, np.fromiter(candidate_items, dtype=np.int64, count=len(candidate_items)))
+
+    popularity = interactions.popularity()
+    if len(popularity) and popularity.max() > 0:
+        popularity = popularity / popularity.max()
+
+    # برای کاربر بدون سابقه همه‌ی آیتم‌های دسته کاندید هستند، حتی بدون هیچ تعاملی
+    category_items = {}
+    for item_id, category in item_categories.items():
+        if category is not None:
+            category_items.setdefault(category, []).append(item_id)
+    item_popularity = dict(zip(items.tolist(), popularity.tolist()))
+
+    for user_id in user_ids:
+        row = interactions.user_row(user_id)
+        preferred = user_categories.get(user_id, set())
+
+        if row is not None:
+            history = interactions.matrix.getrow(row)
+            scores_row = (history @ similarity).tocsr()
+            candidates = scores_row.indices
+            scores = scores_row.data.astype(np.float32)
+
+            # آیتم‌هایی که کاربر قبلاً دیده یا پسندیده حذف می‌شوند
+            unseen = ~np.isin(candidates, history.indices)
+            candidates, scores = candidates[unseen], scores[unseen]
+        elif preferred:
+            # کاربر بدون سابقه: محبوب‌ترین آیتم‌های دسته‌های مورد علاقه
+            item_ids = np.array(sorted({
+                item_id for category in preferred for item_id in category_items.get(category, ())
+            }), dtype=np.int64)
+            if len(item_ids):
+                scores = np.array([item_popularity.get(int(i), 0.0) for i in item_ids], dtype=np.float32)
+                yield (user_id, *_top(item_ids, scores, top_n))
+            continue
+        else:
+            continue
+
+        if allowed is not None and len(candidates):
+            keep = allowed[candidates]
+            candidates, scores = candidates[keep], scores[keep]
+
+        if preferred and len(candidates):
+            boost = np.fromiter(
+                (item_categories.get(int(items[index])) in preferred for index in candidates),
+                dtype=bool,
+                count=len(candidates)
+            )
+            scores = scores * np.where(boost, 1.0 + category_boost, 1.0).astype(np.float32)
+
+        if not len(candidates):
+            continue
+
+        top_indices, top_scores = _top(candidates, scores, top_n)
+        yield user_id, items[top_indices], top_scores
+
+
+def popular(interactions: InteractionMatrix, top_n, candidate_items=None):
+    """
+    پیشنهاد عمومی: محبوب‌ترین آیتم‌ها
+    """
+    scores = interactions.popularity().astype(np.float32)
+    indices = np.arange(len(scores))
+    if candidate_items is not None:
+        keep = np.isin(interactions.items, np.fromiter(candidate_items, dtype=np.int64, count=len(candidate_items)))
+        indices, scores = indices[keep], scores[keep]
+
+    top_indices, top_scores = _top(indices, scores, top_n)
+    return interactions.items[top_indices], top_scores
@@ -0,0 +1,28 @@
+"""
+ساخت پیشنهادهای کاربران
+
+اجرا:
+    python -m src.recommendations.job            # ساخت کامل
+    python -m src.recommendations.job --incremental
+"""
+import sys
+import json
+import time
+
+from src.database.db_manager import get_db_manager
+
+
+def main():
+    incremental = "--incremental" in sys.argv[1:]
+
+    start = time.perf_counter()
+    result = get_db_manager().recommendation.rebuild(full=not incremental)
+    if result is None:
+        print("Another recommendation build is running")
+        sys.exit(1)
+
+    print(json.dumps({"written": result, "seconds": round(time.perf_counter() - start, 2)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
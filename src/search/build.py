@@ -0,0 +1,54 @@
+"""
+ساخت بردار متنی برای محصولاتی که هنوز در product_vectors ردیف ندارند
+(محصولات قبل از فعال شدن شاخص شباهت). محصولات جدید هنگام create/update بردار می‌گیرند.
+
+اجرا:
+    python -m src.search.build
+    python -m src.search.build --all     # محاسبه‌ی دوباره‌ی همه
+"""
+import sys
+import json
+import time
+
+from sqlalchemy import select
+
+from src.database.db_manager import get_db_manager
+from src.database.managers.product_manager import store_product_vector
+from src.database.models import Product, ProductVector
+
+BATCH_SIZE = 1000
+
+
+def main():
+    rebuild_all = "--all" in sys.argv[1:]
+
+    start = time.perf_counter()
+    session = get_db_manager().get_session()
+    written = 0
+    last_id = 0
+    try:
+        while True:
+            stmt = select(Product).where(Product.id > last_id)
+            if not rebuild_all:
+                stmt = stmt.where(~select(ProductVector.id).where(
+                    ProductVector.product_id == Product.id
+                ).exists())
+            products = session.scalars(stmt.order_by(Product.id).limit(BATCH_SIZE)).all()
+            if not products:
+                break
+
+            for product in products:
+                store_product_vector(session, product)
+            last_id = products[-1].id
+            session.commit()
+            session.expunge_all()
+
+            written += len(products)
+    finally:
+        session.close()
+
+    print(json.dumps({"written": written, "seconds": round(time.perf_counter() - start, 2)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+شاخص شباهت محصولات
+
+- هر محصول با بردار hashed character-trigram از عنوان و توضیحاتش نمایش داده می‌شود
+  (بدون vocabulary، پس بردار هر محصول مستقل و به صورت افزایشی قابل محاسبه است).
+- جستجوی تقریبی نزدیک‌ترین همسایه با LSH (random hyperplanes): چند جدول،
+  هر جدول کلیدهای مرتب شده + searchsorted، بدون dict بزرگ در حافظه؛
+  تغییرات به صورت افزایشی اضافه می‌شوند.
+- امتیاز نهایی (کسینوسی + Jaccard تگ‌ها) در ProductManager روی چند کاندید اول محاسبه می‌شود.
+"""
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+VECTOR_DIM = int(os.getenv("SIMILARITY_DIM", 128))
+LSH_TABLES = int(os.getenv("SIMILARITY_LSH_TABLES", 8))
+LSH_BITS = int(os.getenv("SIMILARITY_LSH_BITS", 12))
+
+# برای کاتالوگ کوچک جستجوی کامل از LSH سریع‌تر و دقیق‌تر است
+BRUTE_FORCE_LIMIT = 20000
+
+# seed ثابت تا همه‌ی workerها hyperplaneهای یکسان داشته باشند
+LSH_SEED = 20240601
+
+VECTOR_DTYPE = np.float16
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def product_text(title, summary=None, long_description=None) -> str:
+    # عنوان دو بار آمده تا وزن بیشتری داشته باشد
+    return " ".join(part for part in (title, title, summary, long_description) if part)
+
+
+def text_vector(text: str, dim: int = VECTOR_DIM) -> np.ndarray:
+    """
+    بردار نرمال شده از trigramهای کاراکتری (signed feature hashing + log1p)
+    """
+    text = _WHITESPACE_RE.sub(" ", (text or "").lower()).strip()
+    vector = np.zeros(dim, dtype=np.float32)
+    if not text:
+        return vector
+
+    padded = f" {text} "
+    counts = {}
+    for i in range(len(padded) - 2):
+        digest = zlib.crc32(padded[i:i + 3].encode("utf-8"))
+        counts[digest] = counts.get(digest, 0) + 1
+
+    for digest, count in counts.items():
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % dim] += sign * np.log1p(count)
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def encode_vector(vector: np.ndarray) -> bytes:
+    return vector.astype("<f2").tobytes()
+
+
+def decode_vector(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype="<f2").astype(VECTOR_DTYPE)
+
+
+def jaccard(a, b) -> float:
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class SimilarityIndex:
+    """
+    بردار همه‌ی محصولات در یک ماتریس (float16) به همراه جداول LSH.
+
+    - ماتریس با ظرفیت اضافه (رشد هندسی) نگه داشته می‌شود تا افزودن یک محصول کپی کامل نباشد.
+    - جداول LSH یک بار (در اولین query بالای BRUTE_FORCE_LIMIT) ساخته می‌شوند؛ بعد از آن
+      فقط ردیف‌های جدید یا تغییر کرده hash می‌شوند و در یک لیست کوچک pending می‌مانند
+      تا وقتی بزرگ شد با آرایه‌ی مرتب merge شود.
+    - ورودی قدیمی ردیف تغییر کرده در آرایه‌ی مرتب می‌ماند و هنگام query با کلید فعلی ردیف
+      کنار گذاشته می‌شود؛ وقتی تعدادشان زیاد شد جداول از نو ساخته می‌شوند.
+    """
+
+    # حداقل ظرفیت ماتریس و اندازه‌ی pending قبل از merge
+    MIN_CAPACITY = 1024
+    MIN_PENDING = 1024
+
+    def __init__(self, dim=VECTOR_DIM, tables=LSH_TABLES, bits=LSH_BITS):
+        self.dim = dim
+        rng = np.random.default_rng(LSH_SEED)
+        self.planes = rng.standard_normal((tables, bits, dim)).astype(np.float32)
+        self.powers = (1 << np.arange(bits)).astype(np.int64)
+
+        self.size = 0
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._vectors = np.zeros((0, dim), dtype=VECTOR_DTYPE)
+        self._alive = np.zeros(0, dtype=bool)
+        self.row_of = {}
+
+        # کلید فعلی هر ردیف در هر جدول (tables, capacity)؛ None یعنی جداول هنوز ساخته نشده‌اند
+        self._keys = None
+        self._sorted_keys = None
+        self._order = None
+        self._pending = []
+        self._stale = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.row_of)
+
+    @property
+    def ids(self):
+        return self._ids[:self.size]
+
+    @property
+    def vectors(self):
+        return self._vectors[:self.size]
+
+    @property
+    def alive(self):
+        return self._alive[:self.size]
+
+    def get(self, product_id):
+        row = self.row_of.get(product_id)
+        return None if row is None else self._vectors[row].astype(np.float32)
+
+    def upsert(self, product_ids, vectors):
+        """
+        افزودن یا به‌روزرسانی بردارها؛ برداری که تغییری نکرده نادیده گرفته می‌شود.
+
+        Returns:
+            int: تعداد ردیف‌های اضافه یا تغییر کرده
+        """
+        with self._lock:
+            changed, new = [], {}
+            for product_id, vector in zip(product_ids, vectors):
+                vector = np.asarray(vector, dtype=VECTOR_DTYPE)
+                row = self.row_of.get(product_id)
+                if row is None:
+                    new[product_id] = vector
+                elif not np.array_equal(self._vectors[row], vector):
+                    self._vectors[row] = vector
+                    changed.append(row)
+
+            if new:
+                start = self.size
+                self._reserve(start + len(new))
+                self._ids[start:start + len(new)] = list(new)
+                self._vectors[start:start + len(new)] = np.asarray(list(new.values()), dtype=VECTOR_DTYPE)
+                self._alive[start:start + len(new)] = True
+                for offset, product_id in enumerate(new):
+                    self.row_of[product_id] = start + offset
+                self.size += len(new)
+
+            rows = changed + list(range(self.size - len(new), self.size))
+            if rows and self._keys is not None:
+                self._stale += len(changed)
+                self._index_rows(np.asarray(rows, dtype=np.int64))
+            return len(rows)
+
+    def remove(self, product_ids):
+        with self._lock:
+            for product_id in product_ids:
+                row = self.row_of.pop(product_id, None)
+                if row is not None:
+                    self._alive[row] = False
+
+    def _reserve(self, size):
+        capacity = len(self._ids)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity + capacity // 2, self.MIN_CAPACITY)
+
+        def grow(array, shape):
+            grown = np.zeros(shape, dtype=array.dtype)
+            grown[..., :array.shape[-1]] = array
+            return grown
+
+        self._ids = grow(self._ids, capacity)
+        self._alive = grow(self._alive, capacity)
+        vectors = np.zeros((capacity, self.dim), dtype=VECTOR_DTYPE)
+        vectors[:self.size] = self._vectors[:self.size]
+        self._vectors = vectors
+        if self._keys is not None:
+            self._keys = grow(self._keys, (len(self._keys), capacity))
+
+    def _hash(self, vectors, chunk_size=65536):
+        # (tables, n) کلید هر بردار در هر جدول
+        tables, bits, _dim = self.planes.shape
+        flat = self.planes.reshape(tables * bits, self.dim)
+        keys = np.empty((tables, len(vectors)), dtype=np.int64)
+        for start in range(0, len(vectors), chunk_size):
+            block = vectors[start:start + chunk_size].astype(np.float32)
+            signs = (flat @ block.T > 0).reshape(tables, bits, -1).astype(np.int64)
+            keys[:, start:start + len(block)] = np.tensordot(signs, self.powers, axes=([1], [0]))
+        return keys
+
+    def _rebuild_buckets(self):
+        keys = self._hash(self.vectors)
+        self._keys = np.zeros((len(keys), len(self._ids)), dtype=np.int64)
+        self._keys[:, :self.size] = keys
+        self._order = np.argsort(keys, axis=1, kind="stable")
+        self._sorted_keys = np.take_along_axis(keys, self._order, axis=1)
+        self._pending = []
+        self._stale = 0
+
+    def _index_rows(self, rows):
+        self._keys[:, rows] = self._hash(self._vectors[rows])
+        self._pending.extend(rows.tolist())
+
+        if self._stale > self.size // 4:
+            self._rebuild_buckets()
+        elif len(self._pending) > max(self.MIN_PENDING, self.size // 32):
+            self._merge_pending()
+
+    def _merge_pending(self):
+        rows = np.unique(np.asarray(self._pending, dtype=np.int64))
+        keys = self._keys[:, rows]
+        order = np.argsort(keys, axis=1, kind="stable")
+        keys = np.take_along_axis(keys, order, axis=1)
+        rows = rows[order]
+
+        merged_keys = np.empty((len(keys), self._sorted_keys.shape[1] + rows.shape[1]), dtype=np.int64)
+        merged_order = np.empty_like(merged_keys)
+        for table in range(len(keys)):
+            positions = np.searchsorted(self._sorted_keys[table], keys[table], side="right")
+            merged_keys[table] = np.insert(self._sorted_keys[table], positions, keys[table])
+            merged_order[table] = np.insert(self._order[table], positions, rows[table])
+        self._sorted_keys, self._order = merged_keys, merged_order
+        self._pending = []
+
+    def _candidates(self, vector):
+        with self._lock:
+            if self._keys is None:
+                self._rebuild_buckets()
+            query_keys = self._hash(vector[None, :])[:, 0]
+            pending = np.asarray(self._pending, dtype=np.int64)
+            rows = []
+            for table, key in enumerate(query_keys):
+                left = np.searchsorted(self._sorted_keys[table], key, side="left")
+                right = np.searchsorted(self._sorted_keys[table], key, side="right")
+                found = self._order[table, left:right]
+                # ورودی‌های کهنه‌ی ردیف‌هایی که بعداً تغییر کرده‌اند
+                rows.append(found[self._keys[table, found] == key])
+                if len(pending):
+                    rows.append(pending[self._keys[table, pending] == key])
+        return np.unique(np.concatenate(rows)) if rows else np.zeros(0, dtype=np.int64)
+
+    def query(self, vector, limit, exclude_id=None):
+        """
+        نزدیک‌ترین محصولات به بردار داده شده.
+
+        Returns:
+            (np.ndarray, np.ndarray): idها و شباهت کسینوسی به ترتیب نزولی
+        """
+        if not len(self.row_of):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        vector = np.asarray(vector, dtype=np.float32)
+        if self.size <= BRUTE_FORCE_LIMIT:
+            rows = np.arange(self.size)
+        else:
+            rows = self._candidates(vector)
+
+        rows = rows[self._alive[rows]]
+        if exclude_id is not None:
+            rows = rows[self._ids[rows] != exclude_id]
+        if not len(rows):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        scores = self._vectors[rows].astype(np.float32) @ vector
+        if len(scores) > limit:
+            keep = np.argpartition(-scores, limit)[:limit]
+            rows, scores = rows[keep], scores[keep]
+        order = np.argsort(-scores, kind="stable")
+        return self._ids[rows[order]], scores[order]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> SimilarityIndex:
+    """شاخص مشترک هر process"""
+    global _index
+
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SimilarityIndex()
+    return _index
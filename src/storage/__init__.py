@@ -0,0 +1,3 @@
+"""
+پکیج ذخیره‌سازی فایل‌های آپلود شده
+"""
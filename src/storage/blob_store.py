@@ -0,0 +1,98 @@
+import os
+import gzip
+import hashlib
+from datetime import datetime
+
+# ریشه‌ی تمام فایل‌های آپلود شده (همان مسیری که در /uploads سرو می‌شود)
+UPLOAD_ROOT = "uploads"
+BLOB_DIR = os.path.join(UPLOAD_ROOT, "blobs")
+
+MAX_EXT_LENGTH = 16
+
+# اسنادی که نسخه‌ی gzip آن‌ها کنار فایل اصلی ذخیره می‌شود (برای سرو مستقیم)
+PRECOMPRESS_EXTENSIONS = {".pdf", ".txt", ".csv", ".json", ".svg", ".html", ".xml", ".css", ".js", ".md"}
+PRECOMPRESS_MIN_SAVING = 0.1
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+
+def content_hash(content: bytes) -> str:
+    """هش SHA-256 محتوای فایل (کلید ذخیره‌سازی)"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def normalize_ext(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    if len(ext) > MAX_EXT_LENGTH or not ext[1:].isalnum():
+        return ""
+    return ext
+
+
+def blob_path(sha256: str, ext: str = "") -> str:
+    """
+    مسیر نسبی فایل بر اساس هش محتوا.
+    دو سطح پوشه برای جلوگیری از شلوغ شدن یک دایرکتوری:
+        uploads/blobs/ab/cd/abcd...<ext>
+    """
+    return "/".join([BLOB_DIR, sha256[:2], sha256[2:4], f"{sha256}{ext}"])
+
+
+def write_blob(path: str, content: bytes):
+    """
+    نوشتن اتمیک فایل روی دیسک.
+    اگر فایل از قبل وجود داشته باشد (همان محتوا)، دوباره نوشته نمی‌شود.
+    """
+    if os.path.exists(path):
+        return
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+    if os.path.splitext(path)[1] in PRECOMPRESS_EXTENSIONS:
+        precompress(path, content)
+
+
+def precompress(path: str, content: bytes):
+    """ذخیره‌ی نسخه‌ی .gz فقط اگر واقعاً حجم را کم کند"""
+    compressed = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(compressed) > len(content) * (1 - PRECOMPRESS_MIN_SAVING):
+        return
+
+    tmp_path = f"{path}.gz.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(compressed)
+    os.replace(tmp_path, f"{path}.gz")
+
+
+def source_path(path: str) -> str:
+    """مسیر فایل اصلی برای نسخه‌های فشرده (file.pdf.gz -> file.pdf)"""
+    for suffix in COMPRESSED_SUFFIXES:
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+
+def remove_blob_file(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def modified_at(path: str) -> datetime:
+    try:
+        return datetime.utcfromtimestamp(os.path.getmtime(path))
+    except OSError:
+        return datetime.utcnow()
+
+
+def iter_blob_files():
+    """پیمایش تمام فایل‌های موجود در پوشه‌ی blobs (برای پاکسازی فایل‌های یتیم)"""
+    for root, _dirs, files in os.walk(BLOB_DIR):
+        for name in files:
+            if name.endswith(".tmp"):
+                continue
+            yield os.path.join(root, name).replace(os.sep, "/")
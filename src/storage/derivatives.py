@@ -0,0 +1,118 @@
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from src.storage.blob_store import UPLOAD_ROOT
+
+logger = logging.getLogger("derivatives")
+
+DERIVATIVE_DIR = os.path.join(UPLOAD_ROOT, "derivatives")
+
+# نام نسخه -> (حداکثر ضلع به پیکسل، فرمت خروجی)
+# None یعنی همان فرمت فایل اصلی
+VARIANTS = {
+    "thumbnail": (160, None),
+    "medium": (640, None),
+    "webp": (640, "WEBP"),
+}
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp"}
+
+OUTPUT_FORMATS = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG", ".webp": "WEBP"}
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+
+_executor = None
+
+
+def is_image(path: str) -> bool:
+    return os.path.splitext(path or "")[1].lower() in IMAGE_EXTENSIONS
+
+
+def derivative_path(source_path: str, variant: str) -> str:
+    stem, ext = os.path.splitext(os.path.basename(source_path))
+    _size, fmt = VARIANTS[variant]
+    if fmt == "WEBP":
+        ext = ".webp"
+    elif ext.lower() not in OUTPUT_FORMATS:
+        ext = ".png"
+    return "/".join([DERIVATIVE_DIR, stem[:2], f"{stem}_{variant}{ext.lower()}"])
+
+
+def generate_derivatives(source_path: str) -> dict:
+    """
+    ساخت نسخه‌های کوچک‌تر یک تصویر. داخل process pool اجرا می‌شود.
+    اگر نسخه‌ای از قبل ساخته شده باشد (تصویر تکراری در blob store)، دوباره ساخته نمی‌شود.
+
+    Returns:
+        dict: نام نسخه -> مسیر فایل
+    """
+    from PIL import Image, ImageOps
+
+    results = {}
+    with Image.open(source_path) as original:
+        original = ImageOps.exif_transpose(original)
+
+        for variant, (max_side, _fmt) in VARIANTS.items():
+            out_path = derivative_path(source_path, variant)
+            results[variant] = out_path
+            if os.path.exists(out_path):
+                continue
+
+            image = original.copy()
+            image.thumbnail((max_side, max_side))
+
+            save_format = OUTPUT_FORMATS[os.path.splitext(out_path)[1]]
+            if save_format == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            tmp_path = f"{out_path}.{os.getpid()}.tmp"
+            image.save(tmp_path, format=save_format, optimize=True, quality=82)
+            os.replace(tmp_path, out_path)
+
+    return results
+
+
+def _get_executor():
+    global _executor
+
+    if _executor is None:
+        # spawn: worker اصلی thread و event loop دارد و fork امن نیست
+        _executor = ProcessPoolExecutor(
+            max_workers=IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    return _executor
+
+
+def submit(source_path: str, on_done):
+    """
+    ارسال یک تصویر به صف ساخت نسخه‌ها.
+
+    Args:
+        source_path (str): مسیر فایل اصلی روی دیسک
+        on_done (callable): با dict مسیر نسخه‌ها صدا زده می‌شود
+    """
+    if not is_image(source_path):
+        return None
+
+    def _callback(future):
+        try:
+            on_done(future.result())
+        except Exception as e:
+            logger.error(f"Derivative generation failed for {source_path}: {e}")
+
+    future = _get_executor().submit(generate_derivatives, source_path)
+    future.add_done_callback(_callback)
+    return future
+
+
+def shutdown():
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
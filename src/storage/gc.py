@@ -0,0 +1,18 @@
+"""
+پاکسازی blobهای بدون ارجاع
+
+اجرا:
+    python -m src.storage.gc
+"""
+import json
+
+from src.database.db_manager import get_db_manager
+
+
+def main():
+    result = get_db_manager().blob.collect_garbage()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+اندازه‌گیری زمان مراحل import و startup هر worker
+"""
+import time
+from contextlib import contextmanager
+
+# زمان شروع process تا حد امکان زود ثبت می‌شود
+PROCESS_START = time.perf_counter()
+
+_phases = []
+
+
+@contextmanager
+def phase(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, time.perf_counter() - start))
+
+
+def report() -> dict:
+    """
+    Returns:
+        dict: زمان هر مرحله و مجموع از شروع process (میلی‌ثانیه)
+    """
+    return {
+        "phases": [
+            {"name": name, "ms": round(seconds * 1000, 1)}
+            for name, seconds in _phases
+        ],
+        "since_process_start_ms": round((time.perf_counter() - PROCESS_START) * 1000, 1),
+    }
@@ -0,0 +1,129 @@
+"""
+بافر درون-حافظه‌ای رویدادهای tracking
+
+endpoint فقط رویداد را به بافر اضافه می‌کند؛ نوشتن در دیتابیس دسته‌ای و در thread جدا
+(TrackingManager.flush) انجام می‌شود. بافر هر worker مستقل است.
+"""
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    نگاشت محدود session_id -> id ردیف TrackingSession؛ قدیمی‌ترین کلید حذف می‌شود.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class PendingSession:
+    """تغییرات جمع شده‌ی یک session تا flush بعدی"""
+
+    __slots__ = ("views", "first_seen", "last_activity", "user_id", "meta")
+
+    def __init__(self, first_seen, user_id=None, meta=None):
+        self.views = 0
+        self.first_seen = first_seen
+        self.last_activity = first_seen
+        self.user_id = user_id
+        self.meta = meta or {}
+
+
+class TrackingBuffer:
+    """
+    page viewها به صورت لیست و به‌روزرسانی sessionها به صورت coalesced
+    (یک رکورد برای هر session_id، هر تعداد رویداد که داشته باشد).
+    """
+
+    def __init__(self, max_pending):
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._views = []
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._views)
+
+    def add(self, session_id, pages, user_id=None, meta=None) -> bool:
+        """
+        Args:
+            pages: لیست (page_url, viewed_at)
+
+        Returns:
+            bool: False اگر بافر پر باشد و رویدادها دور ریخته شوند
+        """
+        with self._lock:
+            if len(self._views) + len(pages) > self.max_pending:
+                self.dropped += len(pages)
+                return False
+
+            pending = self._sessions.get(session_id)
+            if pending is None:
+                pending = self._sessions[session_id] = PendingSession(pages[0][1], user_id, meta)
+            elif user_id is not None:
+                pending.user_id = user_id
+
+            for page_url, viewed_at in pages:
+                self._views.append((session_id, page_url, viewed_at))
+                if viewed_at > pending.last_activity:
+                    pending.last_activity = viewed_at
+                if viewed_at < pending.first_seen:
+                    pending.first_seen = viewed_at
+            pending.views += len(pages)
+            return True
+
+    def drain(self):
+        """
+        Returns:
+            (list, dict): page viewها و sessionهای در انتظار؛ بافر خالی می‌شود
+        """
+        with self._lock:
+            views, self._views = self._views, []
+            sessions, self._sessions = self._sessions, {}
+        return views, sessions
+
+    def requeue(self, views, sessions):
+        """برگرداندن دسته‌ای که نوشتنش شکست خورد (تا سقف max_pending)"""
+        with self._lock:
+            room = self.max_pending - len(self._views)
+            if len(views) > room:
+                self.dropped += len(views) - max(room, 0)
+                return False
+
+            self._views[:0] = views
+            for session_id, pending in sessions.items():
+                current = self._sessions.get(session_id)
+                if current is None:
+                    self._sessions[session_id] = pending
+                    continue
+                current.views += pending.views
+                current.first_seen = min(current.first_seen, pending.first_seen)
+                current.last_activity = max(current.last_activity, pending.last_activity)
+                current.user_id = current.user_id or pending.user_id
+                current.meta = current.meta or pending.meta
+            return True
@@ -0,0 +1,75 @@
+"""
+تنظیمات مشترک تست‌ها: دیتابیس SQLite موقت و داده‌ی نمونه
+
+متغیرهای محیطی قبل از import برنامه تنظیم می‌شوند (Database و managerها آن‌ها را هنگام import می‌خوانند).
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+_WORK_DIR = tempfile.mkdtemp(prefix="exibition-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_WORK_DIR, 'test.sqlite3')}"
+os.environ["VIEW_PARTITIONING"] = "false"
+os.environ["NPLUSONE_RAISE"] = "false"
+# فایل‌های lock و uploads نسبی هستند
+os.chdir(_WORK_DIR)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COMPANIES = 5
+PRODUCTS_PER_COMPANY = 6
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from interface.api.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def catalog(client):
+    """
+    چند شرکت با جزئیات کامل و چند محصول با تگ و تصویر برای هر شرکت؛
+    تعداد ردیف‌های فرزند از آستانه‌ی N+1 بیشتر است.
+    """
+    from src.database.db_manager import get_db_manager
+    from src.database.models import User, CompanyProfile, RoleEnum
+
+    db = get_db_manager()
+    session = db.get_session()
+    try:
+        company_ids = []
+        for i in range(COMPANIES):
+            user = User(
+                username=f"company{i}", email=f"company{i}@example.com", password="x", role=RoleEnum.exhibitor,
+            )
+            session.add(user)
+            session.flush()
+            company = CompanyProfile(user_id=user.id, company_name=f"Company {i}", industry_category="tech")
+            session.add(company)
+            session.flush()
+            company_ids.append(company.id)
+        session.commit()
+    finally:
+        session.close()
+
+    product_ids = []
+    for company_id in company_ids:
+        for j in range(4):
+            db.company.add_website(company_id, name=f"site{j}", url=f"https://example.com/{company_id}/{j}")
+            db.company.add_address(company_id, name=f"office{j}", address=f"street {j}")
+            db.company.add_phone(company_id, name=f"phone{j}", phone_number=f"021000{j}")
+            db.company.add_tag(company_id, tag=f"tag{j}")
+        for j in range(PRODUCTS_PER_COMPANY):
+            product = db.product.create(
+                company_id=company_id, title=f"Product {company_id}-{j}", summary="summary", tags=["common", f"tag{j}"],
+            )
+            db.product.add_image(product.id, url=f"uploads/blobs/{product.id}.png", orginal_name="image.png")
+            db.product.add_brochure(product.id, title="brochure", orginal_name="b.pdf", url="uploads/blobs/b.pdf")
+            product_ids.append(product.id)
+
+    return {"company_ids": company_ids, "product_ids": product_ids}
@@ -0,0 +1,49 @@
+"""
+بودجه‌ی query مسیرهای پرتکرار: هر N+1 (مثلاً lazy load در serializer) تست را fail می‌کند
+"""
+import pytest
+
+from src.monitoring.queries import NPlusOneError, detect_n_plus_one
+
+THRESHOLD = 3
+
+
+def test_company_detail(client, catalog):
+    with detect_n_plus_one(threshold=THRESHOLD):
+        response = client.get(f"/company/{catalog['company_ids'][0]}")
+    assert response.status_code == 200
+    assert len(response.json()["websites"]) == 4
+
+
+def test_product_list(client, catalog):
+    with detect_n_plus_one(threshold=THRESHOLD):
+        response = client.get("/products/", params={"limit": 50})
+    assert response.status_code == 200
+    assert len(response.json()) == len(catalog["product_ids"])
+
+
+def test_product_list_with_favorites(client, catalog):
+    with detect_n_plus_one(threshold=THRESHOLD):
+        response = client.get("/products/", params={"limit": 50, "with_favorites": True, "user_id": 1})
+    assert response.status_code == 200
+
+
+def test_company_products(client, catalog):
+    with detect_n_plus_one(threshold=THRESHOLD):
+        response = client.get(f"/products/company/{catalog['company_ids'][0]}")
+    assert response.status_code == 200
+
+
+def test_lazy_loading_is_detected(client, catalog):
+    """خود detector: lazy load روابط در حلقه باید گزارش شود"""
+    from src.database.db_manager import get_db_manager
+    from src.database.models import Product
+
+    session = get_db_manager().get_session()
+    try:
+        with pytest.raises(NPlusOneError):
+            with detect_n_plus_one(threshold=THRESHOLD):
+                for product in session.query(Product).all():
+                    list(product.tags)
+    finally:
+        session.close()